@@ -0,0 +1,9 @@
+"""
+Analytics Package
+Offline analysis over historical claim results
+"""
+
+from .threshold_simulator import load_component_scores, simulate_thresholds
+from .backtest import run_backtest, iter_claim_inputs
+
+__all__ = ['load_component_scores', 'simulate_thresholds', 'run_backtest', 'iter_claim_inputs']
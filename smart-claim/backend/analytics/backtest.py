@@ -0,0 +1,296 @@
+"""
+Backtest / Replay Engine
+Re-scores historical claim inputs with a candidate model and/or config and
+reports how the decisions would change
+
+Each batch of inputs runs through main.process_claims() twice with the
+vectorized batch path: once with the deployed model and config (baseline)
+and once with the candidate. Nothing is saved: the production claims
+store, result cache and review queue are never touched.
+
+Config overrides replace the named config.py values for the candidate run
+only (in config and in every pipeline module that imported them).
+
+Usage:
+    python analytics/backtest.py data/generated_claims --model models/candidate.pkl
+    python analytics/backtest.py claims.ndjson.gz --set SCORE_THRESHOLD_AUTO_REJECT=70
+    python analytics/backtest.py data/generated_claims --config candidate.json --diff-out flips.ndjson
+"""
+
+import argparse
+import glob
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from main import STREAM_BATCH_SIZE, iter_ndjson, load_reference_data, process_claims
+from ml_model.feature_cache import get_feature_cache
+from ml_model.model_inference import load_deployed, load_model, load_scaler
+from storage.result_cache import SCORING_CONFIG_KEYS
+
+DECISIONS = ('ACCEPTED', 'NEEDS_REVIEW', 'REJECTED')
+
+# Modules that copy config values at import time (`from config import ...`)
+CONFIG_CONSUMERS = (
+    'main',
+    'fraud_detection.check_fraud_pasien',
+    'fraud_detection.check_fraud_faskes',
+    'ml_model.model_inference',
+)
+
+# Scoring values the pipeline reads when scoring. RED_FLAG_SCORES is part of
+# the result cache key but no check reads it, so overriding it changes nothing.
+OVERRIDABLE_CONFIG_KEYS = tuple(name for name in SCORING_CONFIG_KEYS if name != 'RED_FLAG_SCORES')
+
+
+def validate_overrides(overrides: Dict[str, Any]):
+    unknown = [name for name in overrides if name not in OVERRIDABLE_CONFIG_KEYS]
+    if unknown:
+        raise ValueError(f"Not an overridable scoring config value: {', '.join(unknown)} "
+                         f"(allowed: {', '.join(OVERRIDABLE_CONFIG_KEYS)})")
+
+
+@contextmanager
+def config_overrides(overrides: Dict[str, Any]):
+    """Temporarily replace config values everywhere the pipeline reads them"""
+    validate_overrides(overrides)
+    modules = [config] + [sys.modules[name] for name in CONFIG_CONSUMERS if name in sys.modules]
+    saved = []
+    try:
+        for module in modules:
+            for name, value in overrides.items():
+                if name in vars(module):
+                    saved.append((module, name, getattr(module, name)))
+                    setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in reversed(saved):
+            setattr(module, name, value)
+
+
+def iter_claim_inputs(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Claim inputs from directories of claim JSON files, JSON files (one claim
+    or a list) and NDJSON files (.ndjson / .jsonl, optionally .gz)
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_claim_inputs(sorted(glob.glob(os.path.join(path, '*.json'))))
+            continue
+
+        opener = gzip.open if path.endswith('.gz') else open
+        name = path[:-3] if path.endswith('.gz') else path
+        with opener(path, 'rt', encoding='utf-8') as f:
+            if name.endswith('.ndjson') or name.endswith('.jsonl'):
+                for line_number, item in iter_ndjson(f):
+                    if isinstance(item, dict):
+                        yield item
+                    else:
+                        print(f"Warning: {path}:{line_number} skipped ({item})", file=sys.stderr)
+            else:
+                data = json.load(f)
+                yield from (data if isinstance(data, list) else [data])
+
+
+def _batches(items: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DiffReport:
+    """Accumulates baseline vs candidate decisions"""
+
+    def __init__(self):
+        self.claims = 0
+        self.transitions = {before: {after: 0 for after in DECISIONS} for before in DECISIONS}
+        self.transition_amounts = {before: {after: 0 for after in DECISIONS} for before in DECISIONS}
+        self.flips_by_faskes = {}
+        self.score_delta_sum = 0
+        self.ai_delta_sum = 0
+
+    def add(self, baseline: Dict[str, Any], candidate: Dict[str, Any]) -> bool:
+        """Record one claim; returns True when the decision flipped"""
+        before, after = baseline['decision'], candidate['decision']
+        amount = baseline.get('claim_amount', 0) or 0
+        self.claims += 1
+        self.transitions[before][after] += 1
+        self.transition_amounts[before][after] += amount
+        self.score_delta_sum += candidate['fraud_scores']['total'] - baseline['fraud_scores']['total']
+        self.ai_delta_sum += candidate['fraud_scores']['ai'] - baseline['fraud_scores']['ai']
+        if before == after:
+            return False
+        faskes = self.flips_by_faskes.setdefault(baseline.get('faskes_name', 'Unknown'), {'flips': 0, 'amount': 0})
+        faskes['flips'] += 1
+        faskes['amount'] += amount
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        flips = {
+            f"{before}->{after}": {'claims': self.transitions[before][after],
+                                   'amount': self.transition_amounts[before][after]}
+            for before in DECISIONS for after in DECISIONS
+            if before != after and self.transitions[before][after]
+        }
+        claims = max(self.claims, 1)
+        return {
+            'claims': self.claims,
+            'flipped': sum(flip['claims'] for flip in flips.values()),
+            'amount_affected': sum(flip['amount'] for flip in flips.values()),
+            'baseline': {d: sum(self.transitions[d].values()) for d in DECISIONS},
+            'candidate': {d: sum(row[d] for row in self.transitions.values()) for d in DECISIONS},
+            'flips': flips,
+            'flips_by_faskes': dict(sorted(self.flips_by_faskes.items(), key=lambda kv: -kv[1]['flips'])),
+            'mean_total_score_delta': self.score_delta_sum / claims,
+            'mean_ai_score_delta': self.ai_delta_sum / claims,
+        }
+
+
+def run_backtest(claims: Iterable[Dict[str, Any]], candidate_model=None, candidate_scaler=None,
+                 overrides: Optional[Dict[str, Any]] = None, batch_size: int = STREAM_BATCH_SIZE,
+                 diff_stream: Optional[io.TextIOBase] = None) -> Dict[str, Any]:
+    """
+    Replay claims through baseline and candidate pipelines
+
+    Args:
+        claims: Iterable of claim inputs (streamed in batches)
+        candidate_model, candidate_scaler: Candidate artifacts; the deployed
+            ones when None
+        overrides: Candidate config values (names from OVERRIDABLE_CONFIG_KEYS)
+        batch_size: Claims per batch
+        diff_stream: Optional text stream receiving one JSON line per flipped claim
+
+    Returns:
+        Diff report dict
+    """
+    overrides = overrides or {}
+    reference_data = load_reference_data()
+    baseline_model, baseline_scaler, _ = load_deployed()
+    candidate_model = candidate_model if candidate_model is not None else baseline_model
+    candidate_scaler = candidate_scaler if candidate_scaler is not None else baseline_scaler
+
+    report = DiffReport()
+    start = time.perf_counter()
+    for batch in _batches(claims, batch_size):
+        baseline = process_claims(batch, save=False, reference_data=reference_data,
+                                  model=baseline_model, scaler=baseline_scaler)
+        with config_overrides(overrides):
+            candidate = process_claims(batch, save=False, reference_data=reference_data,
+                                       model=candidate_model, scaler=candidate_scaler)
+        for before, after in zip(baseline, candidate):
+            if report.add(before, after) and diff_stream is not None:
+                diff_stream.write(json.dumps({
+                    'claim_id': before['claim_id'],
+                    'faskes_name': before['faskes_name'],
+                    'claim_amount': before['claim_amount'],
+                    'baseline': {'decision': before['decision'], 'scores': before['fraud_scores']},
+                    'candidate': {'decision': after['decision'], 'scores': after['fraud_scores']},
+                }, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    result = report.to_dict()
+    result['seconds'] = time.perf_counter() - start
+    result['overrides'] = overrides
+    # With the same scaler, the candidate pass reuses the baseline's feature vectors
+    cache = get_feature_cache()
+    result['feature_cache'] = cache.stats() if cache is not None else None
+    return result
+
+
+def _parse_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'='*60}")
+    print("BACKTEST DECISION DIFF")
+    print(f"{'='*60}")
+    rate = report['claims'] / report['seconds'] if report['seconds'] else 0
+    print(f"Claims: {report['claims']}  ({report['seconds']:.1f}s, {rate:.0f} claims/s per pass pair)")
+    if report['overrides']:
+        print(f"Overrides: {json.dumps(report['overrides'], ensure_ascii=False)}")
+    if report.get('feature_cache'):
+        print(f"Feature cache hit ratio: {report['feature_cache']['hit_ratio']:.1%}")
+    print(f"\n{'':<14}{'baseline':>10}{'candidate':>11}")
+    for decision in DECISIONS:
+        print(f"{decision:<14}{report['baseline'][decision]:>10}{report['candidate'][decision]:>11}")
+
+    print(f"\nFlipped: {report['flipped']} claims, Rp {report['amount_affected']:,.0f}")
+    for transition, flip in report['flips'].items():
+        print(f"  {transition:<28} {flip['claims']:>7}   Rp {flip['amount']:>16,.0f}")
+    print(f"\nMean total score delta: {report['mean_total_score_delta']:+.2f}")
+    print(f"Mean AI score delta:    {report['mean_ai_score_delta']:+.2f}")
+
+    if report['flips_by_faskes']:
+        print("\nTop faskes by flips:")
+        for name, flip in list(report['flips_by_faskes'].items())[:10]:
+            print(f"  {name:<30} {flip['flips']:>6}   Rp {flip['amount']:>16,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay historical claims with a candidate model/config')
+    parser.add_argument('inputs', nargs='+',
+                        help='Claim input directories, JSON files or NDJSON files (.gz allowed)')
+    parser.add_argument('--model', help='Candidate model pickle (default: deployed model)')
+    parser.add_argument('--scaler', help='Candidate scaler pickle (default: deployed scaler)')
+    parser.add_argument('--config', help='JSON file of candidate config overrides')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='Candidate config override (VALUE parsed as JSON), repeatable')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE)
+    parser.add_argument('--diff-out', help='Write flipped claims as NDJSON to this path')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            overrides.update(json.load(f))
+    for item in args.set:
+        name, sep, value = item.partition('=')
+        if not sep:
+            parser.error(f"--set expects NAME=VALUE, got {item}")
+        overrides[name] = _parse_value(value)
+    try:
+        validate_overrides(overrides)
+    except ValueError as e:
+        parser.error(str(e))
+
+    candidate_model = load_model(args.model) if args.model else None
+    candidate_scaler = load_scaler(args.scaler) if args.scaler else None
+    if args.scaler and candidate_scaler is None:
+        parser.error(f"Scaler not found: {args.scaler}")
+
+    diff_stream = open(args.diff_out, 'w', encoding='utf-8') if args.diff_out else None
+    try:
+        report = run_backtest(iter_claim_inputs(args.inputs), candidate_model, candidate_scaler,
+                              overrides, args.batch_size, diff_stream)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if diff_stream is not None:
+            diff_stream.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Threshold What-If Simulator
+Replays the decision rule of main.decide() over stored component scores
+for a whole grid of (auto-accept, auto-reject) threshold pairs
+
+For each pair:
+    auto_reject flag          -> REJECTED
+    total <  accept threshold -> ACCEPTED
+    total >  reject threshold -> REJECTED
+    otherwise                 -> NEEDS_REVIEW
+with total = patient + faskes + ai, exactly as in main.decide().
+
+Claims without the auto-reject flag are sorted by total once; every
+threshold then becomes a searchsorted into the sorted totals and their
+cumulative amounts, so a grid of G pairs over N claims costs
+O(N log N + G log N) with no Python loop over claims or pairs.
+
+Usage:
+    python analytics/threshold_simulator.py
+    python analytics/threshold_simulator.py --accept 5:30:5 --reject 40:90:10 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List, Iterable, Optional
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SCORE_THRESHOLD_AUTO_ACCEPT, SCORE_THRESHOLD_AUTO_REJECT
+from storage.claims_store import DEFAULT_CLAIMS_PATH
+from storage.columnar import DEFAULT_EXPORT_DIR, ColumnarClaimsExport
+from storage.partitions import iter_claims
+
+DECISIONS = ('ACCEPTED', 'NEEDS_REVIEW', 'REJECTED')
+
+
+def scores_from_results(results: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Component score arrays from claim results (main.py output format)"""
+    results = list(results)
+    scores = [result.get('fraud_scores', {}) for result in results]
+    return {
+        'patient': np.array([s.get('patient', 0) for s in scores], dtype=np.float64),
+        'faskes': np.array([s.get('faskes', 0) for s in scores], dtype=np.float64),
+        'ai': np.array([s.get('ai', 0) for s in scores], dtype=np.float64),
+        'auto_reject': np.array([bool(r.get('auto_reject', False)) for r in results], dtype=bool),
+        'amount': np.array([r.get('claim_amount', 0) or 0 for r in results], dtype=np.float64),
+    }
+
+
+def load_component_scores(columnar_root: Optional[str] = DEFAULT_EXPORT_DIR,
+                          db_path: str = DEFAULT_CLAIMS_PATH) -> Dict[str, np.ndarray]:
+    """
+    Component scores of the stored history
+
+    Reads the columnar export (memory-mapped) when it has rows, otherwise
+    falls back to parsing the claims store (archive partitions + claims.json).
+    """
+    if columnar_root and os.path.exists(os.path.join(columnar_root, 'manifest.json')):
+        columns = ColumnarClaimsExport(columnar_root).columns()
+        if len(columns['claim_id']):
+            return {
+                'patient': np.asarray(columns['score_patient'], dtype=np.float64),
+                'faskes': np.asarray(columns['score_faskes'], dtype=np.float64),
+                'ai': np.asarray(columns['score_ai'], dtype=np.float64),
+                'auto_reject': np.asarray(columns['auto_reject'], dtype=bool),
+                'amount': np.asarray(columns['claim_amount'], dtype=np.float64),
+            }
+    return scores_from_results(iter_claims(db_path=db_path))
+
+
+def _grid(spec: str) -> np.ndarray:
+    """'a,b,c' or 'start:stop:step' (stop inclusive)"""
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(x) for x in spec.split(',')])
+
+
+def simulate_thresholds(scores: Dict[str, np.ndarray], accept_thresholds: Iterable[float],
+                        reject_thresholds: Iterable[float]) -> Dict[str, np.ndarray]:
+    """
+    Decision distribution for every (accept, reject) threshold pair
+
+    Args:
+        scores: Arrays from load_component_scores()
+        accept_thresholds: Candidate SCORE_THRESHOLD_AUTO_ACCEPT values (A)
+        reject_thresholds: Candidate SCORE_THRESHOLD_AUTO_REJECT values (R)
+
+    Returns:
+        dict of (A, R) arrays: '<decision>_count' and '<decision>_amount'
+        for ACCEPTED / NEEDS_REVIEW / REJECTED, plus 'accept' / 'reject'
+        (the grids) and 'claims' (N)
+    """
+    accept = np.asarray(list(accept_thresholds), dtype=np.float64)
+    reject = np.asarray(list(reject_thresholds), dtype=np.float64)
+
+    auto_reject = np.asarray(scores['auto_reject'], dtype=bool)
+    amount = np.asarray(scores['amount'], dtype=np.float64)
+    total = (np.asarray(scores['patient'], dtype=np.float64) +
+             np.asarray(scores['faskes'], dtype=np.float64) +
+             np.asarray(scores['ai'], dtype=np.float64))
+
+    scored = ~auto_reject
+    order = np.argsort(total[scored], kind='stable')
+    sorted_total = total[scored][order]
+    # cum_amount[k] = amount of the k lowest-scored claims
+    cum_amount = np.concatenate(([0.0], np.cumsum(amount[scored][order])))
+    scored_count = len(sorted_total)
+    scored_amount = cum_amount[-1]
+    crucial_count = int(auto_reject.sum())
+    crucial_amount = float(amount[auto_reject].sum())
+
+    # total < accept  ->  first `below` claims
+    below = np.searchsorted(sorted_total, accept, side='left')
+    # total > reject  ->  claims from `at_most` onwards
+    at_most = np.searchsorted(sorted_total, reject, side='right')
+
+    shape = (len(accept), len(reject))
+    accepted_count = np.broadcast_to(below[:, None], shape).astype(np.int64)
+    accepted_amount = np.broadcast_to(cum_amount[below][:, None], shape).astype(np.float64)
+    # decide() checks the accept threshold first, so when accept > reject the
+    # claims scoring in between are accepted, not rejected
+    rejected_from = np.maximum(below[:, None], at_most[None, :])
+    rejected_count = scored_count - rejected_from + crucial_count
+    rejected_amount = scored_amount - cum_amount[rejected_from] + crucial_amount
+
+    review_count = len(total) - accepted_count - rejected_count
+    review_amount = float(amount.sum()) - accepted_amount - rejected_amount
+
+    return {
+        'accept': accept,
+        'reject': reject,
+        'claims': len(total),
+        'ACCEPTED_count': accepted_count,
+        'NEEDS_REVIEW_count': review_count,
+        'REJECTED_count': rejected_count,
+        'ACCEPTED_amount': accepted_amount,
+        'NEEDS_REVIEW_amount': review_amount,
+        'REJECTED_amount': rejected_amount,
+    }
+
+
+def summary_rows(simulation: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """One dict per threshold pair (for printing / JSON)"""
+    rows = []
+    claims = max(simulation['claims'], 1)
+    for i, accept in enumerate(simulation['accept']):
+        for j, reject in enumerate(simulation['reject']):
+            row = {'accept': float(accept), 'reject': float(reject)}
+            for decision in DECISIONS:
+                row[f'{decision.lower()}_count'] = int(simulation[f'{decision}_count'][i, j])
+                row[f'{decision.lower()}_amount'] = float(simulation[f'{decision}_amount'][i, j])
+            row['review_rate'] = row['needs_review_count'] / claims
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='What-if simulation of decision thresholds')
+    parser.add_argument('--accept', default='0:30:5', help="Accept thresholds: 'a,b,c' or 'start:stop:step'")
+    parser.add_argument('--reject', default='30:100:10', help="Reject thresholds: 'a,b,c' or 'start:stop:step'")
+    parser.add_argument('--columnar', default=DEFAULT_EXPORT_DIR, help='Columnar export directory')
+    parser.add_argument('--db', default=DEFAULT_CLAIMS_PATH, help='Claims database (fallback source)')
+    parser.add_argument('--json', action='store_true', help='Print JSON rows instead of a table')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scores = load_component_scores(args.columnar, args.db)
+    loaded = time.perf_counter()
+    accept = np.union1d(_grid(args.accept), [SCORE_THRESHOLD_AUTO_ACCEPT])
+    reject = np.union1d(_grid(args.reject), [SCORE_THRESHOLD_AUTO_REJECT])
+    simulation = simulate_thresholds(scores, accept, reject)
+    done = time.perf_counter()
+    rows = summary_rows(simulation)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"\n{'='*60}")
+    print(f"THRESHOLD WHAT-IF ({simulation['claims']} claims, {len(rows)} threshold pairs)")
+    print(f"{'='*60}")
+    print(f"Load: {loaded - start:.2f}s   Simulate: {(done - loaded) * 1000:.1f} ms")
+    print(f"\n{'accept':>6} {'reject':>6} {'accepted':>9} {'review':>8} {'rejected':>9} "
+          f"{'review %':>8} {'rejected amount':>18}")
+    for row in rows:
+        current = (row['accept'] == SCORE_THRESHOLD_AUTO_ACCEPT and row['reject'] == SCORE_THRESHOLD_AUTO_REJECT)
+        print(f"{row['accept']:>6g} {row['reject']:>6g} {row['accepted_count']:>9} "
+              f"{row['needs_review_count']:>8} {row['rejected_count']:>9} "
+              f"{row['review_rate'] * 100:>7.1f}% {row['rejected_amount']:>18,.0f}"
+              f"{'  <- config.py' if current else ''}")
+
+
+if __name__ == '__main__':
+    main()
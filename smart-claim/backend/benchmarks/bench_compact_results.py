@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Compact Result Format Benchmark
+Bytes per claim and serialization time of verbose vs compact results
+
+Usage:
+    python benchmarks/bench_compact_results.py [num_claims]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+import random
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import process_claims
+from storage.compact_results import compact_results, expand_results
+from utils.generate_patient import run_smart_claim
+
+
+def _encode(records: list) -> bytes:
+    return '\n'.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) for r in records).encode('utf-8')
+
+
+def _decode(data: bytes) -> list:
+    return [json.loads(line) for line in data.decode('utf-8').split('\n')]
+
+
+def _best_of(fn, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(num_claims: int = 5000):
+    random.seed(7)
+    claims = [run_smart_claim(random.choice([1, 2, 3])) for _ in range(num_claims)]
+    results = process_claims(claims, save=False)
+    compact = compact_results(results)
+    assert expand_results(compact) == results
+    
+    verbose_bytes = _encode(results)
+    compact_bytes = _encode(compact)
+    
+    print(f"\n{'='*60}")
+    print(f"COMPACT RESULT BENCHMARK ({num_claims} claims)")
+    print(f"{'='*60}")
+    print(f"  Bytes/claim  verbose: {len(verbose_bytes) / num_claims:8.1f}   "
+          f"compact: {len(compact_bytes) / num_claims:8.1f}")
+    print(f"  Gzip b/claim verbose: {len(gzip.compress(verbose_bytes)) / num_claims:8.1f}   "
+          f"compact: {len(gzip.compress(compact_bytes)) / num_claims:8.1f}")
+    
+    per_claim_us = 1e6 / num_claims
+    print(f"\n  Serialize    verbose: {_best_of(lambda: _encode(results)) * per_claim_us:8.2f} us   "
+          f"compact (incl. compaction): {_best_of(lambda: _encode(compact_results(results))) * per_claim_us:8.2f} us")
+    print(f"  Deserialize  verbose: {_best_of(lambda: _decode(verbose_bytes)) * per_claim_us:8.2f} us   "
+          f"compact (raw): {_best_of(lambda: _decode(compact_bytes)) * per_claim_us:8.2f} us   "
+          f"compact (expanded): {_best_of(lambda: expand_results(_decode(compact_bytes))) * per_claim_us:8.2f} us")
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Group Commit Benchmark
+Measures claims-database write throughput at different commit intervals
+
+Usage:
+    python benchmarks/bench_group_commit.py [num_results] [history_size]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.claims_store import ClaimsWriter, atomic_write_json
+
+SAMPLE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'claims.json')
+
+
+def _sample_results(count: int) -> list:
+    with open(SAMPLE_DB, 'r', encoding='utf-8') as f:
+        sample = json.load(f)
+    results = []
+    for i in range(count):
+        result = dict(sample[i % len(sample)])
+        result['claim_id'] = f"CLM-BENCH-{i:08d}"
+        results.append(result)
+    return results
+
+
+def _legacy_save(db_path: str, results: list):
+    """Original behaviour: load the whole file and rewrite it per claim"""
+    for result in results:
+        with open(db_path, 'r', encoding='utf-8') as f:
+            claims = json.load(f)
+        claims.append(result)
+        with open(db_path, 'w', encoding='utf-8') as f:
+            json.dump(claims, f, indent=2, ensure_ascii=False)
+
+
+def _group_commit(db_path: str, results: list, commit_every: int, interval_ms: float):
+    with ClaimsWriter(db_path, commit_every=commit_every, commit_interval_ms=interval_ms) as writer:
+        for result in results:
+            writer.append(result)
+
+
+def run_benchmark(num_results: int = 2000, history_size: int = 1000):
+    results = _sample_results(num_results)
+    history = _sample_results(history_size)
+    
+    cases = [('legacy rewrite per claim (no fsync)', None, None)]
+    for commit_every in (1, 8, 64, 512):
+        cases.append((f"group commit every {commit_every}", commit_every, 10_000))
+    cases.append(('group commit every 50ms', 1_000_000, 50))
+    
+    print(f"\n{'='*60}")
+    print(f"GROUP COMMIT BENCHMARK ({num_results} results, {history_size} history)")
+    print(f"{'='*60}")
+    
+    for label, commit_every, interval_ms in cases:
+        work_dir = tempfile.mkdtemp(prefix='claims-bench-')
+        db_path = os.path.join(work_dir, 'claims.json')
+        atomic_write_json(db_path, history)
+        
+        # Legacy mode is quadratic; time a slice and extrapolate
+        sample = results if commit_every is not None else results[:min(len(results), 200)]
+        start = time.perf_counter()
+        if commit_every is None:
+            _legacy_save(db_path, sample)
+        else:
+            _group_commit(db_path, sample, commit_every, interval_ms)
+        elapsed = time.perf_counter() - start
+        
+        print(f"  {label:<38} {len(sample) / elapsed:10.1f} claims/s")
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    num_results = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    history_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    run_benchmark(num_results, history_size)
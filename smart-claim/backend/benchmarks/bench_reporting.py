@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Reporting Overhead Benchmark
+Compares verbose per-claim processing against quiet and batch processing
+
+Usage:
+    python benchmarks/bench_reporting.py [num_claims]
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import warnings
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import process_claim, process_claims
+from utils.events import EventEmitter, ConsoleSink, JsonLinesSink
+from utils.generate_patient import run_smart_claim
+
+
+def _timed(label: str, fn, num_claims: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed:8.3f}s  {num_claims / elapsed:10.1f} claims/s")
+    return elapsed
+
+
+def run_benchmark(num_claims: int = 200):
+    """Time the same claims under each reporting mode (results are not saved)"""
+    random.seed(42)
+    claims = [run_smart_claim(random.choice([1, 2, 3])) for _ in range(num_claims)]
+    
+    # Console output goes to a real pipe-like stream so the formatting cost is paid
+    console_stream = io.StringIO()
+    verbose = EventEmitter([ConsoleSink(console_stream)])
+    jsonl = EventEmitter([JsonLinesSink(io.StringIO())])
+    
+    print(f"\n{'='*60}")
+    print(f"REPORTING BENCHMARK ({num_claims} claims)")
+    print(f"{'='*60}")
+    
+    baseline = _timed('per-claim, verbose console',
+                      lambda: [process_claim(c, emitter=verbose, save=False) for c in claims], num_claims)
+    _timed('per-claim, quiet',
+           lambda: [process_claim(c, save=False) for c in claims], num_claims)
+    _timed('batch, json-lines events',
+           lambda: process_claims(claims, emitter=jsonl, save=False), num_claims)
+    batch = _timed('batch, quiet',
+                   lambda: process_claims(claims, save=False), num_claims)
+    
+    print(f"\n  Batch quiet speedup vs verbose: {baseline / batch:.1f}x")
+    print(f"  Console bytes per claim: {len(console_stream.getvalue()) / num_claims:.0f}")
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Scaling Microbenchmarks
+Per-call time of the pipeline hot paths at patient-history sizes from 1k
+to 10M, with a regression check against a saved baseline
+
+Cases:
+    validate_nik             NIK validation (independent of the history)
+    check_duplicate_phone    one lookup against the in-memory history
+    check_duplicate_address  one lookup against the in-memory history
+    check_faskes_fraud       registry + fraud-history checks (configured databases)
+    extract_features         model input row for one claim
+    predict_fraud_score      one claim through the deployed model
+    process_claim            one claim end to end, nothing saved; it reads
+                             PATIENT_DB_PATH on every call, pointed here at a
+                             history file of the benchmarked size
+
+Histories come from utils/fraud_ring_generator.py (households, rings,
+shared phones and addresses) with a fixed seed. Each case is timed with
+timeit: autorange to at least MIN_TIME per round, best of --repeat rounds.
+Per case, the slope of log(time) over log(size) is reported as the
+scaling exponent: about 0 for O(1) paths, about 1 for a linear scan.
+
+The drift monitor and the feature cache are switched off for the run, so
+repeated claims measure real work and no monitoring state is written.
+Sizes whose history would not fit in the available memory (about 0.5 KB
+per patient record) are reported as skipped.
+
+--baseline compares with an earlier --output file: a case regresses when
+it is more than --tolerance slower at the same size, or when its scaling
+exponent grew by more than EXPONENT_TOLERANCE (an O(1) path turning O(n)
+shows up even on a different machine). Regressions exit with status 1.
+
+Usage:
+    python benchmarks/bench_scaling.py --output bench.json
+    python benchmarks/bench_scaling.py --sizes 1000,100000 --cases check_duplicate_phone,process_claim
+    python benchmarks/bench_scaling.py --baseline bench.json --output bench-new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+import warnings
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import ml_model.drift
+import ml_model.feature_cache
+from fraud_detection.check_fraud_faskes import check_faskes_fraud
+from fraud_detection.check_fraud_pasien import check_duplicate_address, check_duplicate_phone, validate_nik
+from ml_model.model_inference import extract_features, predict_fraud_score
+from utils.bulk_generator import generate_claims
+from utils.fraud_ring_generator import build_population, patient_records, write_patient_history
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000, 10000000)
+CASES = ('validate_nik', 'check_duplicate_phone', 'check_duplicate_address', 'check_faskes_fraud',
+         'extract_features', 'predict_fraud_score', 'process_claim')
+# Cases that read the patient history file rather than the in-memory list
+FILE_CASES = ('process_claim',)
+MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.5  # shared single-core machines vary by +-50%
+EXPONENT_TOLERANCE = 0.3
+RECORD_BYTES = 530  # patient record: ~410 B as a dict with three strings, ~530 B at the json.load peak
+SEED = 2024
+
+
+def available_memory() -> Optional[int]:
+    """Bytes of available memory (Linux /proc/meminfo), None when unknown"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def time_call(fn: Callable[[], Any], repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """Best seconds per call over `repeat` rounds of at least MIN_TIME each"""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < MIN_TIME:
+        number = max(int(number * MIN_TIME / max(elapsed, 1e-9)), 1)
+    rounds = timer.repeat(repeat=repeat, number=number)
+    return {'seconds_per_call': min(rounds) / number, 'calls_per_round': number, 'rounds': repeat}
+
+
+def _disable_side_effects():
+    """No drift state writes, no feature-cache hits for the repeated benchmark claim"""
+    ml_model.drift.DRIFT_MONITOR = False
+    ml_model.feature_cache.FEATURE_CACHE_SIZE = 0
+
+
+def run_size(size: int, cases: List[str], claim: Dict[str, Any], reference_data: tuple,
+             workdir: str, repeat: int = DEFAULT_REPEAT) -> List[Dict[str, Any]]:
+    """All requested cases at one history size"""
+    population = build_population(size, SEED)
+    history = patient_records(population)
+    # Probe with a fraud-ring member's phone and address when there is one
+    ring_rows = np.flatnonzero(population['ring'] >= 0)
+    probe = history[int(ring_rows[0]) if len(ring_rows) else 0]
+    _, faskes_db, fraud_history_db = reference_data
+    nik = claim['patient']['identifier'][0]['value']
+
+    calls = {
+        'validate_nik': lambda: validate_nik(nik),
+        'check_duplicate_phone': lambda: check_duplicate_phone(probe['phone'], history),
+        'check_duplicate_address': lambda: check_duplicate_address(probe['address'], history),
+        'check_faskes_fraud': lambda: check_faskes_fraud(claim['faskes'], faskes_db, fraud_history_db),
+        'extract_features': lambda: extract_features(claim['medical_data']),
+        'predict_fraud_score': lambda: predict_fraud_score(claim['medical_data']),
+    }
+    results = []
+    for case in cases:
+        if case in calls:
+            results.append(dict(case=case, size=size, **time_call(calls[case], repeat)))
+
+    file_cases = [case for case in cases if case in FILE_CASES]
+    if file_cases:
+        del history
+        history_path = os.path.join(workdir, f"patient_history_{size}.json")
+        write_patient_history(history_path, population)
+        del population
+        saved_path = main.PATIENT_DB_PATH
+        main.PATIENT_DB_PATH = history_path
+        try:
+            results.append(dict(case='process_claim', size=size,
+                                **time_call(lambda: main.process_claim(claim, save=False), repeat)))
+        finally:
+            main.PATIENT_DB_PATH = saved_path
+            os.remove(history_path)
+    return results
+
+
+def scaling_exponents(results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Slope of log(seconds) over log(size) per case (cases measured at 2+ sizes)"""
+    exponents = {}
+    for case in CASES:
+        points = [(r['size'], r['seconds_per_call']) for r in results if r['case'] == case and 'seconds_per_call' in r]
+        if len(points) >= 2:
+            sizes, seconds = np.log(np.array(points, dtype=np.float64)).T
+            exponents[case] = round(float(np.polyfit(sizes, seconds, 1)[0]), 3)
+    return exponents
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Per-case comparison rows; 'regressed' marks slowdowns beyond tolerance or grown exponents"""
+    before = {(r['case'], r['size']): r['seconds_per_call']
+              for r in baseline.get('results', []) if 'seconds_per_call' in r}
+    rows = []
+    for r in report['results']:
+        key = (r['case'], r['size'])
+        if key not in before or 'seconds_per_call' not in r:
+            continue
+        ratio = r['seconds_per_call'] / before[key]
+        rows.append({'case': r['case'], 'size': r['size'], 'baseline': before[key],
+                     'current': r['seconds_per_call'], 'ratio': round(ratio, 3), 'regressed': ratio > 1 + tolerance})
+    for case, exponent in report['scaling_exponents'].items():
+        previous = baseline.get('scaling_exponents', {}).get(case)
+        if previous is not None:
+            rows.append({'case': case, 'size': 'exponent', 'baseline': previous, 'current': exponent,
+                         'ratio': None, 'regressed': exponent > previous + EXPONENT_TOLERANCE})
+    return rows
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, cases=CASES, repeat: int = DEFAULT_REPEAT,
+                   log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Run the suite
+
+    Args:
+        sizes: Patient-history sizes
+        cases: Case names (subset of CASES)
+        repeat: Timing rounds per case
+        log: Progress output
+
+    Returns:
+        Report dict: 'environment', 'results' (one row per case and size,
+        or a 'skipped' reason per size) and 'scaling_exponents'
+    """
+    _disable_side_effects()
+    claim = generate_claims(1, '1', seed=SEED)[0]
+    reference_data = main.load_reference_data()
+    workdir = tempfile.mkdtemp(prefix='bench_scaling_')
+    results = []
+    try:
+        for size in sizes:
+            # The in-memory history is freed before process_claim loads its file copy
+            needed = size * RECORD_BYTES
+            available = available_memory()
+            if available is not None and needed > available * 0.8:
+                reason = f"needs ~{needed / 1e9:.1f} GB, {available / 1e9:.1f} GB available"
+                results += [{'case': case, 'size': size, 'skipped': reason} for case in cases]
+                log(f"  {size:>10,}  skipped ({reason})")
+                continue
+            rows = run_size(size, list(cases), claim, reference_data, workdir, repeat)
+            results += rows
+            log(f"  {size:>10,}  " + '  '.join(f"{r['case']} {_format_seconds(r['seconds_per_call'])}" for r in rows))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'environment': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'sizes': list(sizes),
+        'results': results,
+        'scaling_exponents': scaling_exponents(results),
+    }
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def print_report(report: Dict[str, Any], comparison: Optional[List[Dict[str, Any]]] = None):
+    sizes = report['sizes']
+    table = {(r['case'], r['size']): r for r in report['results']}
+    print(f"\n{'='*60}")
+    print("SCALING BENCHMARK (time per call)")
+    print(f"{'='*60}")
+    print(f"  {'case':<24}" + ''.join(f"{size:>11,}" for size in sizes) + f"{'exp':>7}")
+    for case in CASES:
+        if not any(r['case'] == case for r in report['results']):
+            continue
+        cells = []
+        for size in sizes:
+            row = table.get((case, size), {})
+            cells.append(_format_seconds(row['seconds_per_call']) if 'seconds_per_call' in row else 'skip')
+        exponent = report['scaling_exponents'].get(case)
+        print(f"  {case:<24}" + ''.join(f"{cell:>11}" for cell in cells) +
+              (f"{exponent:>7.2f}" if exponent is not None else f"{'-':>7}"))
+
+    if comparison is not None:
+        regressions = [row for row in comparison if row['regressed']]
+        print(f"\nBaseline comparison: {len(comparison)} checks, {len(regressions)} regressions")
+        for row in regressions:
+            if row['size'] == 'exponent':
+                print(f"  ✗ {row['case']:<24} scaling exponent {row['baseline']:.2f} -> {row['current']:.2f}")
+            else:
+                print(f"  ✗ {row['case']:<24} at {row['size']:>10,}: {_format_seconds(row['baseline'])} -> "
+                      f"{_format_seconds(row['current'])} ({row['ratio']:.2f}x)")
+        if not regressions:
+            print("  ✓ No regressions")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Scaling microbenchmarks of the fraud detection hot paths')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='Patient-history sizes')
+    parser.add_argument('--cases', default=','.join(CASES), help='Comma-separated subset of the cases')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timing rounds per case')
+    parser.add_argument('--output', help='Write the JSON report here (usable as a later --baseline)')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare with')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown at the same size (0.5 = 50%%)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',')]
+    except ValueError:
+        parser.error('--sizes needs comma-separated integers')
+    cases = [case for case in args.cases.split(',') if case]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown or not cases:
+        parser.error(f"Unknown cases: {', '.join(unknown)} (choose from {', '.join(CASES)})")
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # Database paths in config.py are relative to the repository root
+    os.chdir(REPO_ROOT)
+    log = (lambda message: print(message, file=sys.stderr)) if args.json else print
+    if not args.json:
+        print(f"Running {len(cases)} cases at sizes {', '.join(f'{size:,}' for size in sizes)}...")
+    report = run_benchmarks(sizes, cases, args.repeat, log)
+    comparison = compare_with_baseline(report, baseline, args.tolerance) if baseline is not None else None
+    if comparison is not None:
+        report['comparison'] = comparison
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, comparison)
+        if output:
+            print(f"\n✓ Saved to: {output}")
+    sys.exit(1 if comparison and any(row['regressed'] for row in comparison) else 0)
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main_cli()
@@ -46,10 +46,37 @@ FASKES_DB_PATH = 'smart-claim/backend/data/faskes_registry.json'
 FRAUD_HISTORY_DB_PATH = 'smart-claim/backend/data/fraud_history.json'
 CLAIMS_DB_PATH = 'smart-claim/backend/data/claims.json'
 
+# Claims archive partitioning
+CLAIMS_PARTITION_GRANULARITY = 'month'  # 'day' atau 'month'
+CLAIMS_RETENTION_DAYS = 730  # Partisi lebih tua dipindah ke archive/
+
+# Review queue
+REVIEW_LEASE_SECONDS = 900  # Klaim kembali ke antrian jika reviewer tidak selesai dalam 15 menit
+REVIEW_RETENTION_DAYS = 90  # Klaim lebih tua tidak masuk antrian; riwayat review lebih tua dipangkas saat kompaksi
+
 # Model paths
 MODEL_PATH = 'smart-claim/backend/models/fraud_detection_model.pkl'
 SCALER_PATH = 'smart-claim/backend/models/scaler.pkl'
 
+# Penjelasan skor AI: jumlah fitur penyumbang terbesar di red flag AI (0 = nonaktif)
+AI_EXPLANATION_TOP_FEATURES = 3
+
+# Cache vektor fitur (mentah + terskala) per data medis, LRU (0 = nonaktif); ±0.7 KB per entri
+FEATURE_CACHE_SIZE = 50000
+
+# Monitor drift fitur input model terhadap distribusi data training
+# (aktif: setiap run yang menilai klaim, termasuk main.py, menulis DRIFT_STATE_PATH)
+DRIFT_MONITOR = True
+DRIFT_STATE_PATH = 'smart-claim/backend/data/feature_drift.json'
+DRIFT_BINS = 10
+DRIFT_FLUSH_EVERY = 500  # Klaim per penulisan histogram ke DRIFT_STATE_PATH
+
+# Shadow models: kandidat yang ikut menilai klaim tanpa mempengaruhi keputusan
+# Contoh: {'rf_v2': {'model': 'smart-claim/backend/models/candidate.pkl'}}
+SHADOW_MODELS = {}
+SHADOW_LOG_PATH = 'smart-claim/backend/data/shadow_scores.jsonl'
+SHADOW_ASYNC = True  # Skor shadow dihitung di proses worker terpisah
+
 # Duplicate detection thresholds
 DUPLICATE_PHONE_THRESHOLD = 3  # Jika nomor HP dipakai > 3 pasien berbeda
 DUPLICATE_ADDRESS_THRESHOLD = 5  # Jika alamat dipakai > 5 pasien berbeda
@@ -11,6 +11,7 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import FASKES_FRAUD_HISTORY_SCORE
+from fraud_detection.flag_templates import render_flag
 
 
 def validate_faskes_registration(faskes_id: str, faskes_db: List[Dict]) -> Dict[str, Any]:
@@ -33,21 +34,9 @@ def validate_faskes_registration(faskes_id: str, faskes_db: List[Dict]) -> Dict[
             break
     
     if not is_registered:
-        return {
-            'is_registered': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Faskes Tidak Terdaftar',
-            'message': f'Faskes dengan ID {faskes_id} tidak terdaftar dalam sistem'
-        }
+        return render_flag('FASKES_UNREGISTERED', faskes_id=faskes_id)
     
-    return {
-        'is_registered': True,
-        'score': 0,
-        'type': 'crucial',
-        'flag_name': 'Faskes Terdaftar',
-        'message': 'Faskes terdaftar dalam sistem'
-    }
+    return render_flag('FASKES_REGISTERED')
 
 
 def check_faskes_fraud_history(faskes_id: str, fraud_history_db: List[Dict]) -> Dict[str, Any]:
@@ -70,33 +59,13 @@ def check_faskes_fraud_history(faskes_id: str, fraud_history_db: List[Dict]) ->
             break
     
     if not history:
-        return {
-            'has_history': False,
-            'severity': 'no_history',
-            'score': 0,
-            'type': 'flex',
-            'flag_name': 'Tidak Ada Riwayat Fraud',
-            'message': 'Faskes tidak memiliki riwayat fraud'
-        }
+        return render_flag('FASKES_NO_HISTORY')
     
     severity = history.get('severity', 'minor_violation')
     score = FASKES_FRAUD_HISTORY_SCORE.get(severity, 20)
     
-    severity_labels = {
-        'minor_violation': 'Pelanggaran Ringan',
-        'moderate_violation': 'Pelanggaran Sedang',
-        'severe_violation': 'Pelanggaran Berat',
-        'blacklisted': 'Blacklist'
-    }
-    
-    return {
-        'has_history': True,
-        'severity': severity,
-        'score': score,
-        'type': 'flex',
-        'flag_name': f'Riwayat Fraud: {severity_labels.get(severity, severity)}',
-        'message': f'Faskes memiliki riwayat {severity_labels.get(severity, severity).lower()}: {history.get("description", "")}'
-    }
+    return render_flag('FASKES_HISTORY', severity=severity, score=score,
+                       description=history.get('description', ''))
 
 
 def check_faskes_fraud(faskes_data: Dict, faskes_db: List[Dict] = None, fraud_history_db: List[Dict] = None) -> Dict[str, Any]:
@@ -125,13 +94,7 @@ def check_faskes_fraud(faskes_data: Dict, faskes_db: List[Dict] = None, fraud_hi
     
     if not faskes_id:
         auto_reject = True
-        red_flags.append({
-            'is_registered': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Faskes ID Tidak Ada',
-            'message': 'ID Faskes tidak ditemukan dalam data'
-        })
+        red_flags.append(render_flag('FASKES_ID_MISSING'))
         return {
             'module': 'faskes_fraud',
             'total_score': total_score,
@@ -12,6 +12,7 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import NIK_LENGTH, JKN_CARD_LENGTH, DUPLICATE_PHONE_THRESHOLD, DUPLICATE_ADDRESS_THRESHOLD, RED_FLAG_SCORES
+from fraud_detection.flag_templates import render_flag
 
 
 def validate_nik(nik: str) -> Dict[str, Any]:
@@ -27,50 +28,20 @@ def validate_nik(nik: str) -> Dict[str, Any]:
     """
     # Check if NIK is string of digits and correct length
     if not isinstance(nik, str):
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'NIK Invalid',
-            'message': 'NIK harus berupa string'
-        }
+        return render_flag('NIK_INVALID_TYPE')
     
     if len(nik) != NIK_LENGTH:
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'NIK Invalid',
-            'message': f'NIK harus {NIK_LENGTH} digit, ditemukan {len(nik)} digit'
-        }
+        return render_flag('NIK_INVALID_LENGTH', expected=NIK_LENGTH, found=len(nik))
     
     if not nik.isdigit():
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'NIK Invalid',
-            'message': 'NIK harus berisi angka saja'
-        }
+        return render_flag('NIK_INVALID_DIGITS')
     
     # Basic validation: check province code (first 2 digits)
     province_code = nik[:2]
     if not (11 <= int(province_code) <= 94):
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'NIK Invalid',
-            'message': f'Kode provinsi tidak valid: {province_code}'
-        }
+        return render_flag('NIK_INVALID_PROVINCE', province=province_code)
     
-    return {
-        'is_valid': True,
-        'score': 0,
-        'type': 'crucial',
-        'flag_name': 'NIK Valid',
-        'message': 'NIK valid'
-    }
+    return render_flag('NIK_VALID')
 
 
 def validate_jkn_card(card_number: str) -> Dict[str, Any]:
@@ -85,39 +56,15 @@ def validate_jkn_card(card_number: str) -> Dict[str, Any]:
         dict with 'is_valid', 'score', 'type', 'message'
     """
     if not isinstance(card_number, str):
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Nomor Kartu JKN Invalid',
-            'message': 'Nomor kartu JKN harus berupa string'
-        }
+        return render_flag('JKN_INVALID_TYPE')
     
     if len(card_number) != JKN_CARD_LENGTH:
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Nomor Kartu JKN Invalid',
-            'message': f'Nomor kartu JKN harus {JKN_CARD_LENGTH} digit, ditemukan {len(card_number)} digit'
-        }
+        return render_flag('JKN_INVALID_LENGTH', expected=JKN_CARD_LENGTH, found=len(card_number))
     
     if not card_number.isdigit():
-        return {
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Nomor Kartu JKN Invalid',
-            'message': 'Nomor kartu JKN harus berisi angka saja'
-        }
+        return render_flag('JKN_INVALID_DIGITS')
     
-    return {
-        'is_valid': True,
-        'score': 0,
-        'type': 'crucial',
-        'flag_name': 'Nomor Kartu JKN Valid',
-        'message': 'Nomor kartu JKN valid'
-    }
+    return render_flag('JKN_VALID')
 
 
 def check_duplicate_phone(phone: str, patient_db: List[Dict]) -> Dict[str, Any]:
@@ -138,23 +85,9 @@ def check_duplicate_phone(phone: str, patient_db: List[Dict]) -> Dict[str, Any]:
     if count >= DUPLICATE_PHONE_THRESHOLD:
         # Calculate score based on how many duplicates (5-30 range)
         score = min(5 + (count - DUPLICATE_PHONE_THRESHOLD) * 5, 30)
-        return {
-            'is_duplicate': True,
-            'count': count,
-            'score': score,
-            'type': 'medium',
-            'flag_name': 'Nomor HP Duplikat',
-            'message': f'Nomor HP digunakan oleh {count} pasien berbeda'
-        }
+        return render_flag('PHONE_DUP', count=count, score=score)
     
-    return {
-        'is_duplicate': False,
-        'count': count,
-        'score': 0,
-        'type': 'medium',
-        'flag_name': 'Nomor HP Unik',
-        'message': 'Nomor HP tidak duplikat'
-    }
+    return render_flag('PHONE_UNIQUE', count=count)
 
 
 def check_duplicate_address(address: str, patient_db: List[Dict]) -> Dict[str, Any]:
@@ -183,23 +116,9 @@ def check_duplicate_address(address: str, patient_db: List[Dict]) -> Dict[str, A
     if count >= DUPLICATE_ADDRESS_THRESHOLD:
         # Calculate score based on how many duplicates (1-10 range)
         score = min(1 + (count - DUPLICATE_ADDRESS_THRESHOLD), 10)
-        return {
-            'is_duplicate': True,
-            'count': count,
-            'score': score,
-            'type': 'low',
-            'flag_name': 'Alamat Duplikat',
-            'message': f'Alamat digunakan oleh {count} pasien berbeda'
-        }
+        return render_flag('ADDRESS_DUP', count=count, score=score)
     
-    return {
-        'is_duplicate': False,
-        'count': count,
-        'score': 0,
-        'type': 'low',
-        'flag_name': 'Alamat Unik',
-        'message': 'Alamat tidak duplikat'
-    }
+    return render_flag('ADDRESS_UNIQUE', count=count)
 
 
 def check_patient_fraud(patient_data: Dict, patient_db: List[Dict] = None) -> Dict[str, Any]:
@@ -255,13 +174,7 @@ def check_patient_fraud(patient_data: Dict, patient_db: List[Dict] = None) -> Di
             red_flags.append(nik_result)
     else:
         auto_reject = True
-        red_flags.append({
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'NIK Tidak Ada',
-            'message': 'NIK tidak ditemukan dalam data pasien'
-        })
+        red_flags.append(render_flag('NIK_MISSING'))
     
     # Check 2: Validate JKN Card (crucial)
     if jkn_card:
@@ -273,13 +186,7 @@ def check_patient_fraud(patient_data: Dict, patient_db: List[Dict] = None) -> Di
             red_flags.append(jkn_result)
     else:
         auto_reject = True
-        red_flags.append({
-            'is_valid': False,
-            'score': 100,
-            'type': 'crucial',
-            'flag_name': 'Nomor Kartu JKN Tidak Ada',
-            'message': 'Nomor kartu JKN tidak ditemukan dalam data pasien'
-        })
+        red_flags.append(render_flag('JKN_MISSING'))
     
     # Check 3: Duplicate phone (medium)
     if phone and patient_db:
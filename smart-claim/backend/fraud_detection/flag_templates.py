@@ -0,0 +1,325 @@
+"""
+Red Flag Templates
+Interned table of every red flag the pipeline can raise. Each flag is a code
+plus a few parameters; the verbose dict format (flag_name, message, ...) is
+rendered from the template, so check modules and the compact storage format
+share one source of truth.
+"""
+
+import re
+import string
+from typing import Dict, Any, Optional, Tuple
+
+# Labels for faskes fraud history severities
+SEVERITY_LABELS = {
+    'minor_violation': 'Pelanggaran Ringan',
+    'moderate_violation': 'Pelanggaran Sedang',
+    'severe_violation': 'Pelanggaran Berat',
+    'blacklisted': 'Blacklist'
+}
+
+# layout: key order of the rendered dict
+# fields: literal values; every other layout key (besides flag_name and
+#         message) is taken from the parameters
+# optional: keys appended after the layout only when given as parameters
+FLAG_TEMPLATES = {
+    # Patient: NIK
+    'NIK_INVALID_TYPE': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'NIK Invalid',
+        'message': 'NIK harus berupa string'
+    },
+    'NIK_INVALID_LENGTH': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'NIK Invalid',
+        'message': 'NIK harus {expected} digit, ditemukan {found} digit'
+    },
+    'NIK_INVALID_DIGITS': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'NIK Invalid',
+        'message': 'NIK harus berisi angka saja'
+    },
+    'NIK_INVALID_PROVINCE': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'NIK Invalid',
+        'message': 'Kode provinsi tidak valid: {province}'
+    },
+    'NIK_VALID': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': True, 'score': 0, 'type': 'crucial'},
+        'flag_name': 'NIK Valid',
+        'message': 'NIK valid'
+    },
+    'NIK_MISSING': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'NIK Tidak Ada',
+        'message': 'NIK tidak ditemukan dalam data pasien'
+    },
+
+    # Patient: JKN card
+    'JKN_INVALID_TYPE': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Nomor Kartu JKN Invalid',
+        'message': 'Nomor kartu JKN harus berupa string'
+    },
+    'JKN_INVALID_LENGTH': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Nomor Kartu JKN Invalid',
+        'message': 'Nomor kartu JKN harus {expected} digit, ditemukan {found} digit'
+    },
+    'JKN_INVALID_DIGITS': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Nomor Kartu JKN Invalid',
+        'message': 'Nomor kartu JKN harus berisi angka saja'
+    },
+    'JKN_VALID': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': True, 'score': 0, 'type': 'crucial'},
+        'flag_name': 'Nomor Kartu JKN Valid',
+        'message': 'Nomor kartu JKN valid'
+    },
+    'JKN_MISSING': {
+        'layout': ['is_valid', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_valid': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Nomor Kartu JKN Tidak Ada',
+        'message': 'Nomor kartu JKN tidak ditemukan dalam data pasien'
+    },
+
+    # Patient: duplicates
+    'PHONE_DUP': {
+        'layout': ['is_duplicate', 'count', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_duplicate': True, 'type': 'medium'},
+        'flag_name': 'Nomor HP Duplikat',
+        'message': 'Nomor HP digunakan oleh {count} pasien berbeda'
+    },
+    'PHONE_UNIQUE': {
+        'layout': ['is_duplicate', 'count', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_duplicate': False, 'score': 0, 'type': 'medium'},
+        'flag_name': 'Nomor HP Unik',
+        'message': 'Nomor HP tidak duplikat'
+    },
+    'ADDRESS_DUP': {
+        'layout': ['is_duplicate', 'count', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_duplicate': True, 'type': 'low'},
+        'flag_name': 'Alamat Duplikat',
+        'message': 'Alamat digunakan oleh {count} pasien berbeda'
+    },
+    'ADDRESS_UNIQUE': {
+        'layout': ['is_duplicate', 'count', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_duplicate': False, 'score': 0, 'type': 'low'},
+        'flag_name': 'Alamat Unik',
+        'message': 'Alamat tidak duplikat'
+    },
+
+    # Faskes
+    'FASKES_UNREGISTERED': {
+        'layout': ['is_registered', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_registered': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Faskes Tidak Terdaftar',
+        'message': 'Faskes dengan ID {faskes_id} tidak terdaftar dalam sistem'
+    },
+    'FASKES_REGISTERED': {
+        'layout': ['is_registered', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_registered': True, 'score': 0, 'type': 'crucial'},
+        'flag_name': 'Faskes Terdaftar',
+        'message': 'Faskes terdaftar dalam sistem'
+    },
+    'FASKES_ID_MISSING': {
+        'layout': ['is_registered', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'is_registered': False, 'score': 100, 'type': 'crucial'},
+        'flag_name': 'Faskes ID Tidak Ada',
+        'message': 'ID Faskes tidak ditemukan dalam data'
+    },
+    'FASKES_NO_HISTORY': {
+        'layout': ['has_history', 'severity', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'has_history': False, 'severity': 'no_history', 'score': 0, 'type': 'flex'},
+        'flag_name': 'Tidak Ada Riwayat Fraud',
+        'message': 'Faskes tidak memiliki riwayat fraud'
+    },
+    'FASKES_HISTORY': {
+        'layout': ['has_history', 'severity', 'score', 'type', 'flag_name', 'message'],
+        'fields': {'has_history': True, 'type': 'flex'},
+        'flag_name': 'Riwayat Fraud: {severity_label}',
+        'message': 'Faskes memiliki riwayat {severity_label_lower}: {description}'
+    },
+
+    # AI model
+    'AI_LOW': {
+        'layout': ['score', 'probability', 'type', 'flag_name', 'message'],
+        'optional': ['top_features'],
+        'fields': {'type': 'flex'},
+        'flag_name': 'AI Fraud Detection',
+        'message': 'Risiko fraud rendah berdasarkan analisis AI'
+    },
+    'AI_MEDIUM': {
+        'layout': ['score', 'probability', 'type', 'flag_name', 'message'],
+        'optional': ['top_features'],
+        'fields': {'type': 'flex'},
+        'flag_name': 'AI Fraud Detection',
+        'message': 'Risiko fraud sedang berdasarkan analisis AI'
+    },
+    'AI_HIGH': {
+        'layout': ['score', 'probability', 'type', 'flag_name', 'message'],
+        'optional': ['top_features'],
+        'fields': {'type': 'flex'},
+        'flag_name': 'AI Fraud Detection',
+        'message': 'Risiko fraud tinggi berdasarkan analisis AI'
+    },
+    'AI_HEURISTIC': {
+        'layout': ['score', 'probability', 'type', 'flag_name', 'message'],
+        'fields': {'type': 'flex'},
+        'flag_name': 'AI Fraud Detection (Heuristic)',
+        'message': 'Skor fraud berdasarkan heuristik (model belum dilatih): {score}/100'
+    },
+}
+
+# Template for the decision_reason string of a result
+REASON_TEMPLATES = {
+    'CRUCIAL': 'Auto reject due to crucial red flag violations',
+    'ACCEPT': 'Auto accept (score: {score} < {threshold})',
+    'REJECT': 'Auto reject (score: {score} > {threshold})',
+    'REVIEW': 'Manual review required (score: {score} in range {low}-{high})',
+}
+
+# Parameters that are parsed back as integers when recovered from a message
+INT_PARAMS = {'expected', 'found', 'count', 'score', 'threshold', 'low', 'high'}
+
+_FORMATTER = string.Formatter()
+
+
+def _context(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameters plus values derived from them for message formatting"""
+    context = dict(params)
+    if 'severity' in params:
+        label = SEVERITY_LABELS.get(params['severity'], params['severity'])
+        context['severity_label'] = label
+        context['severity_label_lower'] = label.lower()
+    return context
+
+
+def render_flag(code: str, **params) -> Dict[str, Any]:
+    """
+    Render a red flag in the verbose dict format
+
+    Args:
+        code: Template code (key of FLAG_TEMPLATES)
+        **params: Template parameters
+
+    Returns:
+        dict identical to the format stored in claims.json
+    """
+    template = FLAG_TEMPLATES[code]
+    context = _context(params)
+    flag = {}
+    for key in template['layout']:
+        if key == 'flag_name':
+            flag[key] = template['flag_name'].format(**context)
+        elif key == 'message':
+            flag[key] = template['message'].format(**context)
+        elif key in template['fields']:
+            flag[key] = template['fields'][key]
+        else:
+            flag[key] = params[key]
+    for key in template.get('optional', ()):
+        if key in params:
+            flag[key] = params[key]
+    return flag
+
+
+def render_reason(code: str, **params) -> str:
+    """Render a decision_reason string"""
+    return REASON_TEMPLATES[code].format(**params)
+
+
+def _pattern(template: str) -> Tuple[re.Pattern, Tuple[str, ...]]:
+    """Regex with one named group per placeholder of a format string"""
+    parts = []
+    names = []
+    for literal, name, _, _ in _FORMATTER.parse(template):
+        parts.append(re.escape(literal))
+        if name is not None:
+            parts.append(f'(?P<{name}>.*?)')
+            names.append(name)
+    return re.compile('^' + ''.join(parts) + '$', re.DOTALL), tuple(names)
+
+
+def _params_from_text(pattern: Tuple[re.Pattern, Tuple[str, ...]], text: Any,
+                      params: Dict[str, Any]) -> bool:
+    regex, names = pattern
+    if not names:
+        return True
+    match = regex.match(text) if isinstance(text, str) else None
+    if match is None:
+        return False
+    for name in names:
+        if name.startswith('severity_label'):
+            continue
+        value = match.group(name)
+        params[name] = int(value) if name in INT_PARAMS and value.lstrip('-').isdigit() else value
+    return True
+
+
+# Lookup structures built once at import
+_FLAG_PATTERNS = {
+    code: (_pattern(t['flag_name']), _pattern(t['message']))
+    for code, t in FLAG_TEMPLATES.items()
+}
+_CANDIDATES_BY_KEYS = {}
+for _code, _template in FLAG_TEMPLATES.items():
+    _CANDIDATES_BY_KEYS.setdefault(tuple(_template['layout']), []).append(_code)
+    if _template.get('optional'):
+        _CANDIDATES_BY_KEYS.setdefault(tuple(_template['layout'] + _template['optional']), []).append(_code)
+_REASON_PATTERNS = {code: _pattern(text) for code, text in REASON_TEMPLATES.items()}
+
+
+def match_flag(flag: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Recover (code, params) from a verbose red flag dict
+    The match is verified by re-rendering, so a non-None result always
+    renders back to an identical dict (same keys, order and values)
+
+    Returns:
+        (code, params) or None when no template reproduces the flag
+    """
+    if not isinstance(flag, dict):
+        return None
+
+    for code in _CANDIDATES_BY_KEYS.get(tuple(flag), ()):
+        template = FLAG_TEMPLATES[code]
+        params = {
+            key: flag[key] for key in flag
+            if key not in template['fields'] and key not in ('flag_name', 'message')
+        }
+        name_pattern, message_pattern = _FLAG_PATTERNS[code]
+        if not _params_from_text(name_pattern, flag.get('flag_name'), params):
+            continue
+        if not _params_from_text(message_pattern, flag.get('message'), params):
+            continue
+        try:
+            rendered = render_flag(code, **params)
+        except (KeyError, IndexError, ValueError):
+            continue
+        if rendered == flag and all(type(rendered[k]) is type(flag[k]) for k in flag):
+            return code, params
+    return None
+
+
+def match_reason(reason: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Recover (code, params) from a decision_reason string"""
+    if not isinstance(reason, str):
+        return None
+    for code, pattern in _REASON_PATTERNS.items():
+        params = {}
+        if not pattern[0].match(reason) or not _params_from_text(pattern, reason, params):
+            continue
+        if render_reason(code, **params) == reason:
+            return code, params
+    return None
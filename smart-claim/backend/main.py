@@ -3,19 +3,40 @@ Main Orchestrator for Smart Claim BPJS Fraud Detection System
 Integrates patient fraud, faskes fraud, and AI model inference
 """
 
+import argparse
+import copy
+import io
 import json
 import os
 import sys
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterable, Iterator, Tuple, IO
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from fraud_detection.check_fraud_pasien import check_patient_fraud
 from fraud_detection.check_fraud_faskes import check_faskes_fraud
-from ml_model.model_inference import predict_fraud_score
-from config import SCORE_THRESHOLD_AUTO_ACCEPT, SCORE_THRESHOLD_AUTO_REJECT
+from fraud_detection.flag_templates import render_reason
+from ml_model.model_inference import (
+    predict_fraud_score, predict_fraud_score_batch, feature_dict, load_deployed, model_version
+)
+from ml_model.feature_cache import get_feature_cache
+from utils.events import EventEmitter, BufferSink, ConsoleSink, JsonLinesSink, NULL_EMITTER
+from storage.result_cache import ResultCache
+from storage.claims_store import AUTO_CHECKPOINT_LOG_BYTES, ClaimsWriter, DEFAULT_CLAIMS_PATH, LOCK_SUFFIX, atomic_write_json
+from storage.aggregates import AggregatesUpdater
+from storage.query import ClaimsIndexUpdater
+from storage.review_queue import ReviewQueue
+from storage.feedback_store import FeedbackStore
+from storage.locking import file_lock
+from config import (
+    SCORE_THRESHOLD_AUTO_ACCEPT, SCORE_THRESHOLD_AUTO_REJECT,
+    PATIENT_DB_PATH, FASKES_DB_PATH, FRAUD_HISTORY_DB_PATH
+)
+
+# Claims scored per model call in --stream mode
+STREAM_BATCH_SIZE = 512
 
 
 def load_database(db_path: str) -> List[Dict]:
@@ -28,58 +49,26 @@ def load_database(db_path: str) -> List[Dict]:
 
 
 def save_database(db_path: str, data: List[Dict]):
-    """Save JSON database"""
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Save JSON database (atomic: temp file + rename, under the store lock)"""
+    with file_lock(db_path + LOCK_SUFFIX):
+        atomic_write_json(db_path, data)
+
+
+def load_reference_data() -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """Load patient history, faskes registry and fraud history databases"""
+    patient_db = load_database(PATIENT_DB_PATH)
+    faskes_db = load_database(FASKES_DB_PATH)
+    fraud_history_db = load_database(FRAUD_HISTORY_DB_PATH)
+    return patient_db, faskes_db, fraud_history_db
 
 
-def process_claim(claim_data: Dict[str, Any]) -> Dict[str, Any]:
+def decide(patient_fraud_result: Dict, faskes_fraud_result: Dict, ai_fraud_result: Dict) -> Dict[str, Any]:
     """
-    Process a claim through the fraud detection pipeline
+    Combine module results into the final decision
     
-    Args:
-        claim_data: Complete claim data with patient, faskes, and medical_data
-        
     Returns:
-        dict with fraud detection results and decision
+        dict with 'total_score', 'auto_reject', 'decision', 'decision_reason'
     """
-    # Extract components
-    patient_data = claim_data.get('patient', {})
-    faskes_data = claim_data.get('faskes', {})
-    ml_data = claim_data.get('medical_data', {})
-    claim_id = claim_data.get('claim_id', 'UNKNOWN')
-    
-    # Load databases
-    patient_db = load_database('smart-claim/backend/data/patient_history.json')
-    faskes_db = load_database('smart-claim/backend/data/faskes_registry.json')
-    fraud_history_db = load_database('smart-claim/backend/data/fraud_history.json')
-    
-    print(f"\n{'='*60}")
-    print(f"Processing Claim: {claim_id}")
-    print(f"{'='*60}")
-    
-    # Step 1: Check Patient Fraud
-    print("\n[1/3] Checking Patient Fraud...")
-    patient_fraud_result = check_patient_fraud(patient_data, patient_db)
-    print(f"  - Patient Fraud Score: {patient_fraud_result['total_score']}")
-    print(f"  - Auto Reject: {patient_fraud_result['auto_reject']}")
-    print(f"  - Red Flags: {len(patient_fraud_result['red_flags'])}")
-    
-    # Step 2: Check Faskes Fraud
-    print("\n[2/3] Checking Faskes Fraud...")
-    faskes_fraud_result = check_faskes_fraud(faskes_data, faskes_db, fraud_history_db)
-    print(f"  - Faskes Fraud Score: {faskes_fraud_result['total_score']}")
-    print(f"  - Auto Reject: {faskes_fraud_result['auto_reject']}")
-    print(f"  - Red Flags: {len(faskes_fraud_result['red_flags'])}")
-    
-    # Step 3: AI Model Inference
-    print("\n[3/3] Running AI Fraud Detection...")
-    ai_fraud_result = predict_fraud_score(ml_data)
-    print(f"  - AI Fraud Score: {ai_fraud_result['score']}")
-    print(f"  - Confidence: {ai_fraud_result['probability']:.2%}")
-    
-    # Calculate total score
     total_score = 0
     auto_reject = False
     
@@ -87,7 +76,7 @@ def process_claim(claim_data: Dict[str, Any]) -> Dict[str, Any]:
     if patient_fraud_result['auto_reject'] or faskes_fraud_result['auto_reject']:
         auto_reject = True
         decision = 'REJECTED'
-        decision_reason = 'Auto reject due to crucial red flag violations'
+        decision_reason = render_reason('CRUCIAL')
     else:
         # Sum up all scores
         total_score = (
@@ -99,13 +88,71 @@ def process_claim(claim_data: Dict[str, Any]) -> Dict[str, Any]:
         # Determine decision based on total score
         if total_score < SCORE_THRESHOLD_AUTO_ACCEPT:
             decision = 'ACCEPTED'
-            decision_reason = f'Auto accept (score: {total_score} < {SCORE_THRESHOLD_AUTO_ACCEPT})'
+            decision_reason = render_reason('ACCEPT', score=total_score, threshold=SCORE_THRESHOLD_AUTO_ACCEPT)
         elif total_score > SCORE_THRESHOLD_AUTO_REJECT:
             decision = 'REJECTED'
-            decision_reason = f'Auto reject (score: {total_score} > {SCORE_THRESHOLD_AUTO_REJECT})'
+            decision_reason = render_reason('REJECT', score=total_score, threshold=SCORE_THRESHOLD_AUTO_REJECT)
         else:
             decision = 'NEEDS_REVIEW'
-            decision_reason = f'Manual review required (score: {total_score} in range {SCORE_THRESHOLD_AUTO_ACCEPT}-{SCORE_THRESHOLD_AUTO_REJECT})'
+            decision_reason = render_reason('REVIEW', score=total_score,
+                                            low=SCORE_THRESHOLD_AUTO_ACCEPT, high=SCORE_THRESHOLD_AUTO_REJECT)
+    
+    return {
+        'total_score': total_score,
+        'auto_reject': auto_reject,
+        'decision': decision,
+        'decision_reason': decision_reason
+    }
+
+
+def _check_claim(claim_data: Dict[str, Any], patient_db: List[Dict], faskes_db: List[Dict],
+                 fraud_history_db: List[Dict]) -> Tuple[Dict, Dict]:
+    """Run the rule-based patient and faskes checks for one claim"""
+    # Step 1: Check Patient Fraud
+    patient_fraud_result = check_patient_fraud(claim_data.get('patient', {}), patient_db)
+    
+    # Step 2: Check Faskes Fraud
+    faskes_fraud_result = check_faskes_fraud(claim_data.get('faskes', {}), faskes_db, fraud_history_db)
+    
+    return patient_fraud_result, faskes_fraud_result
+
+
+def _report_checks(claim_data: Dict[str, Any], patient_fraud_result: Dict, faskes_fraud_result: Dict,
+                   emitter: EventEmitter):
+    """Emit the start and rule-check events of one claim"""
+    if not emitter.enabled:
+        return
+    claim_id = claim_data.get('claim_id', 'UNKNOWN')
+    emitter.emit('claim_started', claim_id=claim_id)
+    emitter.emit('patient_checked', claim_id=claim_id,
+                 score=patient_fraud_result['total_score'],
+                 auto_reject=patient_fraud_result['auto_reject'],
+                 red_flags=len(patient_fraud_result['red_flags']))
+    emitter.emit('faskes_checked', claim_id=claim_id,
+                 score=faskes_fraud_result['total_score'],
+                 auto_reject=faskes_fraud_result['auto_reject'],
+                 red_flags=len(faskes_fraud_result['red_flags']))
+
+
+def build_result(claim_data: Dict[str, Any], patient_fraud_result: Dict, faskes_fraud_result: Dict,
+                 ai_fraud_result: Dict, emitter: EventEmitter = NULL_EMITTER) -> Dict[str, Any]:
+    """
+    Assemble the stored claim result from the three module results
+    
+    Returns:
+        dict with fraud detection results and decision
+    """
+    patient_data = claim_data.get('patient', {})
+    faskes_data = claim_data.get('faskes', {})
+    ml_data = claim_data.get('medical_data', {})
+    claim_id = claim_data.get('claim_id', 'UNKNOWN')
+    
+    if emitter.enabled:
+        emitter.emit('ai_scored', claim_id=claim_id,
+                     score=ai_fraud_result['score'],
+                     probability=ai_fraud_result['probability'])
+    
+    verdict = decide(patient_fraud_result, faskes_fraud_result, ai_fraud_result)
     
     # Compile all red flags
     all_red_flags = (
@@ -126,51 +173,413 @@ def process_claim(claim_data: Dict[str, Any]) -> Dict[str, Any]:
             'patient': patient_fraud_result['total_score'],
             'faskes': faskes_fraud_result['total_score'],
             'ai': ai_fraud_result['score'],
-            'total': total_score
+            'total': verdict['total_score']
         },
         'red_flags': all_red_flags,
-        'decision': decision,
-        'decision_reason': decision_reason,
-        'auto_reject': auto_reject,
-        'requires_review': decision == 'NEEDS_REVIEW'
+        'decision': verdict['decision'],
+        'decision_reason': verdict['decision_reason'],
+        'auto_reject': verdict['auto_reject'],
+        'requires_review': verdict['decision'] == 'NEEDS_REVIEW'
     }
     
-    # Print summary
-    print(f"\n{'='*60}")
-    print(f"FRAUD DETECTION SUMMARY")
-    print(f"{'='*60}")
-    print(f"Patient: {result['patient_name']}")
-    print(f"Faskes: {result['faskes_name']}")
-    print(f"Diagnosis: {result['diagnosis']}")
-    print(f"Claim Amount: Rp {result['claim_amount']:,}")
-    print(f"\nFraud Scores:")
-    print(f"  - Patient Fraud: {result['fraud_scores']['patient']}")
-    print(f"  - Faskes Fraud: {result['fraud_scores']['faskes']}")
-    print(f"  - AI Detection: {result['fraud_scores']['ai']}")
-    print(f"  - TOTAL SCORE: {result['fraud_scores']['total']}")
-    print(f"\nDecision: {result['decision']}")
-    print(f"Reason: {result['decision_reason']}")
-    print(f"{'='*60}\n")
-    
-    # Save result to claims database
-    claims_db_path = os.path.join(os.path.dirname(__file__), 'data', 'claims.json')
-    claims_db = load_database(claims_db_path)
-    claims_db.append(result)
-    save_database(claims_db_path, claims_db)
+    if emitter.enabled:
+        emitter.emit('claim_decided', **{k: v for k, v in result.items() if k != 'red_flags'})
     
     return result
 
 
+def open_claims_writer(**kwargs) -> ClaimsWriter:
+    """
+    Writer for the claims database; every commit updates the dashboard
+    aggregates and the claims query index, and enqueues NEEDS_REVIEW
+    results for reviewers
+    """
+    hooks = [AggregatesUpdater(DEFAULT_CLAIMS_PATH), ClaimsIndexUpdater(DEFAULT_CLAIMS_PATH), ReviewQueue()]
+    
+    def on_commit(results: List[Dict[str, Any]]):
+        for hook in hooks:
+            hook(results)
+    
+    return ClaimsWriter(DEFAULT_CLAIMS_PATH, on_commit=on_commit, **kwargs)
+
+
+def record_review_features(claims: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    """
+    Keep the model features of claims sent to review, so the reviewer's
+    decision can later be used as a training label
+    """
+    items = [
+        (result['claim_id'], result.get('timestamp'), feature_dict(claim_data.get('medical_data', {})))
+        for claim_data, result in zip(claims, results) if result.get('decision') == 'NEEDS_REVIEW'
+    ]
+    if items:
+        FeedbackStore().record_features(items, model_version())
+
+
+def save_results(results: List[Dict[str, Any]], writer: ClaimsWriter = None,
+                 checkpoint_log_bytes: int = AUTO_CHECKPOINT_LOG_BYTES):
+    """
+    Append processed results to the claims database
+    With a long-lived writer the results join its current commit group;
+    otherwise they are committed as one group, and the snapshot is only
+    rewritten once the log reaches `checkpoint_log_bytes` (0 = always)
+    """
+    if writer is not None:
+        writer.extend(results)
+        return
+    
+    with open_claims_writer(commit_every=len(results),
+                            checkpoint_log_bytes=checkpoint_log_bytes) as claims_writer:
+        claims_writer.extend(results)
+
+
+def process_claim(claim_data: Dict[str, Any], emitter: EventEmitter = NULL_EMITTER,
+                  save: bool = True, cache: ResultCache = None) -> Dict[str, Any]:
+    """
+    Process a claim through the fraud detection pipeline
+    
+    Args:
+        claim_data: Complete claim data with patient, faskes, and medical_data
+        emitter: Event emitter for progress reporting (quiet by default)
+        save: Append the result to the claims database
+        cache: Optional result cache; identical resubmissions skip all checks
+            and are not saved again (their result is already stored)
+        
+    Returns:
+        dict with fraud detection results and decision
+    """
+    if cache is not None:
+        cache_key = cache.key_for(claim_data)
+        result = cache.get(cache_key)
+        if result is not None:
+            emitter.emit('claim_cached', claim_id=result.get('claim_id'), decision=result.get('decision'))
+            return result
+    
+    # Load databases
+    patient_db, faskes_db, fraud_history_db = load_reference_data()
+    
+    patient_fraud_result, faskes_fraud_result = _check_claim(claim_data, patient_db, faskes_db, fraud_history_db)
+    _report_checks(claim_data, patient_fraud_result, faskes_fraud_result, emitter)
+    
+    # Step 3: AI Model Inference
+    ai_fraud_result = predict_fraud_score(claim_data.get('medical_data', {}), claim_id=claim_data.get('claim_id'))
+    
+    result = build_result(claim_data, patient_fraud_result, faskes_fraud_result, ai_fraud_result, emitter)
+    
+    if cache is not None:
+        cache.put(cache_key, result)
+    
+    # Save result to claims database; checkpointed right away, since the
+    # dashboard API (app/api/claims) reads claims.json only
+    if save:
+        record_review_features([claim_data], [result])
+        save_results([result], checkpoint_log_bytes=0)
+    
+    return result
+
+
+def _score_claims(claims: List[Dict[str, Any]], emitter: EventEmitter, reference_data: Tuple,
+                  cache: ResultCache, model, scaler,
+                  progress: Dict[str, bool] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Score a batch, serving identical resubmissions from the cache
+    New results are cached only once the whole batch has been built, so a
+    batch that fails part-way leaves no claim looking already scored
+    
+    Args:
+        progress: Optional dict; 'predicted' is set once the model has scored
+            the batch (and the drift monitor / shadow models have seen it)
+    
+    Returns:
+        (results in input order, indices scored in this call); cache hits
+        and repeats of a claim earlier in the batch are not in the indices
+    """
+    results = [None] * len(claims)
+    
+    pending = list(range(len(claims)))
+    repeats = []  # (index, index of the identical claim scored in this batch)
+    if cache is not None:
+        keys = [cache.key_for(claim_data) for claim_data in claims]
+        pending = []
+        first = {}
+        for i, key in enumerate(keys):
+            if key in first:
+                repeats.append((i, first[key]))
+                continue
+            results[i] = cache.get(key)
+            if results[i] is None:
+                first[key] = i
+                pending.append(i)
+            else:
+                emitter.emit('claim_cached', claim_id=results[i].get('claim_id'), decision=results[i].get('decision'))
+    
+    if pending:
+        if reference_data is None:
+            reference_data = load_reference_data()
+        patient_db, faskes_db, fraud_history_db = reference_data
+        
+        checks = [
+            _check_claim(claims[i], patient_db, faskes_db, fraud_history_db)
+            for i in pending
+        ]
+        ai_results = predict_fraud_score_batch([claims[i].get('medical_data', {}) for i in pending],
+                                               model=model, scaler=scaler,
+                                               claim_ids=[claims[i].get('claim_id') for i in pending])
+        if progress is not None:
+            progress['predicted'] = True
+        
+        # Events are emitted claim by claim, after the batch was scored
+        for i, (patient_fraud_result, faskes_fraud_result), ai_fraud_result in zip(pending, checks, ai_results):
+            _report_checks(claims[i], patient_fraud_result, faskes_fraud_result, emitter)
+            results[i] = build_result(claims[i], patient_fraud_result, faskes_fraud_result, ai_fraud_result, emitter)
+        if cache is not None:
+            for i in pending:
+                cache.put(keys[i], results[i])
+    
+    for i, j in repeats:
+        results[i] = copy.deepcopy(results[j])
+        cache.hits += 1
+        emitter.emit('claim_cached', claim_id=results[i].get('claim_id'), decision=results[i].get('decision'))
+    
+    return results, pending
+
+
+def process_claims(claims: Iterable[Dict[str, Any]], emitter: EventEmitter = NULL_EMITTER,
+                   save: bool = True, reference_data: Tuple = None,
+                   cache: ResultCache = None, writer: ClaimsWriter = None,
+                   model=None, scaler=None) -> List[Dict[str, Any]]:
+    """
+    Process a batch of claims through the fraud detection pipeline
+    Reference databases and the model are loaded once, AI scoring runs as
+    a single batch and the claims database is written once at the end
+    
+    Args:
+        claims: Iterable of complete claim data dicts
+        emitter: Event emitter for progress reporting (quiet by default)
+        save: Append the results to the claims database
+        reference_data: Preloaded (patient_db, faskes_db, fraud_history_db),
+            loaded from disk when omitted
+        cache: Optional result cache; only misses are scored and saved, and
+            a claim repeated within the batch is scored once
+        writer: Long-lived group-commit writer used when saving
+        model, scaler: Preloaded model artifacts; the deployed ones when None
+        
+    Returns:
+        List of result dicts in input order
+    """
+    claims = list(claims)
+    results, scored = _score_claims(claims, emitter, reference_data, cache, model, scaler)
+    
+    if save and scored:
+        record_review_features([claims[i] for i in scored], [results[i] for i in scored])
+        save_results([results[i] for i in scored], writer)
+    
+    return results
+
+
+def iter_ndjson(stream: IO[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Parse one JSON document per line, lazily
+    
+    Yields:
+        (line_number, claim_dict) or (line_number, ValueError) for bad lines
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def _process_stream_batch(batch: List[Tuple[int, Dict[str, Any]]], emitter: EventEmitter,
+                          reference_data: Tuple, cache: ResultCache) -> Tuple[List[Dict[str, Any]], List[Tuple]]:
+    """
+    Score one stream batch; a claim that fails inside the pipeline becomes
+    an {'error', 'line'} record instead of failing its batch
+    
+    Returns:
+        (records in input order, (claim, result) pairs scored in this call)
+    """
+    claims = [claim for _, claim in batch]
+    # Events of a failed batch attempt are dropped, so no claim is reported twice
+    buffer = BufferSink() if emitter.enabled else None
+    progress = {}
+    counters = (cache.hits, cache.disk_hits, cache.misses) if cache is not None else None
+    try:
+        results, scored = _score_claims(claims, EventEmitter([buffer]) if buffer else emitter,
+                                        reference_data, cache, None, None, progress)
+        if buffer is not None:
+            buffer.replay(emitter)
+        return results, [(claims[i], results[i]) for i in scored]
+    except Exception:
+        if cache is not None:
+            # The failed attempt cached nothing; its lookups are repeated below
+            cache.hits, cache.disk_hits, cache.misses = counters
+    
+    # A failed attempt that reached the model has already fed the drift monitor and
+    # shadow models; passing the deployed artifacts explicitly keeps the retries out of both
+    model = scaler = None
+    if progress.get('predicted'):
+        try:
+            model, scaler, _ = load_deployed()
+        except FileNotFoundError:
+            pass
+    
+    # Isolate the failing claims by scoring one at a time
+    records, fresh = [], []
+    for line_number, claim in batch:
+        try:
+            results, scored = _score_claims([claim], emitter, reference_data, cache, model, scaler)
+        except Exception as e:
+            reason = f"{type(e).__name__}: {e}"
+            emitter.emit('claim_failed', claim_id=claim.get('claim_id'), line=line_number, error=reason)
+            records.append({'error': reason, 'line': line_number})
+            continue
+        records.append(results[0])
+        if scored:
+            fresh.append((claim, results[0]))
+    return records, fresh
+
+
+def stream_claims(stream: IO[str], batch_size: int = STREAM_BATCH_SIZE,
+                  emitter: EventEmitter = NULL_EMITTER, save: bool = False,
+                  cache: ResultCache = None) -> Iterator[Dict[str, Any]]:
+    """
+    Constant-memory claim pipeline over an NDJSON stream
+    Claims are scored in fixed-size batches; only one batch is held at a time.
+    Lines that fail to parse, and claims that fail in the pipeline, yield an
+    error record so output stays line-aligned and the rest of their batch
+    is still scored.
+    
+    Args:
+        stream: Text stream with one claim JSON per line
+        batch_size: Claims scored per model call
+        emitter: Event emitter for progress reporting (quiet by default)
+        save: Append results to the claims database after each batch
+        cache: Optional result cache shared across batches
+        
+    Yields:
+        Result dicts (or {'error', 'line'} records) in input order
+    """
+    reference_data = load_reference_data()
+    pending = []
+    writer = open_claims_writer() if save else None
+    
+    def flush():
+        records, fresh = _process_stream_batch(pending, emitter, reference_data, cache)
+        if save and fresh:
+            record_review_features([claim for claim, _ in fresh], [result for _, result in fresh])
+            save_results([result for _, result in fresh], writer)
+        pending.clear()
+        return records
+    
+    try:
+        yield from _stream_batches(stream, pending, batch_size, flush)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _stream_batches(stream: IO[str], pending: List, batch_size: int, flush) -> Iterator[Dict[str, Any]]:
+    """Group parsed lines into batches, passing bad lines through as error records"""
+    for line_number, item in iter_ndjson(stream):
+        if isinstance(item, dict):
+            pending.append((line_number, item))
+            if len(pending) >= batch_size:
+                yield from flush()
+            continue
+        
+        # Keep ordering: emit everything before the bad line first
+        if pending:
+            yield from flush()
+        reason = str(item) if isinstance(item, ValueError) else 'Claim must be a JSON object'
+        yield {'error': reason, 'line': line_number}
+    
+    if pending:
+        yield from flush()
+
+
+def run_stream(input_stream: IO[str], output_stream: IO[str], batch_size: int = STREAM_BATCH_SIZE,
+               emitter: EventEmitter = NULL_EMITTER, save: bool = False,
+               cache: ResultCache = None) -> int:
+    """Write one compact JSON result per input line; returns the number of records written"""
+    count = 0
+    for record in stream_claims(input_stream, batch_size, emitter, save, cache):
+        output_stream.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        count += 1
+        if count % batch_size == 0:
+            output_stream.flush()
+    output_stream.flush()
+    return count
+
+
+def build_emitter(verbose: bool = False, events_path: str = None) -> EventEmitter:
+    """Create an emitter with the sinks requested on the command line"""
+    emitter = EventEmitter()
+    if verbose:
+        emitter.add_sink(ConsoleSink(sys.stdout))
+    if events_path:
+        if events_path == '-':
+            emitter.add_sink(JsonLinesSink(sys.stderr))
+        else:
+            emitter.add_sink(JsonLinesSink(open(events_path, 'a', encoding='utf-8'), owns_stream=True))
+    return emitter
+
+
 def main():
     """Main entry point"""
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description='Smart Claim BPJS fraud detection')
+    parser.add_argument('claim_file', nargs='?', help='Claim JSON file to process')
+    parser.add_argument('--test', action='store_true', help='Process the bundled sample claim')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read NDJSON claims from stdin and write one compact result per line')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE,
+                        help='Claims scored per batch in --stream mode')
+    parser.add_argument('--save', action='store_true',
+                        help='Also append --stream results to the claims database')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse results of identical claims (in-memory LRU)')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Also keep cached results on disk under DIR (implies --cache)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Print the step-by-step report before the JSON result')
+    parser.add_argument('--events', metavar='PATH',
+                        help="Append structured JSON-lines events to PATH ('-' for stderr)")
+    args = parser.parse_args()
+    
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = ResultCache(disk_dir=args.cache_dir)
+    
+    if args.stream:
+        # stdout carries results only; events may still go to a file or stderr
+        emitter = build_emitter(False, args.events)
+        stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        run_stream(stdin, sys.stdout, max(1, args.batch_size), emitter, args.save, cache)
+        if cache is not None:
+            emitter.emit('cache_stats', **cache.stats())
+            print(f"Cache: {json.dumps(cache.stats())}", file=sys.stderr)
+        feature_cache = get_feature_cache()
+        if feature_cache is not None:
+            emitter.emit('feature_cache_stats', **feature_cache.stats())
+        emitter.close()
+        return
+    
+    if not args.test and not args.claim_file:
         print("Usage: python main.py <claim_file.json>")
         print("   or: python main.py --test")
+        print("   or: python main.py --stream < claims.ndjson")
         sys.exit(1)
     
-    if sys.argv[1] == '--test':
+    emitter = build_emitter(args.verbose, args.events)
+    
+    if args.test:
         # Run test with sample data
-        print("Running test mode with sample data...")
+        if args.verbose:
+            print("Running test mode with sample data...")
         
         # Load sample data
         with open('data_schemas/pendaftaran_pasien.json', 'r') as f:
@@ -209,7 +618,7 @@ def main():
         }
     else:
         # Load claim from file
-        claim_file = sys.argv[1]
+        claim_file = args.claim_file
         
         if not os.path.exists(claim_file):
             print(f"Error: File not found: {claim_file}")
@@ -219,10 +628,14 @@ def main():
             claim_data = json.load(f)
     
     # Process claim
-    result = process_claim(claim_data)
+    result = process_claim(claim_data, emitter=emitter, cache=cache)
+    if cache is not None:
+        emitter.emit('cache_stats', **cache.stats())
+    emitter.close()
     
-    # Output result as JSON
-    print("\nJSON Output:")
+    # Output result as JSON (stdout carries only the result unless verbose)
+    if args.verbose:
+        print("\nJSON Output:")
     print(json.dumps(result, indent=2, ensure_ascii=False))
 
 
@@ -0,0 +1,333 @@
+"""
+Model Compression Module
+Builds smaller variants of the deployed forest and reports what each one
+costs in accuracy and saves in latency and memory
+
+Every variant combines three reductions:
+
+    trees   keep the first N trees (bootstrap trees are interchangeable)
+    depth   turn every node at depth D into a leaf (its class distribution
+            is the weighted mix of the pruned subtree)
+    merge   collapse a split whose two children are leaves with fraud
+            probabilities within a tolerance into one leaf, bottom-up;
+            tolerance 0 is lossless
+
+Pruned trees are rebuilt as compact sklearn trees (unreachable nodes are
+dropped), so variants are ordinary RandomForestClassifier pickles that
+model_inference, explain.py and backtest.py load unchanged.
+
+Report per variant, on a fresh synthetic evaluation set:
+    ROC-AUC; agreement of the AI score decision (a claim with no other red
+    flags: accept / review / reject by SCORE_THRESHOLD_*) and of the AI flag
+    band with the original; mean |score delta|; single-claim and batch
+    predict latency (n_jobs=None, as published by train.py); node count and
+    pickled size.
+
+Decisions of real claims also depend on the patient and faskes checks; run
+analytics/backtest.py --model on a saved variant for the full-pipeline diff.
+
+Usage:
+    python ml_model/compress.py
+    python ml_model/compress.py --trees 100,50,25 --depths 10,8 --merge 0,0.02 --json
+    python ml_model/compress.py --save 50,8,0.02 --output-dir /tmp/compact
+"""
+
+import argparse
+import copy
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SCORE_THRESHOLD_AUTO_ACCEPT, SCORE_THRESHOLD_AUTO_REJECT
+from ml_model.drift import load_reference
+from ml_model.model_inference import NUMERICAL_COLS, load_model, load_scaler
+from ml_model.train import (
+    FEATURE_NAMES, MODELS_DIR, MODEL_FILE, SCALER_FILE, generate_dataset, load_manifest, publish_artifacts
+)
+
+DEFAULT_TREES = [100, 50, 25, 10]
+DEFAULT_DEPTHS = [10, 8, 6]
+DEFAULT_MERGE = [0.0, 0.05]
+EVAL_SAMPLES = 20000
+EVAL_SEED = 2024
+LATENCY_RUNS = 200
+
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+# Float noise allowed by the lossless merge (tolerance 0)
+MERGE_EPSILON = 1e-12
+
+
+def compress_tree(tree, max_depth: Optional[int] = None, merge_tolerance: Optional[float] = None,
+                  fraud_class: int = 1):
+    """
+    Depth-capped, leaf-merged compact copy of a fitted sklearn Tree
+
+    Args:
+        tree: estimator.tree_ of a DecisionTreeClassifier
+        max_depth: Nodes at this depth become leaves (None: no cap)
+        merge_tolerance: Merge sibling leaves whose fraud probabilities
+            differ by at most this much (None: no merging)
+        fraud_class: Column of the fraud class in tree.value
+
+    Returns:
+        New sklearn Tree with only the reachable nodes, in preorder
+    """
+    from sklearn.tree._tree import Tree
+
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    left, right = nodes['left_child'], nodes['right_child']
+    totals = values[:, 0, :].sum(axis=1)
+    fraud = values[:, 0, fraud_class] / np.where(totals > 0, totals, 1)
+
+    # Post-order pass: which nodes end up as leaves
+    leaf = left == TREE_LEAF
+    depth = np.zeros(len(nodes), dtype=np.int64)
+    order = []
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if not leaf[node]:
+            if max_depth is not None and depth[node] >= max_depth:
+                leaf[node] = True
+                continue
+            for child in (left[node], right[node]):
+                depth[child] = depth[node] + 1
+                stack.append(child)
+    if merge_tolerance is not None:
+        for node in reversed(order):
+            if not leaf[node] and leaf[left[node]] and leaf[right[node]]:
+                if abs(fraud[left[node]] - fraud[right[node]]) <= merge_tolerance + MERGE_EPSILON:
+                    leaf[node] = True
+
+    # Preorder rebuild of the reachable nodes
+    kept = []
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        kept.append(node)
+        if not leaf[node]:
+            stack.append(right[node])
+            stack.append(left[node])
+    kept = np.array(kept, dtype=np.int64)
+    new_index = np.full(len(nodes), TREE_LEAF, dtype=np.int64)
+    new_index[kept] = np.arange(len(kept))
+
+    new_nodes = nodes[kept].copy()
+    is_leaf = leaf[kept]
+    new_nodes['left_child'] = np.where(is_leaf, TREE_LEAF, new_index[left[kept]])
+    new_nodes['right_child'] = np.where(is_leaf, TREE_LEAF, new_index[right[kept]])
+    new_nodes['feature'] = np.where(is_leaf, TREE_UNDEFINED, new_nodes['feature'])
+    new_nodes['threshold'] = np.where(is_leaf, TREE_UNDEFINED, new_nodes['threshold'])
+
+    compact = Tree(tree.n_features, np.array([tree.n_classes[0]], dtype=np.intp), tree.n_outputs)
+    compact.__setstate__({
+        'max_depth': int(depth[kept].max()),
+        'node_count': len(kept),
+        'nodes': np.ascontiguousarray(new_nodes),
+        'values': np.ascontiguousarray(values[kept]),
+    })
+    return compact
+
+
+def compress_forest(model, trees: Optional[int] = None, max_depth: Optional[int] = None,
+                    merge_tolerance: Optional[float] = None):
+    """
+    Compressed copy of a RandomForestClassifier (the original is untouched)
+
+    Args:
+        model: Fitted forest
+        trees: Trees kept (the first N); all when None
+        max_depth: Depth cap
+        merge_tolerance: Sibling-leaf merge tolerance
+
+    Returns:
+        New forest with n_jobs=None
+    """
+    classes = list(model.classes_)
+    fraud_class = classes.index(1) if 1 in classes else len(classes) - 1
+    estimators = model.estimators_[:trees] if trees else model.estimators_
+
+    variant = copy.copy(model)
+    variant.estimators_ = []
+    for estimator in estimators:
+        compact = copy.copy(estimator)
+        compact.tree_ = compress_tree(estimator.tree_, max_depth, merge_tolerance, fraud_class)
+        if max_depth is not None:
+            compact.max_depth = max_depth
+        variant.estimators_.append(compact)
+    variant.n_estimators = len(variant.estimators_)
+    if max_depth is not None:
+        variant.max_depth = max_depth
+    variant.n_jobs = None
+    return variant
+
+
+def _ai_scores(proba: np.ndarray) -> np.ndarray:
+    """AI red flag score (model_inference: int(probability * 100))"""
+    return (proba * 100).astype(np.int64)
+
+
+def _decisions(scores: np.ndarray) -> np.ndarray:
+    """Decision of a claim whose only score is the AI score (main.decide)"""
+    return np.where(scores < SCORE_THRESHOLD_AUTO_ACCEPT, 0, np.where(scores > SCORE_THRESHOLD_AUTO_REJECT, 2, 1))
+
+
+def _bands(scores: np.ndarray) -> np.ndarray:
+    """AI_LOW / AI_MEDIUM / AI_HIGH"""
+    return np.digitize(scores, [30, 60])
+
+
+def _latency(model, X, single_row) -> Tuple[float, float]:
+    """(median single-claim predict_proba in ms, batch throughput in claims/s)"""
+    model.predict_proba(single_row)
+    runs = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        model.predict_proba(single_row)
+        runs.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_seconds = time.perf_counter() - start
+    return float(np.median(runs)) * 1000, len(X) / batch_seconds
+
+
+def evaluate_variant(name: str, variant, X, y: np.ndarray, reference_scores: np.ndarray) -> Dict[str, Any]:
+    """Accuracy, agreement, latency and size of one model on the evaluation set"""
+    from sklearn.metrics import roc_auc_score
+
+    proba = variant.predict_proba(X)[:, 1]
+    scores = _ai_scores(proba)
+    single_ms, claims_per_second = _latency(variant, X, X.iloc[:1])
+    return {
+        'variant': name,
+        'trees': len(variant.estimators_),
+        'max_depth': max(e.tree_.max_depth for e in variant.estimators_),
+        'nodes': int(sum(e.tree_.node_count for e in variant.estimators_)),
+        'bytes': len(pickle.dumps(variant, protocol=pickle.HIGHEST_PROTOCOL)),
+        'auc': round(float(roc_auc_score(y, proba)), 4),
+        'decision_agreement': round(float((_decisions(scores) == _decisions(reference_scores)).mean()), 4),
+        'band_agreement': round(float((_bands(scores) == _bands(reference_scores)).mean()), 4),
+        'mean_abs_score_delta': round(float(np.abs(scores - reference_scores).mean()), 3),
+        'single_ms': round(single_ms, 3),
+        'claims_per_second': round(claims_per_second),
+    }
+
+
+def variant_name(trees: Optional[int], depth: Optional[int], merge: Optional[float]) -> str:
+    return f"t{trees}-d{depth}-m{merge:g}" if merge is not None else f"t{trees}-d{depth}"
+
+
+def run_compression(models_dir: str = MODELS_DIR, trees: List[int] = DEFAULT_TREES,
+                    depths: List[int] = DEFAULT_DEPTHS, merges: List[float] = DEFAULT_MERGE,
+                    samples: int = EVAL_SAMPLES, seed: int = EVAL_SEED) -> Dict[str, Any]:
+    """
+    Evaluate every (trees, depth, merge) combination against the deployed model
+
+    Returns:
+        {'evaluation': {...}, 'variants': [original, ...]} sorted by size
+    """
+    model = load_model(os.path.join(models_dir, MODEL_FILE))
+    scaler = load_scaler(os.path.join(models_dir, SCALER_FILE))
+    data = generate_dataset(samples, seed=seed)
+    X, y = data[FEATURE_NAMES].copy(), data['is_fraud'].to_numpy()
+    if scaler is not None:
+        X[NUMERICAL_COLS] = scaler.transform(X[NUMERICAL_COLS])
+
+    original = copy.copy(model)
+    original.n_jobs = None
+    reference_scores = _ai_scores(original.predict_proba(X)[:, 1])
+    rows = [evaluate_variant('original', original, X, y, reference_scores)]
+
+    total_trees = len(model.estimators_)
+    for n_trees in trees:
+        for depth in depths:
+            for merge in merges:
+                variant = compress_forest(model, min(n_trees, total_trees), depth, merge)
+                rows.append(evaluate_variant(variant_name(n_trees, depth, merge), variant, X, y, reference_scores))
+    rows[1:] = sorted(rows[1:], key=lambda row: row['nodes'])
+    return {'evaluation': {'samples': samples, 'seed': seed, 'fraud': int(y.sum())}, 'variants': rows}
+
+
+def save_variant(models_dir: str, output_dir: str, trees: int, depth: Optional[int],
+                 merge: Optional[float]) -> Dict[str, Any]:
+    """Publish one compressed variant (with the deployed scaler and drift reference) to output_dir"""
+    model = load_model(os.path.join(models_dir, MODEL_FILE))
+    scaler = load_scaler(os.path.join(models_dir, SCALER_FILE))
+    variant = compress_forest(model, trees, depth, merge)
+    manifest = load_manifest(models_dir) or {}
+    new_manifest = {
+        'created_at': datetime.now().isoformat(),
+        'parent_version': manifest.get('version'),
+        'trained_by': 'compress',
+        'params': dict(manifest.get('params', {}), n_estimators=len(variant.estimators_), max_depth=depth),
+        'compression': {'trees': len(variant.estimators_), 'max_depth': depth, 'merge_tolerance': merge,
+                        'nodes': int(sum(e.tree_.node_count for e in variant.estimators_))},
+        'feature_names': FEATURE_NAMES,
+    }
+    if 'feedback' in manifest:
+        new_manifest['feedback'] = manifest['feedback']
+    return publish_artifacts(output_dir, variant, scaler, FEATURE_NAMES, new_manifest, load_reference(models_dir))
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(item) for item in text.split(',') if item]
+
+
+def _float_list(text: str) -> List[float]:
+    return [float(item) for item in text.split(',') if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress the deployed forest and compare the variants')
+    parser.add_argument('--models-dir', default=MODELS_DIR, help='Deployed artifacts')
+    parser.add_argument('--trees', type=_int_list, default=DEFAULT_TREES, help='Tree counts, e.g. 100,50,25')
+    parser.add_argument('--depths', type=_int_list, default=DEFAULT_DEPTHS, help='Depth caps, e.g. 10,8,6')
+    parser.add_argument('--merge', type=_float_list, default=DEFAULT_MERGE, help='Leaf merge tolerances, e.g. 0,0.05')
+    parser.add_argument('--samples', type=int, default=EVAL_SAMPLES, help='Synthetic evaluation claims')
+    parser.add_argument('--seed', type=int, default=EVAL_SEED)
+    parser.add_argument('--save', metavar='TREES,DEPTH,MERGE', help='Publish this variant instead of reporting')
+    parser.add_argument('--output-dir', help='Where --save publishes (required with --save)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    if args.save:
+        if not args.output_dir:
+            parser.error('--save needs --output-dir (never overwrite the deployed model in place)')
+        trees, depth, merge = (args.save.split(',') + ['', ''])[:3]
+        manifest = save_variant(args.models_dir, args.output_dir, int(trees),
+                                int(depth) if depth else None, float(merge) if merge else None)
+        print(f"✓ Published {manifest['compression']['nodes']} nodes, version {manifest['version']} "
+              f"to {args.output_dir}")
+        return
+
+    report = run_compression(args.models_dir, args.trees, args.depths, args.merge, args.samples, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    evaluation = report['evaluation']
+    print(f"\n{'='*60}")
+    print("MODEL COMPRESSION")
+    print(f"{'='*60}")
+    print(f"Evaluation: {evaluation['samples']} synthetic claims ({evaluation['fraud']} fraud), seed {evaluation['seed']}")
+    print(f"\n{'variant':<16}{'nodes':>7}{'KB':>7}{'AUC':>8}{'decision':>10}{'band':>8}"
+          f"{'|dScore|':>10}{'1 claim ms':>12}{'claims/s':>10}")
+    for row in report['variants']:
+        print(f"{row['variant']:<16}{row['nodes']:>7}{row['bytes'] / 1024:>7.0f}{row['auc']:>8.4f}"
+              f"{row['decision_agreement']:>10.2%}{row['band_agreement']:>8.2%}{row['mean_abs_score_delta']:>10.2f}"
+              f"{row['single_ms']:>12.3f}{row['claims_per_second']:>10,}")
+
+
+if __name__ == '__main__':
+    main()
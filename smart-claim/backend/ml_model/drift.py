@@ -0,0 +1,328 @@
+"""
+Feature Drift Monitor
+Streaming histograms of the model's input features compared with the
+training distribution (PSI and KS per feature)
+
+Reference snapshot (`models/drift_reference.json`), written by train.py
+from the training split before scaling:
+    {"version": 1, "feature_names": [...], "samples": N,
+     "edges": [[...] per feature], "counts": [[...] per feature]}
+Bins are fixed at training time: quantile edges for continuous features,
+midpoints between values for features with few distinct values.
+
+Every claim scored with the deployed model adds one count per feature to
+the live histograms (one vectorized bin lookup per batch, O(features)
+per claim). Counts are flushed every DRIFT_FLUSH_EVERY claims and at exit
+into DRIFT_STATE_PATH under a lock, so all processes share one stream;
+the state restarts when the reference changes (new model).
+
+    PSI = sum((live% - ref%) * ln(live% / ref%))  per feature
+          < 0.10 stable, 0.10-0.25 moderate, > 0.25 significant drift
+    KS  = max |live CDF - ref CDF| over the bin edges
+
+Usage:
+    python ml_model/drift.py report [--json]
+    python ml_model/drift.py reset
+    python ml_model/drift.py reference     # snapshot for models trained elsewhere
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DRIFT_MONITOR, DRIFT_STATE_PATH, DRIFT_BINS, DRIFT_FLUSH_EVERY
+from utils.paths import resolve_config_path
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+DRIFT_REFERENCE_FILE = 'drift_reference.json'
+REFERENCE_VERSION = 1
+
+PSI_MODERATE = 0.10
+PSI_SIGNIFICANT = 0.25
+# Share given to empty bins so PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def bin_edges(values: np.ndarray, bins: int = DRIFT_BINS) -> List[float]:
+    """Fixed bin edges for one feature from its training values"""
+    values = np.asarray(values, dtype=np.float64)
+    distinct = np.unique(values)
+    if len(distinct) <= bins:
+        # Flags, severities, small integer ranges: one bin per value
+        return ((distinct[:-1] + distinct[1:]) / 2).tolist()
+    quantiles = np.quantile(values, np.arange(1, bins) / bins)
+    return np.unique(quantiles).tolist()
+
+
+def build_reference(frame, feature_names: List[str], bins: int = DRIFT_BINS) -> Dict[str, Any]:
+    """
+    Reference snapshot from training features (unscaled DataFrame)
+
+    A value v falls into bin i when edges[i-1] < v <= edges[i]; the last
+    bin is open-ended, so each feature has len(edges) + 1 bins.
+    """
+    edges = [bin_edges(frame[name].to_numpy(), bins) for name in feature_names]
+    monitor = _Histograms(feature_names, edges)
+    monitor.add(frame[feature_names].to_numpy(dtype=np.float64))
+    return {
+        'version': REFERENCE_VERSION,
+        'feature_names': list(feature_names),
+        'samples': int(len(frame)),
+        'edges': edges,
+        'counts': monitor.counts_list(),
+    }
+
+
+def reference_id(reference: Dict[str, Any]) -> str:
+    """Content hash identifying a reference snapshot"""
+    canonical = json.dumps(reference, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(canonical).hexdigest()[:16]
+
+
+class _Histograms:
+    """Per-feature counts over fixed, padded bin edges"""
+
+    def __init__(self, feature_names: List[str], edges: List[List[float]]):
+        self.feature_names = list(feature_names)
+        self.bins = [len(e) + 1 for e in edges]
+        width = max(len(e) for e in edges) if edges else 0
+        # Padding with +inf keeps the unused bins of short features empty
+        self.edges = np.full((len(edges), max(width, 1)), np.inf)
+        for i, e in enumerate(edges):
+            self.edges[i, :len(e)] = e
+        self.width = self.edges.shape[1] + 1
+        self.offsets = np.arange(len(edges)) * self.width
+        self.counts = np.zeros(len(edges) * self.width, dtype=np.int64)
+
+    def add(self, values: np.ndarray, chunk: int = 65536):
+        """Count a (N, F) block of feature rows"""
+        for start in range(0, len(values), chunk):
+            block = values[start:start + chunk]
+            index = (block[:, :, None] > self.edges[None, :, :]).sum(axis=2)
+            self.counts += np.bincount((index + self.offsets).ravel(), minlength=len(self.counts))
+
+    def counts_list(self) -> List[List[int]]:
+        matrix = self.counts.reshape(-1, self.width)
+        return [matrix[i, :bins].tolist() for i, bins in enumerate(self.bins)]
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two count vectors"""
+    e = np.maximum(expected / max(expected.sum(), 1), PSI_EPSILON)
+    a = np.maximum(actual / max(actual.sum(), 1), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Kolmogorov-Smirnov statistic on the binned CDFs"""
+    e = np.cumsum(expected) / max(expected.sum(), 1)
+    a = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(a - e)))
+
+
+def drift_status(value: float) -> str:
+    if value > PSI_SIGNIFICANT:
+        return 'significant'
+    if value > PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+def compare(reference: Dict[str, Any], counts: List[List[int]]) -> Dict[str, Any]:
+    """PSI / KS per feature of live counts against the reference"""
+    features = {}
+    for name, ref_counts, live_counts in zip(reference['feature_names'], reference['counts'], counts):
+        ref_counts, live_counts = np.asarray(ref_counts), np.asarray(live_counts)
+        value = psi(ref_counts, live_counts)
+        features[name] = {'psi': round(value, 4), 'ks': round(ks(ref_counts, live_counts), 4),
+                          'status': drift_status(value)}
+    return features
+
+
+def load_reference(models_dir: str = MODELS_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(models_dir, DRIFT_REFERENCE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _empty_state(reference: Dict[str, Any]) -> Dict[str, Any]:
+    return {'reference_id': reference_id(reference), 'claims': 0,
+            'counts': [[0] * len(c) for c in reference['counts']]}
+
+
+def load_state(reference: Dict[str, Any], state_path: str = DRIFT_STATE_PATH) -> Dict[str, Any]:
+    """Persisted live counts; empty when missing or built against another reference"""
+    path = resolve_config_path(state_path)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('reference_id') == reference_id(reference):
+            return state
+    return _empty_state(reference)
+
+
+class DriftMonitor:
+    """
+    Live feature histograms of one process, flushed into the shared state
+
+    Args:
+        reference: Snapshot from build_reference()
+        state_path: Shared state file
+        flush_every: Claims observed between flushes
+    """
+
+    def __init__(self, reference: Dict[str, Any], state_path: str = DRIFT_STATE_PATH,
+                 flush_every: int = DRIFT_FLUSH_EVERY):
+        self.reference = reference
+        self.reference_id = reference_id(reference)
+        self.state_path = resolve_config_path(state_path)
+        self.flush_every = flush_every
+        self.feature_names = reference['feature_names']
+        self._histograms = _Histograms(self.feature_names, reference['edges'])
+        self._pending = 0
+
+    def observe(self, features, columns: Optional[List[str]] = None):
+        """
+        Count a batch of claims
+
+        Args:
+            features: feature_dict() rows (list of dicts), a DataFrame with
+                the reference columns or an (N, F) array
+            columns: Column names of an array (reference order when omitted)
+
+        Never raises into the scoring path: rows without the expected
+        features are ignored.
+        """
+        names = self.feature_names
+        try:
+            if isinstance(features, np.ndarray):
+                values = features
+                if columns is not None and list(columns) != names:
+                    values = values[:, [list(columns).index(name) for name in names]]
+            elif isinstance(features, list):
+                # Plain rows skip the DataFrame column selection, which dominates single-claim cost
+                values = np.array([[row[name] for name in names] for row in features], dtype=np.float64)
+            else:
+                values = features[names].to_numpy(dtype=np.float64)
+        except (KeyError, ValueError, TypeError):
+            return
+        if values.ndim != 2 or not len(values):
+            return
+        self._histograms.add(values)
+        self._pending += len(values)
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Add the counts gathered since the last flush to the shared state"""
+        if not self._pending:
+            return
+        # Imported here: the storage package imports model_inference, which imports this module
+        from storage.locking import file_lock
+        from storage.claims_store import LOCK_SUFFIX, atomic_write_json
+
+        delta = self._histograms.counts_list()
+        with file_lock(self.state_path + LOCK_SUFFIX):
+            state = load_state(self.reference, self.state_path)
+            state['claims'] += self._pending
+            state['counts'] = [[a + b for a, b in zip(row, extra)] for row, extra in zip(state['counts'], delta)]
+            atomic_write_json(self.state_path, state, indent=None)
+        self._histograms.counts[:] = 0
+        self._pending = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Drift metrics over the shared state plus this process's unflushed counts"""
+        self.flush()
+        return drift_metrics(self.reference, self.state_path)
+
+
+def drift_metrics(reference: Dict[str, Any], state_path: str = DRIFT_STATE_PATH) -> Dict[str, Any]:
+    """
+    Returns:
+        {'claims', 'reference_samples', 'max_psi', 'status',
+         'features': {name: {'psi', 'ks', 'status'}}}
+    """
+    state = load_state(reference, state_path)
+    features = compare(reference, state['counts']) if state['claims'] else {}
+    max_psi = max((row['psi'] for row in features.values()), default=0.0)
+    return {
+        'claims': state['claims'],
+        'reference_samples': reference['samples'],
+        'max_psi': max_psi,
+        'status': drift_status(max_psi) if features else 'no_data',
+        'features': features,
+    }
+
+
+_DRIFT_MONITOR = None
+_DRIFT_INITIALIZED = False
+
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    """Process-wide monitor for the deployed model; None when disabled or without a reference"""
+    global _DRIFT_MONITOR, _DRIFT_INITIALIZED
+    if not _DRIFT_INITIALIZED:
+        _DRIFT_INITIALIZED = True
+        reference = load_reference() if DRIFT_MONITOR else None
+        if reference is not None:
+            _DRIFT_MONITOR = DriftMonitor(reference)
+            atexit.register(_DRIFT_MONITOR.flush)
+    return _DRIFT_MONITOR
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feature drift of model inputs vs the training data')
+    parser.add_argument('command', choices=['report', 'reset', 'reference'])
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--state', default=DRIFT_STATE_PATH)
+    parser.add_argument('--samples', type=int, default=100000, help='reference: synthetic training samples')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'reference':
+        from ml_model.train import FEATURE_NAMES, generate_dataset
+        from storage.claims_store import atomic_write_json
+        reference = build_reference(generate_dataset(args.samples), FEATURE_NAMES)
+        path = os.path.join(args.models_dir, DRIFT_REFERENCE_FILE)
+        atomic_write_json(path, reference, indent=None)
+        print(f"✓ Reference from {args.samples} synthetic training samples: {path}")
+        return
+
+    reference = load_reference(args.models_dir)
+    if reference is None:
+        print(f"Error: no {DRIFT_REFERENCE_FILE} in {args.models_dir} (train with ml_model/train.py "
+              f"or run `drift.py reference`)", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'reset':
+        from storage.claims_store import atomic_write_json
+        atomic_write_json(resolve_config_path(args.state), _empty_state(reference), indent=None)
+        print("✓ Drift counters reset")
+        return
+
+    metrics = drift_metrics(reference, args.state)
+    if args.json:
+        print(json.dumps(metrics, indent=2))
+        return
+    print(f"\n{'='*60}")
+    print(f"FEATURE DRIFT ({metrics['claims']} claims vs {metrics['reference_samples']} training samples)")
+    print(f"{'='*60}")
+    print(f"Overall: {metrics['status']} (max PSI {metrics['max_psi']:.3f})")
+    rows = sorted(metrics['features'].items(), key=lambda kv: -kv[1]['psi'])
+    print(f"\n{'feature':<26} {'PSI':>7} {'KS':>7}  status")
+    for name, row in rows:
+        print(f"{name:<26} {row['psi']:>7.3f} {row['ks']:>7.3f}  {row['status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Feature Vector Cache
+Bounded LRU of featurized and scaled model inputs, so the same medical data
+replayed through backtests, shadow scoring or repeated submissions is not
+featurized and scaled again
+
+Key: blake2b-128 of the scaler version plus a canonical encoding of the
+fields feature_dict() reads (diagnosis severity, vital signs, lab results,
+claim amount). The encoding is marshal rather than sorted JSON: keying
+must stay cheaper than feature_dict() itself (~3 us vs ~16 us per claim)
+or the batch path gets slower. Equal values always encode equally; the
+same dict with its keys in another order only costs a miss. Value: the raw and scaled feature vectors packed into one
+bytes object (2 x features float64, 320 bytes for 20 features), so an
+entry costs about 0.7 KB including the key and LRU bookkeeping and
+FEATURE_CACHE_SIZE bounds memory however many distinct claims pass
+through.
+
+The scaler version is a hash of the scaler's pickled state, computed once
+per scaler object; a retrained or candidate scaler never reads vectors
+scaled by another one.
+
+Usage:
+    from ml_model.feature_cache import get_feature_cache
+    get_feature_cache().stats()
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import pickle
+import sys
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import FEATURE_CACHE_SIZE
+
+_SCALER_VERSIONS = weakref.WeakKeyDictionary()
+
+
+def scaler_version(scaler) -> bytes:
+    """Content hash of a fitted scaler (b'unscaled' for None), cached per scaler object"""
+    if scaler is None:
+        return b'unscaled'
+    try:
+        return _SCALER_VERSIONS[scaler]
+    except (KeyError, TypeError):
+        pass
+    version = hashlib.sha256(pickle.dumps(scaler, protocol=4)).digest()[:16]
+    try:
+        _SCALER_VERSIONS[scaler] = version
+    except TypeError:
+        pass
+    return version
+
+
+def canonical_medical_data(ml_data: Dict[str, Any]) -> bytes:
+    """Stable encoding of the medical data fields that determine the features"""
+    payload = ((ml_data.get('diagnosis') or {}).get('severity'), ml_data.get('vital_signs'),
+               ml_data.get('lab_results'), ml_data.get('claim_amount'))
+    try:
+        return marshal.dumps(payload, 4)
+    except ValueError:
+        # Values marshal cannot encode (e.g. Decimal amounts)
+        return b'json:' + json.dumps(payload, sort_keys=True, default=repr).encode('utf-8')
+
+
+class FeatureCache:
+    """
+    LRU of (raw, scaled) feature vectors keyed by medical data + scaler version
+
+    Args:
+        max_entries: Vectors kept in memory (0 disables caching)
+    """
+
+    def __init__(self, max_entries: int = FEATURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, ml_data: Dict[str, Any], version: bytes) -> bytes:
+        digest = hashlib.blake2b(version, digest_size=16)
+        digest.update(canonical_medical_data(ml_data))
+        return digest.digest()
+
+    def lookup(self, ml_data_list: List[Dict[str, Any]], scaler,
+               featurize: Callable[[List[Dict[str, Any]]], Tuple[np.ndarray, np.ndarray]]
+               ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw and scaled feature matrices for a batch, computing only the misses
+
+        Args:
+            ml_data_list: Medical data dicts
+            scaler: Scaler the vectors are (to be) scaled with
+            featurize: Computes (raw (M, F), scaled (M, F)) for the missed rows
+
+        Returns:
+            (raw (N, F), scaled (N, F)) float64 matrices in input order
+        """
+        version = scaler_version(scaler)
+        keys = [self.key_for(ml_data, version) for ml_data in ml_data_list]
+        packed = [self._entries.get(key) for key in keys]
+        missed = [i for i, entry in enumerate(packed) if entry is None]
+        self.misses += len(missed)
+        self.hits += len(keys) - len(missed)
+
+        if missed:
+            raw, scaled = featurize([ml_data_list[i] for i in missed])
+            fresh = np.ascontiguousarray(np.stack([raw, scaled], axis=1), dtype=np.float64)
+            for row, i in enumerate(missed):
+                packed[i] = fresh[row].tobytes()
+                self._remember(keys[i], packed[i])
+            if len(missed) == len(keys):
+                return fresh[:, 0], fresh[:, 1]
+
+        for key in keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        matrix = np.frombuffer(bytearray(b''.join(packed)), dtype=np.float64).reshape(len(keys), 2, -1)
+        return matrix[:, 0], matrix[:, 1]
+
+    def _remember(self, key: bytes, entry: bytes):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'evictions': self.evictions,
+        }
+
+
+_FEATURE_CACHE = None
+
+
+def get_feature_cache() -> Optional[FeatureCache]:
+    """Process-wide feature cache; None when FEATURE_CACHE_SIZE is 0"""
+    global _FEATURE_CACHE
+    if _FEATURE_CACHE is None and FEATURE_CACHE_SIZE > 0:
+        _FEATURE_CACHE = FeatureCache(FEATURE_CACHE_SIZE)
+    return _FEATURE_CACHE
@@ -3,53 +3,211 @@ ML Model Inference Module
 Loads trained model and performs fraud score prediction
 """
 
+import hashlib
+import json
 import pickle
+import time
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import os
 import sys
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import MODEL_PATH, SCALER_PATH
+from config import MODEL_PATH, SCALER_PATH, AI_EXPLANATION_TOP_FEATURES
+from fraud_detection.flag_templates import render_flag
+from ml_model.drift import get_drift_monitor
+from ml_model.explain import get_explainer
+from ml_model.feature_cache import get_feature_cache
+from ml_model.shadow import get_shadow_scorer
 
+# Numerical features scaled by the fitted StandardScaler
+NUMERICAL_COLS = [
+    'systolic_bp', 'diastolic_bp', 'temperature', 'pulse', 'respiratory_rate',
+    'hemoglobin', 'leukocyte', 'platelet', 'hematocrit', 'claim_amount', 'bp_ratio'
+]
 
-def load_model():
-    """Load trained Random Forest model"""
-    model_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'fraud_detection_model.pkl')
+
+_MODEL_CACHE = {}
+_SCALER_CACHE = {}
+
+# Deployed artifacts (names as written by ml_model/train.py publish_artifacts)
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+MODEL_FILE = 'fraud_detection_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+MANIFEST_FILE = 'manifest.json'
+
+# A publish renames the artifacts one by one; a load that catches it midway
+# sees files from two versions and reads them again after a short wait
+DEPLOY_READ_RETRIES = 20
+DEPLOY_RETRY_SECONDS = 0.05
+
+_DEPLOYED = {}  # stamps -> (model, scaler, version)
+
+
+def _file_stamp(path: str):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _deployed_stamps(paths: List[str]):
+    return tuple(_file_stamp(path) if os.path.exists(path) else None for path in paths)
+
+
+def _read_bytes(path: str):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _read_deployed(model_path: str, scaler_path: str, manifest_path: str):
+    """
+    Read model and scaler bytes that belong to one published version
+
+    The manifest lists the sha256 of every file it was published with; the
+    bytes are accepted once they match it (or when there is no manifest,
+    e.g. models trained before manifests existed).
+    """
+    for attempt in range(DEPLOY_READ_RETRIES):
+        manifest_bytes = _read_bytes(manifest_path)
+        model_bytes = _read_bytes(model_path)
+        scaler_bytes = _read_bytes(scaler_path)
+        if manifest_bytes is None:
+            return model_bytes, scaler_bytes
+        try:
+            files = json.loads(manifest_bytes.decode('utf-8')).get('files', {})
+        except ValueError:
+            files = None  # manifest caught mid-replace on a platform without atomic rename
+        if files is not None and all(
+            data is not None and hashlib.sha256(data).hexdigest() == files[name]
+            for name, data in ((MODEL_FILE, model_bytes), (SCALER_FILE, scaler_bytes))
+            if name in files
+        ):
+            return model_bytes, scaler_bytes
+        time.sleep(DEPLOY_RETRY_SECONDS)
+    print(f"Warning: deployed artifacts in {os.path.dirname(model_path)} do not match "
+          f"{MANIFEST_FILE}; loading them as found", file=sys.stderr)
+    return model_bytes, scaler_bytes
+
+
+def load_deployed(models_dir: str = MODELS_DIR) -> Tuple[Any, Any, str]:
+    """
+    Load the deployed model and scaler as one consistent pair
+
+    Both are checked against the manifest digests, so a load that races
+    with a publish never pairs a new model with an old scaler. The pair is
+    kept in memory until any of the files changes on disk; callers must
+    not modify the objects in place (copy them first).
+
+    Returns:
+        (model, scaler or None, version) - version is the short content hash
+        of the model and scaler bytes (manifest 'version')
+    """
+    paths = [os.path.join(models_dir, name) for name in (MODEL_FILE, SCALER_FILE, MANIFEST_FILE)]
+    stamps = _deployed_stamps(paths)
+    key = (os.path.abspath(models_dir), stamps)
+    if key in _DEPLOYED:
+        return _DEPLOYED[key]
+    
+    if stamps[0] is None:
+        raise FileNotFoundError(f"Model not found at {paths[0]}. Please train the model first: python ml_model/train.py")
+    
+    model_bytes, scaler_bytes = _read_deployed(*paths)
+    if model_bytes is None:
+        raise FileNotFoundError(f"Model not found at {paths[0]}. Please train the model first: python ml_model/train.py")
+    
+    model = pickle.loads(model_bytes)
+    scaler = pickle.loads(scaler_bytes) if scaler_bytes is not None else None  # Scaler is optional
+    version = hashlib.sha256(model_bytes + (scaler_bytes if scaler_bytes is not None else b'missing')).hexdigest()[:16]
+    
+    # Key by the stamps seen before reading; a publish in between only costs a reload next call
+    _DEPLOYED.clear()
+    _DEPLOYED[key] = (model, scaler, version)
+    return _DEPLOYED[key]
+
+
+def load_model(model_path: str = None):
+    """
+    Load trained Random Forest model (the deployed one unless a path is given)
+    The unpickled model is kept in memory until its file changes on disk,
+    so callers must not modify it in place (copy it first)
+    """
+    if model_path is None:
+        return load_deployed()[0]
     
     if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model not found at {model_path}. Please train the model first using train_model.ipynb")
+        raise FileNotFoundError(f"Model not found at {model_path}. Please train the model first: python ml_model/train.py")
+    
+    path = os.path.abspath(model_path)
+    stamp = _file_stamp(path)
+    cached = _MODEL_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
     
-    with open(model_path, 'rb') as f:
+    with open(path, 'rb') as f:
         model = pickle.load(f)
     
+    _MODEL_CACHE[path] = (stamp, model)
     return model
 
 
-def load_scaler():
-    """Load fitted scaler"""
-    scaler_path = os.path.join(os.path.dirname(__file__), '..', 'models', 'scaler.pkl')
+def load_scaler(scaler_path: str = None):
+    """
+    Load fitted scaler (the deployed one unless a path is given)
+    Cached like load_model(), so the feature cache sees one scaler object
+    (and computes its version once) until the file changes
+    """
+    if scaler_path is None:
+        try:
+            return load_deployed()[1]
+        except FileNotFoundError:
+            scaler_path = os.path.join(MODELS_DIR, SCALER_FILE)
     
     if not os.path.exists(scaler_path):
         return None  # Scaler is optional
     
-    with open(scaler_path, 'rb') as f:
+    path = os.path.abspath(scaler_path)
+    stamp = _file_stamp(path)
+    cached = _SCALER_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    
+    with open(path, 'rb') as f:
         scaler = pickle.load(f)
     
+    _SCALER_CACHE[path] = (stamp, scaler)
     return scaler
 
 
-def extract_features(ml_data: Dict[str, Any]) -> pd.DataFrame:
+def model_version() -> str:
     """
-    Extract features from medical data for model input
+    Short content hash identifying the deployed model and scaler
+    Taken from the same verified read as load_deployed(), so it always
+    names the pair that is actually scoring
+    """
+    try:
+        return load_deployed()[2]
+    except FileNotFoundError:
+        paths = [os.path.join(MODELS_DIR, name) for name in (MODEL_FILE, SCALER_FILE)]
+        digest = hashlib.sha256()
+        for path in paths:
+            data = _read_bytes(path)
+            digest.update(data if data is not None else b'missing')
+        return digest.hexdigest()[:16]
+
+
+def feature_dict(ml_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the model feature values from medical data as a plain dict
     
     Args:
         ml_data: Dict containing diagnosis, vital_signs, lab_results, claim_amount
         
     Returns:
-        DataFrame with features
+        dict of feature name -> value
     """
     diagnosis = ml_data.get('diagnosis', {})
     vital_signs = ml_data.get('vital_signs', {})
@@ -95,10 +253,55 @@ def extract_features(ml_data: Dict[str, Any]) -> pd.DataFrame:
         features['tachycardia'] == 0
     ) else 0
     
-    # Create DataFrame
-    df = pd.DataFrame([features])
+    return features
+
+
+# Column order of feature_dict() rows (the defaults fill every feature)
+FEATURE_COLUMNS = list(feature_dict({}))
+_NUMERICAL_INDEX = [FEATURE_COLUMNS.index(col) for col in NUMERICAL_COLS]
+
+
+def _featurize(ml_data_list: List[Dict[str, Any]], scaler) -> Tuple[np.ndarray, np.ndarray]:
+    """(raw, scaled) float64 feature matrices in FEATURE_COLUMNS order"""
+    raw = np.array([[row[col] for col in FEATURE_COLUMNS] for row in map(feature_dict, ml_data_list)],
+                   dtype=np.float64)
+    scaled = raw.copy()
+    if scaler is not None:
+        scaled[:, _NUMERICAL_INDEX] = scaler.transform(pd.DataFrame(raw[:, _NUMERICAL_INDEX], columns=NUMERICAL_COLS))
+    return raw, scaled
+
+
+def feature_matrices(ml_data_list: List[Dict[str, Any]], scaler) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Raw and scaled feature matrices for a batch of medical data
+    Served from the feature cache (config.FEATURE_CACHE_SIZE) when enabled,
+    so only medical data not seen with this scaler is featurized and scaled
     
-    return df
+    Args:
+        ml_data_list: Medical data dicts
+        scaler: Fitted scaler or None
+        
+    Returns:
+        (raw (N, F), scaled (N, F)) float64 arrays, columns as FEATURE_COLUMNS
+    """
+    cache = get_feature_cache()
+    if cache is None:
+        return _featurize(ml_data_list, scaler)
+    return cache.lookup(ml_data_list, scaler, lambda missed: _featurize(missed, scaler))
+
+
+def extract_features(ml_data: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Extract features from medical data for model input
+    
+    Args:
+        ml_data: Dict containing diagnosis, vital_signs, lab_results, claim_amount
+        
+    Returns:
+        DataFrame with features
+    """
+    # Not a scoring path: the drift monitor only counts claims predict_fraud_score_batch() scores
+    return pd.DataFrame([feature_dict(ml_data)])
 
 
 def preprocess_data(ml_data: Dict[str, Any]) -> pd.DataFrame:
@@ -111,89 +314,126 @@ def preprocess_data(ml_data: Dict[str, Any]) -> pd.DataFrame:
     Returns:
         Preprocessed DataFrame ready for model
     """
-    # Extract features
-    df = extract_features(ml_data)
+    # Features scaled with the deployed scaler, if available (cached per medical data)
+    _, scaled = feature_matrices([ml_data], load_scaler())
+    return pd.DataFrame(scaled, columns=FEATURE_COLUMNS)
+
+
+def _ai_result_from_probability(fraud_proba: float, top_features: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build the AI red flag dict from a fraud probability (and its main contributors)"""
+    # Convert to score 0-100
+    score = int(fraud_proba * 100)
     
-    # Load scaler if available
-    scaler = load_scaler()
-    if scaler is not None:
-        # Scale numerical features
-        numerical_cols = [
-            'systolic_bp', 'diastolic_bp', 'temperature', 'pulse', 'respiratory_rate',
-            'hemoglobin', 'leukocyte', 'platelet', 'hematocrit', 'claim_amount', 'bp_ratio'
-        ]
-        df[numerical_cols] = scaler.transform(df[numerical_cols])
+    # Determine message based on score
+    if score < 30:
+        code = 'AI_LOW'
+    elif score < 60:
+        code = 'AI_MEDIUM'
+    else:
+        code = 'AI_HIGH'
     
-    return df
+    if top_features is None:
+        return render_flag(code, score=score, probability=round(float(fraud_proba), 3))
+    return render_flag(code, score=score, probability=round(float(fraud_proba), 3), top_features=top_features)
 
 
-def predict_fraud_score(ml_data: Dict[str, Any]) -> Dict[str, Any]:
+def _heuristic_result(ml_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fallback score used while no trained model is available"""
+    # Return a random score based on data consistency
+    diagnosis_severity = ml_data.get('diagnosis', {}).get('severity', 'mild')
+    claim_amount = ml_data.get('claim_amount', 0)
+    
+    # Simple heuristic for demo
+    if diagnosis_severity == 'mild' and claim_amount > 2000000:
+        score = np.random.randint(60, 90)
+    elif diagnosis_severity == 'severe' and claim_amount < 1000000:
+        score = np.random.randint(40, 70)
+    else:
+        score = np.random.randint(10, 40)
+    
+    return render_flag('AI_HEURISTIC', score=score, probability=score / 100)
+
+
+def predict_fraud_score(ml_data: Dict[str, Any], claim_id: str = None) -> Dict[str, Any]:
     """
     Predict fraud score using trained model
     Type: flex - score 0-100
+    Runs through the batch path, so configured shadow models score it too
     
     Args:
         ml_data: Medical data dict
+        claim_id: Optional claim id for the shadow side log
         
     Returns:
-        dict with 'score', 'probability', 'type', 'message'
+        dict with 'score', 'probability', 'type', 'message' and, for tree
+        models, 'top_features' (largest score contributors)
     """
-    try:
-        # Load model
-        model = load_model()
-        
-        # Preprocess data
-        X = preprocess_data(ml_data)
-        
-        # Predict probability
-        proba = model.predict_proba(X)[0]
-        
-        # Get fraud probability (assuming class 1 is fraud)
-        fraud_proba = proba[1] if len(proba) > 1 else proba[0]
-        
-        # Convert to score 0-100
-        score = int(fraud_proba * 100)
-        
-        # Determine message based on score
-        if score < 30:
-            message = "Risiko fraud rendah berdasarkan analisis AI"
-        elif score < 60:
-            message = "Risiko fraud sedang berdasarkan analisis AI"
-        else:
-            message = "Risiko fraud tinggi berdasarkan analisis AI"
-        
-        return {
-            'score': score,
-            'probability': round(fraud_proba, 3),
-            'type': 'flex',
-            'flag_name': 'AI Fraud Detection',
-            'message': message
-        }
-        
-    except FileNotFoundError as e:
-        # Model not trained yet, return default score
-        print(f"Warning: {e}")
-        print("Returning default score. Please train the model first.")
-        
-        # Return a random score based on data consistency
-        diagnosis_severity = ml_data.get('diagnosis', {}).get('severity', 'mild')
-        claim_amount = ml_data.get('claim_amount', 0)
-        
-        # Simple heuristic for demo
-        if diagnosis_severity == 'mild' and claim_amount > 2000000:
-            score = np.random.randint(60, 90)
-        elif diagnosis_severity == 'severe' and claim_amount < 1000000:
-            score = np.random.randint(40, 70)
-        else:
-            score = np.random.randint(10, 40)
+    return predict_fraud_score_batch([ml_data], claim_ids=[claim_id])[0]
+
+
+def predict_fraud_score_batch(ml_data_list: List[Dict[str, Any]], model=None, scaler=None,
+                              claim_ids: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Predict fraud scores for many claims with a single model call
+    Loads the model and scaler once and scores all feature rows together
+    
+    When scoring with the deployed model, the feature frame is also handed
+    to the configured shadow models (config.SHADOW_MODELS); their scores go
+    to a side log and never change the returned results.
+    
+    Args:
+        ml_data_list: List of medical data dicts
+        model: Preloaded model (e.g. a candidate); the deployed model when None
+        scaler: Preloaded scaler; the deployed scaler when None
+        claim_ids: Optional ids (row-aligned) for the shadow side log
         
-        return {
-            'score': score,
-            'probability': score / 100,
-            'type': 'flex',
-            'flag_name': 'AI Fraud Detection (Heuristic)',
-            'message': f"Skor fraud berdasarkan heuristik (model belum dilatih): {score}/100"
-        }
+    Returns:
+        List of dicts with 'score', 'probability', 'type', 'message'
+        in the same order as the input
+    """
+    if not ml_data_list:
+        return []
+    
+    # Replays with an explicit model are neither shadowed nor counted as live traffic
+    shadow = get_shadow_scorer() if model is None else None
+    monitor = get_drift_monitor() if model is None else None
+    
+    if model is None:
+        try:
+            # One verified read, so the deployed model is never paired with another version's scaler
+            model, deployed_scaler, _ = load_deployed()
+        except FileNotFoundError as e:
+            # stdout may carry results (main.py --stream), so warnings go to stderr
+            print(f"Warning: {e}", file=sys.stderr)
+            print("Returning default score. Please train the model first.", file=sys.stderr)
+            return [_heuristic_result(ml_data) for ml_data in ml_data_list]
+        if scaler is None:
+            scaler = deployed_scaler
+    
+    if scaler is None:
+        scaler = load_scaler()
+    
+    # Build one feature matrix for the whole batch (cached medical data is not featurized again)
+    raw, scaled = feature_matrices(ml_data_list, scaler)
+    if monitor is not None:
+        monitor.observe(raw, FEATURE_COLUMNS)
+    df = pd.DataFrame(scaled, columns=FEATURE_COLUMNS)
+    
+    proba = model.predict_proba(df)
+    fraud_proba = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+    
+    if shadow is not None:
+        # Shadow models may need the unscaled features
+        features = pd.DataFrame(raw, columns=FEATURE_COLUMNS)
+        shadow.submit(features, df, NUMERICAL_COLS, fraud_proba, claim_ids)
+    
+    explainer = get_explainer(model) if AI_EXPLANATION_TOP_FEATURES > 0 else None
+    if explainer is None:
+        return [_ai_result_from_probability(p) for p in fraud_proba]
+    
+    # Features that moved the score most, from the trees' decision paths
+    explanations = explainer.top_features(df, raw, AI_EXPLANATION_TOP_FEATURES)
+    return [_ai_result_from_probability(p, top) for p, top in zip(fraud_proba, explanations)]
 
 
 if __name__ == '__main__':
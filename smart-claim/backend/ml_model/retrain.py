@@ -0,0 +1,232 @@
+"""
+Incremental Retraining Module
+Grows the deployed forest with trees fitted on new reviewer labels and
+publishes it only when it passes the evaluation gates
+
+Each run takes the labels added to the feedback store since the deployed
+model was published (manifest 'feedback.labels_used'), fits
+`--new-trees` additional trees on them with warm_start (the existing
+trees and the fitted scaler are kept as they are) and checks the
+candidate against the deployed model:
+
+    labels     enough new training labels, both classes present
+    size       forest stays within MAX_TREES (beyond that: full retrain with train.py)
+    synthetic  ROC-AUC on a fresh synthetic set drops by at most MAX_SYNTHETIC_AUC_DROP
+    feedback   ROC-AUC on the held-out reviewer labels drops by at most MAX_FEEDBACK_AUC_DROP
+               (skipped until the holdout has MIN_HOLDOUT_LABELS of both classes)
+
+About 20% of reviewed claims, chosen by a hash of their review key
+(claim id + claim timestamp, since claim ids repeat), are held out and
+never trained on, so the feedback gate always measures unseen claims.
+Failing runs publish nothing and consume no labels.
+
+Usage:
+    python ml_model/retrain.py
+    python ml_model/retrain.py --new-trees 20 --dry-run
+    python ml_model/retrain.py --output-dir /tmp/candidate
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import warnings
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ml_model.drift import load_reference
+from ml_model.model_inference import NUMERICAL_COLS, load_deployed
+from ml_model.train import (
+    FEATURE_NAMES, MODELS_DIR, generate_dataset, load_manifest, publish_artifacts
+)
+from storage.feedback_store import DEFAULT_FEEDBACK_PATH, FeedbackStore
+
+DEFAULT_NEW_TREES = 10
+MAX_TREES = 300
+MIN_NEW_LABELS = 50
+HOLDOUT_PERCENT = 20
+MIN_HOLDOUT_LABELS = 20
+SYNTHETIC_GATE_SAMPLES = 5000
+MAX_SYNTHETIC_AUC_DROP = 0.01
+MAX_FEEDBACK_AUC_DROP = 0.005  # noise allowance of a small holdout
+
+
+def is_holdout(key: str) -> bool:
+    """Stable assignment of a reviewed claim (by its review key) to the evaluation holdout"""
+    digest = hashlib.sha256(str(key).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') % 100 < HOLDOUT_PERCENT
+
+
+def feature_matrix(samples: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, np.ndarray]:
+    """(X in FEATURE_NAMES order, y) from feedback samples"""
+    X = pd.DataFrame([sample['features'] for sample in samples], columns=FEATURE_NAMES)
+    y = np.array([sample['label'] for sample in samples], dtype=np.int64)
+    return X, y
+
+
+def _scaled(X: pd.DataFrame, scaler) -> pd.DataFrame:
+    if scaler is None:
+        return X
+    X = X.copy()
+    X[NUMERICAL_COLS] = scaler.transform(X[NUMERICAL_COLS])
+    return X
+
+
+def _auc(model, scaler, X: pd.DataFrame, y: np.ndarray) -> float:
+    from sklearn.metrics import roc_auc_score
+    return float(roc_auc_score(y, model.predict_proba(_scaled(X, scaler))[:, 1]))
+
+
+def grow_forest(model, scaler, X: pd.DataFrame, y: np.ndarray, new_trees: int = DEFAULT_NEW_TREES):
+    """
+    Copy of the forest with `new_trees` more trees fitted on (X, y)
+
+    The existing trees are untouched; the new ones are fitted on the batch
+    scaled with the deployed scaler, whose statistics all trees share.
+    """
+    candidate = copy.deepcopy(model)
+    candidate.set_params(warm_start=True, n_estimators=len(candidate.estimators_) + new_trees)
+    with warnings.catch_warnings():
+        # 'balanced' weights are computed on the new batch only, which is what we want here
+        warnings.filterwarnings('ignore', message='class_weight presets')
+        candidate.fit(_scaled(X, scaler), y)
+    candidate.set_params(warm_start=False, n_jobs=None)
+    return candidate
+
+
+def evaluate_gates(model, candidate, scaler, holdout: List[Dict[str, Any]],
+                   seed: int) -> List[Dict[str, Any]]:
+    """Synthetic regression and feedback holdout gates (see module docstring)"""
+    gates = []
+
+    synthetic = generate_dataset(SYNTHETIC_GATE_SAMPLES, seed=seed)
+    X, y = synthetic[FEATURE_NAMES], synthetic['is_fraud'].to_numpy()
+    current, new = _auc(model, scaler, X, y), _auc(candidate, scaler, X, y)
+    gates.append({'gate': 'synthetic', 'passed': new >= current - MAX_SYNTHETIC_AUC_DROP,
+                  'current_auc': current, 'candidate_auc': new})
+
+    labels = [sample['label'] for sample in holdout]
+    if len(holdout) < MIN_HOLDOUT_LABELS or len(set(labels)) < 2:
+        gates.append({'gate': 'feedback', 'passed': True, 'skipped': True,
+                      'detail': f"{len(holdout)} holdout labels (need {MIN_HOLDOUT_LABELS} of both classes)"})
+    else:
+        X, y = feature_matrix(holdout)
+        current, new = _auc(model, scaler, X, y), _auc(candidate, scaler, X, y)
+        gates.append({'gate': 'feedback', 'passed': new >= current - MAX_FEEDBACK_AUC_DROP,
+                      'holdout_labels': len(holdout),
+                      'current_auc': current, 'candidate_auc': new})
+    return gates
+
+
+def run_retraining(feedback_path: str = DEFAULT_FEEDBACK_PATH, models_dir: str = MODELS_DIR,
+                   output_dir: Optional[str] = None, new_trees: int = DEFAULT_NEW_TREES,
+                   min_labels: int = MIN_NEW_LABELS, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    One incremental retraining round
+
+    Args:
+        feedback_path: Feedback store with reviewer labels
+        models_dir: Directory of the deployed artifacts (and manifest)
+        output_dir: Where a passing candidate is published (default: models_dir)
+        new_trees: Trees added in this round
+        min_labels: New training labels required to run at all
+        dry_run: Evaluate but never publish
+
+    Returns:
+        Report dict: 'status' ('published', 'passed', 'rejected' or 'skipped'), 'gates', counts
+        and the new 'manifest' when published
+    """
+    manifest = load_manifest(models_dir) or {}
+    labels_used = manifest.get('feedback', {}).get('labels_used', 0)
+    samples = FeedbackStore(feedback_path).labeled()
+    labels_total = samples[-1]['ordinal'] + 1 if samples else labels_used
+
+    holdout = [s for s in samples if is_holdout(s['key'])]
+    batch = [s for s in samples if s['ordinal'] >= labels_used and not is_holdout(s['key'])]
+    report = {'status': 'skipped', 'labels_used': labels_used, 'new_labels': len(batch),
+              'holdout_labels': len(holdout), 'gates': []}
+
+    # One manifest-verified read, so a concurrent publish never pairs a new model with an old scaler
+    model, scaler, _ = load_deployed(models_dir)
+    trees = len(model.estimators_)
+    classes = {s['label'] for s in batch}
+
+    enough = len(batch) >= min_labels and len(classes) == 2
+    report['gates'].append({'gate': 'labels', 'passed': enough,
+                            'detail': f"{len(batch)} new labels, classes {sorted(classes)} (need {min_labels}, both)"})
+    fits = trees + new_trees <= MAX_TREES
+    report['gates'].append({'gate': 'size', 'passed': fits,
+                            'detail': f"{trees} + {new_trees} trees (max {MAX_TREES})"})
+    if not (enough and fits):
+        return report
+
+    X, y = feature_matrix(batch)
+    candidate = grow_forest(model, scaler, X, y, new_trees)
+    report['gates'] += evaluate_gates(model, candidate, scaler, holdout, seed=labels_total)
+
+    if not all(gate['passed'] for gate in report['gates']):
+        report['status'] = 'rejected'
+        return report
+    if dry_run:
+        report['status'] = 'passed'
+        return report
+
+    new_manifest = {
+        'created_at': datetime.now().isoformat(),
+        'parent_version': manifest.get('version'),
+        'trained_by': 'retrain',
+        'params': dict(manifest.get('params', {}), n_estimators=len(candidate.estimators_)),
+        'retrain': {'new_trees': new_trees, 'trees': len(candidate.estimators_),
+                    'train_labels': len(batch), 'fraud_labels': int(y.sum())},
+        'feedback': {'labels_used': labels_total, 'holdout_labels': len(holdout)},
+        'gates': report['gates'],
+        'feature_names': FEATURE_NAMES,
+    }
+    # The original trees still dominate the forest, so drift stays measured against their training data
+    report['manifest'] = publish_artifacts(output_dir or models_dir, candidate, scaler, FEATURE_NAMES, new_manifest,
+                                           load_reference(models_dir))
+    report['status'] = 'published'
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grow the deployed model with reviewer-labelled claims')
+    parser.add_argument('--feedback', default=DEFAULT_FEEDBACK_PATH, help='Feedback store path')
+    parser.add_argument('--models-dir', default=MODELS_DIR, help='Deployed artifacts')
+    parser.add_argument('--output-dir', help='Publish here instead of --models-dir')
+    parser.add_argument('--new-trees', type=int, default=DEFAULT_NEW_TREES)
+    parser.add_argument('--min-labels', type=int, default=MIN_NEW_LABELS)
+    parser.add_argument('--dry-run', action='store_true', help='Evaluate the gates without publishing')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = run_retraining(args.feedback, args.models_dir, args.output_dir, args.new_trees,
+                            args.min_labels, args.dry_run)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"\n{'='*60}")
+        print(f"INCREMENTAL RETRAINING: {report['status'].upper()}")
+        print(f"{'='*60}")
+        print(f"New labels: {report['new_labels']}   Holdout: {report['holdout_labels']}")
+        for gate in report['gates']:
+            mark = '✓' if gate['passed'] else '✗'
+            if 'candidate_auc' in gate:
+                detail = f"AUC {gate['current_auc']:.4f} -> {gate['candidate_auc']:.4f}"
+            else:
+                detail = gate.get('detail', '')
+            print(f"  {mark} {gate['gate']:<10} {detail}")
+        if report['status'] == 'published':
+            print(f"✓ Published version {report['manifest']['version']} to {args.output_dir or args.models_dir}")
+    sys.exit(1 if report['status'] == 'rejected' else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Shadow Model Scoring
+Runs candidate (challenger) models on the same feature rows as the deployed
+model and records their scores in a side log; decisions are never affected
+
+Shadow models are configured in config.SHADOW_MODELS:
+    {'rf_v2': {'model': 'smart-claim/backend/models/candidate.pkl',
+               'scaler': 'smart-claim/backend/models/candidate_scaler.pkl'}}
+('scaler' is optional; without it the deployed scaler's output is reused).
+
+predict_fraud_score_batch() hands each batch's feature frame to the shadow
+scorer after the champion has scored it. In async mode (SHADOW_ASYNC) a
+worker process does the shadow predict_proba calls and log writes, so the
+champion only pays for putting the batch on a bounded queue; when the
+queue is full the batch is dropped and counted rather than blocking.
+
+Side log (SHADOW_LOG_PATH), one JSON line per claim:
+    {"ts": ..., "claim_id": ..., "champion": {"score", "probability"},
+     "shadows": {name: {"score", "probability"}}}
+
+Usage:
+    python ml_model/shadow.py report [--log PATH]
+"""
+
+import argparse
+import atexit
+import json
+import os
+import multiprocessing
+import pickle
+import queue
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SHADOW_MODELS, SHADOW_LOG_PATH, SHADOW_ASYNC
+from utils.paths import resolve_config_path
+
+# Batches waiting for the shadow worker process before new ones are dropped
+SHADOW_QUEUE_SIZE = 64
+
+
+def _load_pickle(path: str):
+    with open(resolve_config_path(path), 'rb') as f:
+        return pickle.load(f)
+
+
+def _fraud_probability(model, X) -> np.ndarray:
+    proba = model.predict_proba(X)
+    return proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+
+
+def _score_batch(models: Dict[str, Dict[str, Any]], log_path: str, job) -> int:
+    """Score one batch with every shadow model and append it to the side log"""
+    features, scaled, numerical_cols, champion_proba, claim_ids = job
+    shadow_proba = {}
+    for name, entry in models.items():
+        X = scaled
+        if entry['scaler'] is not None:
+            X = features.copy()
+            X[numerical_cols] = entry['scaler'].transform(X[numerical_cols])
+        shadow_proba[name] = _fraud_probability(entry['model'], X)
+
+    ts = datetime.now().isoformat()
+    lines = []
+    for row, probability in enumerate(champion_proba):
+        record = {
+            'ts': ts,
+            'claim_id': claim_ids[row] if claim_ids is not None else None,
+            'champion': {'score': int(probability * 100), 'probability': round(float(probability), 3)},
+            'shadows': {
+                name: {'score': int(values[row] * 100), 'probability': round(float(values[row]), 3)}
+                for name, values in shadow_proba.items()
+            }
+        }
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    # One write per batch in append mode, so concurrent writers do not interleave lines
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+    return len(lines)
+
+
+def _shadow_worker(models: Dict[str, Dict[str, Any]], log_path: str, jobs, scored, errors):
+    if hasattr(os, 'nice'):
+        # Yield the CPU to the champion when cores are scarce
+        os.nice(10)
+    while True:
+        job = jobs.get()
+        try:
+            if job is None:
+                return
+            count = _score_batch(models, log_path, job)
+            with scored.get_lock():
+                scored.value += count
+        except Exception as e:
+            # A broken challenger must never affect production scoring
+            with errors.get_lock():
+                errors.value += len(job[0])
+            print(f"Warning: shadow scoring failed: {e}", file=sys.stderr)
+        finally:
+            jobs.task_done()
+
+
+class ShadowScorer:
+    """
+    Scores feature batches with candidate models off the decision path
+
+    In async mode the models run in a separate worker process, so shadow
+    scoring does not compete with the champion for the interpreter lock.
+
+    Args:
+        models: name -> {'model': model, 'scaler': scaler or None}
+        log_path: Side log receiving one JSON line per scored claim
+        async_mode: Score in a background worker process
+    """
+
+    def __init__(self, models: Dict[str, Dict[str, Any]], log_path: str = SHADOW_LOG_PATH,
+                 async_mode: bool = SHADOW_ASYNC, queue_size: int = SHADOW_QUEUE_SIZE):
+        self.models = models
+        self.log_path = resolve_config_path(log_path)
+        self.async_mode = async_mode
+        self.submitted = 0
+        self.dropped = 0
+        self._scored = multiprocessing.Value('q', 0)
+        self._errors = multiprocessing.Value('q', 0)
+        self._jobs = None
+        self._worker = None
+        if async_mode:
+            self._jobs = multiprocessing.JoinableQueue(maxsize=queue_size)
+            self._worker = multiprocessing.Process(
+                target=_shadow_worker, name='shadow-scorer',
+                args=(models, self.log_path, self._jobs, self._scored, self._errors), daemon=True
+            )
+            self._worker.start()
+
+    @classmethod
+    def from_config(cls, shadow_models: Dict[str, Dict[str, str]] = SHADOW_MODELS, **kwargs) -> 'ShadowScorer':
+        """Load every configured shadow model (and its scaler, if any)"""
+        models = {}
+        for name, paths in shadow_models.items():
+            models[name] = {
+                'model': _load_pickle(paths['model']),
+                'scaler': _load_pickle(paths['scaler']) if paths.get('scaler') else None,
+            }
+        return cls(models, **kwargs)
+
+    def submit(self, features, scaled, numerical_cols: List[str], champion_proba: np.ndarray,
+               claim_ids: Optional[List[Any]] = None):
+        """
+        Queue one batch for shadow scoring (never raises into the caller)
+
+        Args:
+            features: Unscaled feature DataFrame (shared with the champion)
+            scaled: Feature DataFrame after the deployed scaler
+            numerical_cols: Columns a shadow scaler transforms
+            champion_proba: Champion fraud probabilities, row-aligned
+            claim_ids: Optional ids written to the side log
+        """
+        job = (features, scaled, numerical_cols, np.asarray(champion_proba), claim_ids)
+        self.submitted += len(features)
+        if not self.async_mode:
+            try:
+                self._scored.value += _score_batch(self.models, self.log_path, job)
+            except Exception as e:
+                self._errors.value += len(features)
+                print(f"Warning: shadow scoring failed: {e}", file=sys.stderr)
+            return
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full:
+            self.dropped += len(features)
+
+    def flush(self):
+        """Wait until every queued batch has been scored and logged"""
+        if self._jobs is not None and self._worker.is_alive():
+            self._jobs.join()
+
+    def close(self):
+        if self._worker is not None and self._worker.is_alive():
+            self.flush()
+            self._jobs.put(None)
+            self._worker.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {'submitted': self.submitted, 'scored': self._scored.value,
+                'dropped': self.dropped, 'errors': self._errors.value}
+
+
+_SHADOW_SCORER = None
+_SHADOW_INITIALIZED = False
+
+
+def get_shadow_scorer() -> Optional[ShadowScorer]:
+    """Process-wide scorer built from config on first use; None when no shadows are configured"""
+    global _SHADOW_SCORER, _SHADOW_INITIALIZED
+    if not _SHADOW_INITIALIZED:
+        _SHADOW_INITIALIZED = True
+        if SHADOW_MODELS:
+            try:
+                _SHADOW_SCORER = ShadowScorer.from_config()
+                atexit.register(_SHADOW_SCORER.close)
+            except Exception as e:
+                # A broken challenger (bad path, incompatible pickle, worker start failure)
+                # must never affect production scoring
+                _SHADOW_SCORER = None
+                print(f"Warning: shadow models disabled: {type(e).__name__}: {e}", file=sys.stderr)
+    return _SHADOW_SCORER
+
+
+def summarize_log(log_path: str = SHADOW_LOG_PATH) -> Dict[str, Any]:
+    """Per shadow model: agreement with the champion over the side log"""
+    bands = np.array([30, 60])  # AI_LOW / AI_MEDIUM / AI_HIGH boundaries
+    claims = 0
+    pairs = {}  # name -> ([champion scores], [shadow scores])
+    with open(resolve_config_path(log_path), 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            claims += 1
+            for name, value in record['shadows'].items():
+                champion, shadow = pairs.setdefault(name, ([], []))
+                champion.append(record['champion']['score'])
+                shadow.append(value['score'])
+
+    summary = {'claims': claims, 'shadows': {}}
+    for name, (champion, shadow) in pairs.items():
+        champion, shadow = np.array(champion), np.array(shadow)
+        summary['shadows'][name] = {
+            'claims': len(shadow),
+            'mean_score': float(shadow.mean()),
+            'champion_mean_score': float(champion.mean()),
+            'mean_abs_diff': float(np.abs(shadow - champion).mean()),
+            'band_agreement': float((np.digitize(shadow, bands) == np.digitize(champion, bands)).mean()),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shadow model side log tools')
+    parser.add_argument('command', choices=['report'])
+    parser.add_argument('--log', default=SHADOW_LOG_PATH)
+    args = parser.parse_args()
+
+    summary = summarize_log(args.log)
+    print(f"\n{'='*60}")
+    print(f"SHADOW MODELS ({summary['claims']} claims)")
+    print(f"{'='*60}")
+    for name, row in summary['shadows'].items():
+        print(f"\n{name}")
+        print(f"  Mean score:       {row['mean_score']:.1f} (champion {row['champion_mean_score']:.1f})")
+        print(f"  Mean |diff|:      {row['mean_abs_diff']:.1f}")
+        print(f"  Band agreement:   {row['band_agreement'] * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
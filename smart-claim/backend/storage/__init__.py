@@ -0,0 +1,26 @@
+"""
+Storage Package
+Persistence helpers for processed claim results
+"""
+
+from .result_cache import ResultCache, claim_fingerprint
+from .claims_store import ClaimsWriter, atomic_write_json, load_claims, recover_claims_store
+from .compact_results import compact_result, expand_result
+from .partitions import PartitionedClaimsStore, read_claims_range
+from .columnar import ColumnarClaimsExport
+from .query import ClaimsIndex, ClaimsIndexUpdater
+from .aggregates import ClaimAggregates, AggregatesUpdater, load_aggregates, rebuild_aggregates
+from .review_queue import ReviewQueue, LeaseError
+from .feedback_store import FeedbackStore
+
+__all__ = [
+    'ResultCache', 'claim_fingerprint',
+    'ClaimsWriter', 'atomic_write_json', 'load_claims', 'recover_claims_store',
+    'compact_result', 'expand_result',
+    'PartitionedClaimsStore', 'read_claims_range',
+    'ColumnarClaimsExport',
+    'ClaimsIndex', 'ClaimsIndexUpdater',
+    'ClaimAggregates', 'AggregatesUpdater', 'load_aggregates', 'rebuild_aggregates',
+    'ReviewQueue', 'LeaseError',
+    'FeedbackStore'
+]
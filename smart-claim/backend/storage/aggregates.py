@@ -0,0 +1,252 @@
+"""
+Dashboard Aggregates Module
+Materialized counts and amounts of processed claims, maintained incrementally
+as results are committed to the claims store
+
+Persisted next to the store as `<db>.aggregates.json`:
+    {"version": 2, "claims": N, "committed": store committed count,
+     "totals": bucket,
+     "by_day": {date: bucket}, "by_faskes": {name: bucket},
+     "by_decision": {decision: bucket}, "by_diagnosis": {diagnosis: bucket}}
+
+bucket = {"count", "amount", "score_sum", "auto_reject",
+          "decisions": {"ACCEPTED": n, "NEEDS_REVIEW": n, "REJECTED": n}}
+
+Results carry the diagnosis display text rather than the ICD code, so
+by_diagnosis is keyed by that text.
+
+ClaimsWriter calls AggregatesUpdater.apply() with every committed group
+while holding the store lock: each result updates five buckets in O(1)
+and the (small) aggregates file is rewritten once per group. `committed`
+is the store's count of committed records (storage.claims_store) that the
+aggregates cover: when it equals the count before the group, only the
+group is folded; any other gap (results written without the hook, a lost
+update) triggers a rebuild. Aggregates cover the whole history; rotating
+claims into the archive does not change them. `rebuild` recomputes them
+from the archive plus the hot store.
+
+Usage:
+    python storage/aggregates.py show
+    python storage/aggregates.py rebuild
+    python storage/aggregates.py verify
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, Any, List, Iterable, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.locking import file_lock
+from storage.claims_store import DEFAULT_CLAIMS_PATH, LOCK_SUFFIX, atomic_write_json, committed_count_locked
+from storage.partitions import PartitionedClaimsStore, iter_claims
+
+AGGREGATES_SUFFIX = '.aggregates.json'
+AGGREGATES_VERSION = 2
+DIMENSIONS = {
+    'by_day': lambda result: str(result.get('timestamp', ''))[:10] or 'undated',
+    'by_faskes': lambda result: str(result.get('faskes_name', 'Unknown')),
+    'by_decision': lambda result: str(result.get('decision', 'UNKNOWN')),
+    'by_diagnosis': lambda result: str(result.get('diagnosis', 'Unknown')),
+}
+
+
+def _number(value: Any) -> float:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {'count': 0, 'amount': 0, 'score_sum': 0, 'auto_reject': 0, 'decisions': {}}
+
+
+def _add_to_bucket(bucket: Dict[str, Any], result: Dict[str, Any]):
+    bucket['count'] += 1
+    bucket['amount'] += _number(result.get('claim_amount'))
+    bucket['score_sum'] += _number(result.get('fraud_scores', {}).get('total'))
+    bucket['auto_reject'] += 1 if result.get('auto_reject') else 0
+    decision = str(result.get('decision', 'UNKNOWN'))
+    bucket['decisions'][decision] = bucket['decisions'].get(decision, 0) + 1
+
+
+def aggregates_path(db_path: str = DEFAULT_CLAIMS_PATH) -> str:
+    return db_path + AGGREGATES_SUFFIX
+
+
+class ClaimAggregates:
+    """Per day / faskes / decision / diagnosis counters of claim results"""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        if data is None or data.get('version') != AGGREGATES_VERSION:
+            data = {
+                'version': AGGREGATES_VERSION,
+                'claims': 0,
+                'committed': 0,
+                'totals': _empty_bucket(),
+                **{dimension: {} for dimension in DIMENSIONS}
+            }
+        self.data = data
+
+    def add(self, result: Dict[str, Any]):
+        """Fold one result in: O(1), five bucket updates"""
+        data = self.data
+        _add_to_bucket(data['totals'], result)
+        for dimension, key_of in DIMENSIONS.items():
+            buckets = data[dimension]
+            key = key_of(result)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _empty_bucket()
+            _add_to_bucket(bucket, result)
+        data['claims'] += 1
+
+    def extend(self, results: Iterable[Dict[str, Any]]):
+        for result in results:
+            self.add(result)
+
+    @property
+    def claims(self) -> int:
+        return self.data['claims']
+
+    @property
+    def committed(self) -> int:
+        return self.data['committed']
+
+    def __getitem__(self, dimension: str) -> Dict[str, Any]:
+        return self.data[dimension]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.data
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]]) -> 'ClaimAggregates':
+        aggregates = cls()
+        aggregates.extend(results)
+        return aggregates
+
+
+def load_aggregates(db_path: str = DEFAULT_CLAIMS_PATH) -> ClaimAggregates:
+    path = aggregates_path(db_path)
+    if not os.path.exists(path):
+        return ClaimAggregates()
+    with open(path, 'r', encoding='utf-8') as f:
+        return ClaimAggregates(json.load(f))
+
+
+def _catch_up_locked(db_path: str, group: List[Dict[str, Any]] = (),
+                     aggregates: Optional[ClaimAggregates] = None) -> ClaimAggregates:
+    """
+    Aggregates covering every committed result: folds only `group` (the
+    results just committed) when the aggregates were current before it,
+    rebuilds when anything else is missing
+    """
+    committed = committed_count_locked(db_path)
+    if aggregates is None:
+        aggregates = load_aggregates(db_path)
+    if aggregates.committed == committed:
+        return aggregates
+    if group and aggregates.committed == committed - len(group):
+        aggregates.extend(group)
+        aggregates.data['committed'] = committed
+        atomic_write_json(aggregates_path(db_path), aggregates.to_dict(), indent=None)
+        return aggregates
+    return _rebuild_locked(db_path)
+
+
+def catch_up_aggregates(db_path: str = DEFAULT_CLAIMS_PATH) -> ClaimAggregates:
+    """
+    Fold results committed but not yet aggregated: a writer that died
+    between its log fsync and the aggregates write, results written
+    without the hook, or history from before the aggregates existed
+    """
+    with file_lock(db_path + LOCK_SUFFIX):
+        return _catch_up_locked(db_path)
+
+
+class AggregatesUpdater:
+    """
+    Commit hook for ClaimsWriter(on_commit=...)
+
+    Runs under the store lock, so writer processes sharing one store
+    serialize their updates. Each commit folds only its own group, so a
+    short-lived writer (main.save_results for one claim) costs O(group);
+    the file is re-read only when another process changed it since this
+    updater last wrote it.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CLAIMS_PATH):
+        self.db_path = db_path
+        self.path = aggregates_path(db_path)
+        self._aggregates = None
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def apply(self, results: List[Dict[str, Any]]):
+        cached = self._aggregates if self._file_stamp() == self._stamp else None
+        self._aggregates = _catch_up_locked(self.db_path, results, cached)
+        self._stamp = self._file_stamp()
+
+    __call__ = apply
+
+
+def _rebuild_locked(db_path: str, archive_root: Optional[str] = None, write: bool = True) -> ClaimAggregates:
+    store = PartitionedClaimsStore(archive_root) if archive_root else None
+    aggregates = ClaimAggregates.from_results(iter_claims(store=store, db_path=db_path, locked=True))
+    aggregates.data['committed'] = committed_count_locked(db_path)
+    if write:
+        atomic_write_json(aggregates_path(db_path), aggregates.to_dict(), indent=None)
+    return aggregates
+
+
+def rebuild_aggregates(db_path: str = DEFAULT_CLAIMS_PATH, archive_root: Optional[str] = None,
+                       write: bool = True) -> ClaimAggregates:
+    """Recompute aggregates from the archive partitions plus the hot store"""
+    with file_lock(db_path + LOCK_SUFFIX):
+        return _rebuild_locked(db_path, archive_root, write)
+
+
+def verify_aggregates(db_path: str = DEFAULT_CLAIMS_PATH, archive_root: Optional[str] = None) -> List[str]:
+    """
+    Compare the persisted aggregates with a recomputation from history
+
+    Returns:
+        Differing sections (empty when consistent)
+    """
+    with file_lock(db_path + LOCK_SUFFIX):
+        stored = load_aggregates(db_path).to_dict()
+        expected = _rebuild_locked(db_path, archive_root, write=False).to_dict()
+    return [key for key in expected if stored.get(key) != expected[key]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialized dashboard aggregates')
+    parser.add_argument('command', choices=['show', 'rebuild', 'verify', 'catch-up'])
+    parser.add_argument('--db', default=DEFAULT_CLAIMS_PATH, help='Claims database')
+    parser.add_argument('--archive', help='Archive root (default: data/claims_archive)')
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        aggregates = rebuild_aggregates(args.db, args.archive)
+        print(f"✓ Rebuilt aggregates from {aggregates.claims} claims: {aggregates_path(args.db)}")
+    elif args.command == 'verify':
+        differences = verify_aggregates(args.db, args.archive)
+        if differences:
+            print(f"✗ Aggregates out of date: {', '.join(differences)} (run rebuild)")
+            sys.exit(1)
+        print("✓ Aggregates match history")
+    elif args.command == 'catch-up':
+        aggregates = catch_up_aggregates(args.db)
+        print(f"✓ Aggregates cover {aggregates.claims} claims")
+    else:
+        print(json.dumps(load_aggregates(args.db).to_dict(), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
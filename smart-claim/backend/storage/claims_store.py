@@ -0,0 +1,443 @@
+"""
+Claims Store Module
+Crash-safe persistence for processed claims: atomic snapshot writes plus an
+append-only log with group commit
+
+`<db>.state.json` counts every record ever committed to the store and marks
+a checkpoint in progress, so recovery never has to guess from record
+contents whether a log was already folded into the snapshot.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import time
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+from .locking import file_lock
+
+# Default claims database (snapshot read by the dashboard)
+DEFAULT_CLAIMS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'claims.json')
+
+# Suffixes of the files that live next to the snapshot
+LOG_SUFFIX = '.log.jsonl'
+MERGING_SUFFIX = '.log.merging'
+LOCK_SUFFIX = '.lock'
+STATE_SUFFIX = '.state.json'
+STATE_VERSION = 1
+
+# Group commit defaults
+DEFAULT_COMMIT_EVERY = 64
+DEFAULT_COMMIT_INTERVAL_MS = 200
+
+# Temp files younger than this may belong to a writer that does not hold
+# the store lock, so recovery leaves them alone
+TEMP_FILE_GRACE_SECONDS = 60
+
+# Log size at which a short-lived batch writer (main.save_results) checkpoints on close
+AUTO_CHECKPOINT_LOG_BYTES = 256 * 1024
+
+
+def _fsync_dir(dir_path: str):
+    """Persist a rename by syncing its directory (no-op where unsupported)"""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _target_mode(path: str) -> int:
+    """Permission bits for a rewrite of path: the existing file's, or what open() would give a new one"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2, durable: bool = True):
+    """
+    Write JSON through a temp file in the same directory and rename it over
+    the target, so readers see either the old or the new file, never a
+    truncated one
+
+    durable=False skips the fsyncs, for files that can be rebuilt after a
+    power loss
+    """
+    dir_path = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dir_path, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=dir_path)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the target's mode so other readers (the dashboard API) still can
+        os.chmod(tmp_path, _target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if durable:
+        _fsync_dir(dir_path)
+
+
+def read_log(log_path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Read the valid prefix of an append log
+    A record is valid when it is newline-terminated and parses to a dict;
+    reading stops at the first invalid record (a torn tail write)
+
+    Args:
+        offset: Byte offset of a record boundary to start reading from
+
+    Returns:
+        (records, valid_bytes, total_bytes), byte counts from the file start
+    """
+    if not os.path.exists(log_path):
+        return [], 0, 0
+
+    with open(log_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+
+    records = []
+    valid_bytes = offset
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+        if not isinstance(record, dict):
+            break
+        records.append(record)
+        valid_bytes += len(line)
+
+    return records, valid_bytes, offset + len(data)
+
+
+def _log_digest(log_path: str, valid_bytes: int) -> str:
+    """sha256 of the valid prefix of a log"""
+    digest = hashlib.sha256()
+    with open(log_path, 'rb') as f:
+        digest.update(f.read(valid_bytes))
+    return digest.hexdigest()
+
+
+def load_snapshot(db_path: str) -> List[Dict[str, Any]]:
+    """Claims in the JSON snapshot only (excludes uncommitted log records)"""
+    if not os.path.exists(db_path):
+        return []
+    with open(db_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_state(db_path: str) -> Optional[Dict[str, Any]]:
+    """The store state file, or None when missing, unreadable or outdated"""
+    try:
+        with open(db_path + STATE_SUFFIX, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+
+def _write_state(db_path: str, state: Dict[str, Any], durable: bool = False):
+    atomic_write_json(db_path + STATE_SUFFIX, state, indent=None, durable=durable)
+
+
+def _sync_state_locked(db_path: str) -> Dict[str, Any]:
+    """
+    Store state brought up to date with the live log
+    The committed count advances by the records found past `log_bytes`
+    (appended by a writer that died before updating the state); a missing
+    or inconsistent state is rebuilt by counting the hot store once.
+    """
+    state = _read_state(db_path)
+    if state is not None and state['checkpoint'] is not None:
+        _resolve_checkpoint(db_path, state)
+
+    log_path = db_path + LOG_SUFFIX
+    log_size = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+    if state is None or log_size < state['log_bytes']:
+        _, valid_bytes, _ = read_log(log_path)
+        state = {
+            'version': STATE_VERSION,
+            'committed': len(load_claims_locked(db_path)),
+            'log_bytes': valid_bytes,
+            'checkpoint': None
+        }
+        _write_state(db_path, state, durable=True)
+    elif log_size > state['log_bytes']:
+        records, valid_bytes, _ = read_log(log_path, state['log_bytes'])
+        if records:
+            state['committed'] += len(records)
+            state['log_bytes'] = valid_bytes
+            _write_state(db_path, state)
+    return state
+
+
+def committed_count_locked(db_path: str) -> int:
+    """
+    Records ever committed to the store (snapshot rotation and checkpoints
+    do not change it), for callers holding the store lock; commit hooks use
+    it to tell whether they saw every group
+    """
+    return _sync_state_locked(db_path)['committed']
+
+
+def _checkpoint_done(db_path: str, merging_path: str, snapshot_records: int,
+                     state: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether the checkpoint marker says the merging log is already in the snapshot"""
+    if state is None:
+        state = _read_state(db_path)
+    marker = state.get('checkpoint') if state else None
+    if not marker or snapshot_records != marker['snapshot_records'] + marker['records']:
+        return False
+    _, valid_bytes, _ = read_log(merging_path)
+    return _log_digest(merging_path, valid_bytes) == marker['digest']
+
+
+def _resolve_checkpoint(db_path: str, state: Optional[Dict[str, Any]]) -> int:
+    """
+    Finish a checkpoint interrupted by a crash and clear its marker
+    Returns the number of records folded into the snapshot.
+    """
+    merging_path = db_path + MERGING_SUFFIX
+    marker = state.get('checkpoint') if state else None
+    merged = 0
+
+    if os.path.exists(merging_path):
+        records, _, _ = read_log(merging_path)
+        claims = load_snapshot(db_path)
+        if records and not _checkpoint_done(db_path, merging_path, len(claims), state):
+            claims.extend(records)
+            atomic_write_json(db_path, claims)
+            merged = len(records)
+        os.remove(merging_path)
+        _fsync_dir(os.path.dirname(os.path.abspath(db_path)))
+
+    if marker is not None:
+        # The committed count already covers the checkpointed log; whether
+        # or not the crash came before its rename, the live log is counted
+        # from its start again
+        state['checkpoint'] = None
+        _, state['log_bytes'], _ = read_log(db_path + LOG_SUFFIX)
+        _write_state(db_path, state, durable=True)
+    return merged
+
+
+def recover_claims_store(db_path: str = DEFAULT_CLAIMS_PATH) -> Dict[str, Any]:
+    """
+    Validate and repair the store after an unclean shutdown
+    - removes stale temp files (older than TEMP_FILE_GRACE_SECONDS) from
+      interrupted snapshot writes
+    - finishes an interrupted checkpoint
+    - truncates a torn record at the tail of the append log
+
+    Returns:
+        dict describing what was repaired
+    """
+    with file_lock(db_path + LOCK_SUFFIX):
+        return recover_claims_store_locked(db_path)
+
+
+def recover_claims_store_locked(db_path: str) -> Dict[str, Any]:
+    """recover_claims_store() for callers already holding the store lock"""
+    report = {
+        'removed_temp_files': 0,
+        'merged_records': 0,
+        'log_records': 0,
+        'truncated_bytes': 0
+    }
+
+    cutoff = time.time() - TEMP_FILE_GRACE_SECONDS
+    for tmp_path in glob.glob(glob.escape(db_path) + '.*.tmp'):
+        try:
+            if os.path.getmtime(tmp_path) < cutoff:
+                os.remove(tmp_path)
+                report['removed_temp_files'] += 1
+        except FileNotFoundError:
+            pass
+
+    report['merged_records'] = _resolve_checkpoint(db_path, _read_state(db_path))
+
+    log_path = db_path + LOG_SUFFIX
+    records, valid_bytes, total_bytes = read_log(log_path)
+    if valid_bytes < total_bytes:
+        with open(log_path, 'r+b') as f:
+            f.truncate(valid_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        report['truncated_bytes'] = total_bytes - valid_bytes
+    report['log_records'] = len(records)
+    _sync_state_locked(db_path)
+
+    return report
+
+
+def load_claims(db_path: str = DEFAULT_CLAIMS_PATH) -> List[Dict[str, Any]]:
+    """All committed claims: the snapshot plus records still in the log"""
+    with file_lock(db_path + LOCK_SUFFIX):
+        return load_claims_locked(db_path)
+
+
+def load_claims_locked(db_path: str) -> List[Dict[str, Any]]:
+    """load_claims() for callers already holding the store lock"""
+    claims = load_snapshot(db_path)
+    merging_path = db_path + MERGING_SUFFIX
+    if os.path.exists(merging_path) and not _checkpoint_done(db_path, merging_path, len(claims)):
+        claims.extend(read_log(merging_path)[0])
+    claims.extend(read_log(db_path + LOG_SUFFIX)[0])
+    return claims
+
+
+class ClaimsWriter:
+    """
+    Group-commit writer for the claims database, safe across processes
+
+    Results are buffered and appended to `<db>.log.jsonl` with a single
+    write + fsync once `commit_every` records are pending or
+    `commit_interval_ms` has passed since the last commit (checked on
+    append). checkpoint() folds the log into the JSON snapshot with an
+    atomic rename; close() commits and checkpoints by default, or only once
+    the log reaches `checkpoint_log_bytes` (short-lived writers, so single
+    claims do not rewrite the whole snapshot).
+
+    Every commit, checkpoint and recovery holds `<db>.lock`, and the log is
+    reopened per commit, so any number of writer processes can share one
+    store without losing or duplicating records.
+
+    `on_commit` is called with each durably committed group while the lock
+    is still held (e.g. storage.aggregates.AggregatesUpdater).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CLAIMS_PATH, commit_every: int = DEFAULT_COMMIT_EVERY,
+                 commit_interval_ms: float = DEFAULT_COMMIT_INTERVAL_MS, recover: bool = True,
+                 on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 checkpoint_log_bytes: int = 0):
+        self.db_path = db_path
+        self.log_path = db_path + LOG_SUFFIX
+        self.lock_path = db_path + LOCK_SUFFIX
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval_ms / 1000.0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.recovery_report = recover_claims_store(db_path) if recover else None
+        self.on_commit = on_commit
+        self.checkpoint_log_bytes = checkpoint_log_bytes
+
+        self._buffer = []
+        self._pending = []
+        self._last_commit = time.monotonic()
+        self._closed = False
+        self.records_written = 0
+        self.commits = 0
+
+    def append(self, result: Dict[str, Any]):
+        """Queue one result; commits when the group is full or old enough"""
+        line = json.dumps(result, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self._buffer.append(line.encode('utf-8'))
+        self._pending.append(result)
+        if (len(self._buffer) >= self.commit_every or
+                time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def extend(self, results: List[Dict[str, Any]]):
+        for result in results:
+            self.append(result)
+
+    def _commit_locked(self):
+        if not self._buffer:
+            return
+        state = _sync_state_locked(self.db_path)
+        with open(self.log_path, 'ab') as log:
+            log.write(b''.join(self._buffer))
+            log.flush()
+            os.fsync(log.fileno())
+            state['log_bytes'] = log.tell()
+        state['committed'] += len(self._buffer)
+        _write_state(self.db_path, state)
+        self.records_written += len(self._buffer)
+        self.commits += 1
+        self._buffer.clear()
+        committed, self._pending = self._pending, []
+        if self.on_commit is not None:
+            self.on_commit(committed)
+
+    def commit(self):
+        """Durably append all buffered results with one fsync"""
+        self._last_commit = time.monotonic()
+        if not self._buffer:
+            return
+        with file_lock(self.lock_path):
+            self._commit_locked()
+
+    def checkpoint(self, min_log_bytes: int = 0):
+        """Fold the append log into the JSON snapshot (if it holds at least `min_log_bytes`)"""
+        self._last_commit = time.monotonic()
+        with file_lock(self.lock_path):
+            self._commit_locked()
+            if not os.path.exists(self.log_path):
+                return
+            if os.path.getsize(self.log_path) < max(min_log_bytes, 1):
+                if os.path.getsize(self.log_path) == 0:
+                    # Leave no empty log behind once everything is in the snapshot
+                    os.remove(self.log_path)
+                return
+
+            # Mark the checkpoint durably before the log moves, so recovery
+            # knows which log the snapshot may already contain
+            state = _sync_state_locked(self.db_path)
+            records, valid_bytes, _ = read_log(self.log_path)
+            claims = load_snapshot(self.db_path)
+            state['checkpoint'] = {
+                'digest': _log_digest(self.log_path, valid_bytes),
+                'records': len(records),
+                'snapshot_records': len(claims)
+            }
+            state['log_bytes'] = 0
+            _write_state(self.db_path, state, durable=True)
+
+            merging_path = self.db_path + MERGING_SUFFIX
+            os.replace(self.log_path, merging_path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.db_path)))
+            if records:
+                claims.extend(records)
+                atomic_write_json(self.db_path, claims)
+            os.remove(merging_path)
+            _fsync_dir(os.path.dirname(os.path.abspath(self.db_path)))
+
+            state['checkpoint'] = None
+            _write_state(self.db_path, state, durable=True)
+
+    def close(self, checkpoint: bool = True):
+        if self._closed:
+            return
+        if checkpoint:
+            self.checkpoint(self.checkpoint_log_bytes)
+        else:
+            self.commit()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
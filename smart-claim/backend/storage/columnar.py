@@ -0,0 +1,325 @@
+"""
+Columnar Claims Export
+Writes processed claim results as one NumPy array per field for analytics
+
+Layout of an export directory:
+    manifest.json          committed row counts, dtypes and string dictionaries
+    claims/<field>.npy     one array per claim field (row = one claim)
+    flags/<field>.npy      flattened red-flag table (row = one red flag)
+
+Arrays are appended in place (data first, then the .npy header), and the
+manifest is replaced atomically afterwards, so the manifest row counts are
+the commit point: bytes past them are ignored by readers and overwritten
+by the next append. Readers memory-map the .npy files, so histories larger
+than RAM can be scanned column by column.
+
+Results whose (claim_id, timestamp) pair is already exported are skipped,
+so appending the same claims.json again only adds the new results.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Iterable
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.locking import file_lock
+from storage.claims_store import DEFAULT_CLAIMS_PATH, atomic_write_json, load_claims
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(DEFAULT_CLAIMS_PATH), 'claims_columnar')
+
+DECISION_CODES = {'ACCEPTED': 0, 'NEEDS_REVIEW': 1, 'REJECTED': 2}
+UNKNOWN_CODE = -1
+
+# Field name -> dtype; string fields listed in DICTIONARY_FIELDS hold int32 codes
+CLAIM_FIELDS = {
+    'claim_id': 'S32',
+    'timestamp': 'datetime64[us]',
+    'decision': 'i1',
+    'auto_reject': '?',
+    'requires_review': '?',
+    'claim_amount': 'i8',
+    'score_patient': 'i4',
+    'score_faskes': 'i4',
+    'score_ai': 'i4',
+    'score_total': 'i4',
+    'ai_probability': 'f4',
+    'faskes': 'i4',
+    'diagnosis': 'i4',
+    'patient_name': 'i4',
+    'flag_count': 'i2',
+}
+
+FLAG_FIELDS = {
+    'row': 'i8',          # index into the claim arrays
+    'flag_name': 'i4',
+    'type': 'i4',
+    'score': 'i4',        # -1 when the stored score is not numeric
+}
+
+DICTIONARY_FIELDS = {
+    'faskes': 'faskes_name',
+    'diagnosis': 'diagnosis',
+    'patient_name': 'patient_name',
+    'flag_name': 'flag_name',
+    'type': 'type',
+}
+
+# Fixed .npy header size; leaves room for any row count in the shape field
+NPY_HEADER_BYTES = 128
+
+
+def _write_npy_header(f, dtype: np.dtype, length: int):
+    header = repr({
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (length,),
+    })
+    # magic (6) + version (2) + header length (2) + header text + newline
+    body = header.ljust(NPY_HEADER_BYTES - 10 - 1) + '\n'
+    f.seek(0)
+    f.write(np.lib.format.magic(1, 0))
+    f.write(struct.pack('<H', len(body)))
+    f.write(body.encode('latin1'))
+
+
+def _append_npy(path: str, values: np.ndarray, committed_rows: int):
+    """Append to a .npy file, discarding anything past the committed rows"""
+    dtype = values.dtype
+    mode = 'r+b' if os.path.exists(path) else 'w+b'
+    with open(path, mode) as f:
+        if mode == 'w+b':
+            _write_npy_header(f, dtype, 0)
+        f.truncate(NPY_HEADER_BYTES + committed_rows * dtype.itemsize)
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values).tobytes())
+        _write_npy_header(f, dtype, committed_rows + len(values))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _encode(value: Any, dictionary: List[str], index: Dict[str, int]) -> int:
+    if value is None:
+        return UNKNOWN_CODE
+    value = str(value)
+    code = index.get(value)
+    if code is None:
+        code = len(dictionary)
+        dictionary.append(value)
+        index[value] = code
+    return code
+
+
+def _int_or(value: Any, default: int) -> int:
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def _parse_timestamp(value: Any) -> np.datetime64:
+    try:
+        return np.datetime64(datetime.fromisoformat(str(value)).replace(tzinfo=None), 'us')
+    except ValueError:
+        return np.datetime64('NaT', 'us')
+
+
+class ColumnarClaimsExport:
+    """
+    Append-only columnar store of claim results
+
+    append() converts results to columns and appends them; columns()
+    returns memory-mapped arrays trimmed to the committed row count.
+    """
+
+    def __init__(self, root: str = DEFAULT_EXPORT_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.lock_path = os.path.join(root, '.lock')
+        os.makedirs(os.path.join(root, 'claims'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'flags'), exist_ok=True)
+
+    def manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return {
+                'rows': 0,
+                'flag_rows': 0,
+                'claim_fields': CLAIM_FIELDS,
+                'flag_fields': FLAG_FIELDS,
+                'decision_codes': DECISION_CODES,
+                'dictionaries': {name: [] for name in set(DICTIONARY_FIELDS.values())}
+            }
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _exported_keys(self, rows: int, since: np.datetime64) -> set:
+        """(claim_id, timestamp) pairs of committed rows at or after `since` (and undated rows)"""
+        columns = self._load_table('claims', {'claim_id': 'S32', 'timestamp': 'datetime64[us]'}, rows, True)
+        timestamps = np.asarray(columns['timestamp'])
+        mask = np.isnat(timestamps) | (timestamps >= since)
+        ids = np.asarray(columns['claim_id'])[mask]
+        return set(zip(ids.tolist(), timestamps[mask].view('i8').tolist()))
+
+    def append(self, results: Iterable[Dict[str, Any]], skip_exported: bool = True) -> int:
+        """
+        Append claim results (main.py output format)
+
+        Args:
+            results: Claim results
+            skip_exported: Skip results whose (claim_id, timestamp) pair is
+                already in the export (results repeated within this call are kept)
+
+        Returns:
+            Number of claims appended
+        """
+        results = list(results)
+        if not results:
+            return 0
+
+        with file_lock(self.lock_path):
+            manifest = self.manifest()
+            if skip_exported and manifest['rows']:
+                ids = np.array([str(r.get('claim_id', ''))[:32].encode('utf-8') for r in results], dtype='S32')
+                timestamps = np.array([_parse_timestamp(r.get('timestamp')) for r in results], dtype='datetime64[us]')
+                dated = timestamps[~np.isnat(timestamps)]
+                since = dated.min() if len(dated) else np.datetime64('NaT', 'us')
+                exported = self._exported_keys(manifest['rows'], since)
+                keys = zip(ids.tolist(), timestamps.view('i8').tolist())
+                results = [result for result, key in zip(results, keys) if key not in exported]
+                if not results:
+                    return 0
+            dictionaries = manifest['dictionaries']
+            indexes = {name: {v: i for i, v in enumerate(values)} for name, values in dictionaries.items()}
+            rows = manifest['rows']
+
+            claim_columns = {name: [] for name in CLAIM_FIELDS}
+            flag_columns = {name: [] for name in FLAG_FIELDS}
+
+            for offset, result in enumerate(results):
+                scores = result.get('fraud_scores', {})
+                red_flags = result.get('red_flags', [])
+                ai_flag = next((flag for flag in red_flags if 'probability' in flag), {})
+
+                claim_columns['claim_id'].append(str(result.get('claim_id', ''))[:32].encode('utf-8'))
+                claim_columns['timestamp'].append(_parse_timestamp(result.get('timestamp')))
+                claim_columns['decision'].append(DECISION_CODES.get(result.get('decision'), UNKNOWN_CODE))
+                claim_columns['auto_reject'].append(bool(result.get('auto_reject', False)))
+                claim_columns['requires_review'].append(bool(result.get('requires_review', False)))
+                claim_columns['claim_amount'].append(_int_or(result.get('claim_amount'), 0))
+                claim_columns['score_patient'].append(_int_or(scores.get('patient'), 0))
+                claim_columns['score_faskes'].append(_int_or(scores.get('faskes'), 0))
+                claim_columns['score_ai'].append(_int_or(scores.get('ai'), 0))
+                claim_columns['score_total'].append(_int_or(scores.get('total'), 0))
+                claim_columns['ai_probability'].append(float(ai_flag.get('probability', np.nan)))
+                claim_columns['flag_count'].append(len(red_flags))
+                for field in ('faskes', 'diagnosis', 'patient_name'):
+                    name = DICTIONARY_FIELDS[field]
+                    claim_columns[field].append(_encode(result.get(name), dictionaries[name], indexes[name]))
+
+                for flag in red_flags:
+                    flag_columns['row'].append(rows + offset)
+                    flag_columns['flag_name'].append(_encode(flag.get('flag_name'), dictionaries['flag_name'], indexes['flag_name']))
+                    flag_columns['type'].append(_encode(flag.get('type'), dictionaries['type'], indexes['type']))
+                    flag_columns['score'].append(_int_or(flag.get('score'), UNKNOWN_CODE))
+
+            for name, dtype in CLAIM_FIELDS.items():
+                values = np.array(claim_columns[name], dtype=dtype)
+                _append_npy(os.path.join(self.root, 'claims', f'{name}.npy'), values, rows)
+            for name, dtype in FLAG_FIELDS.items():
+                values = np.array(flag_columns[name], dtype=dtype)
+                _append_npy(os.path.join(self.root, 'flags', f'{name}.npy'), values, manifest['flag_rows'])
+
+            # Commit point
+            manifest['rows'] = rows + len(results)
+            manifest['flag_rows'] += len(flag_columns['row'])
+            atomic_write_json(self.manifest_path, manifest, indent=None)
+
+        return len(results)
+
+    def _load_table(self, table: str, fields: Dict[str, str], rows: int, mmap: bool) -> Dict[str, np.ndarray]:
+        columns = {}
+        for name, dtype in fields.items():
+            path = os.path.join(self.root, table, f'{name}.npy')
+            if rows == 0 or not os.path.exists(path):
+                columns[name] = np.empty(0, dtype=dtype)
+                continue
+            array = np.load(path, mmap_mode='r' if mmap else None)
+            columns[name] = array[:rows]
+        return columns
+
+    def columns(self, mmap: bool = True) -> Dict[str, np.ndarray]:
+        """Claim columns (memory-mapped by default)"""
+        manifest = self.manifest()
+        return self._load_table('claims', CLAIM_FIELDS, manifest['rows'], mmap)
+
+    def flags(self, mmap: bool = True) -> Dict[str, np.ndarray]:
+        """Flattened red-flag columns; 'row' indexes the claim columns"""
+        manifest = self.manifest()
+        return self._load_table('flags', FLAG_FIELDS, manifest['flag_rows'], mmap)
+
+    def dictionaries(self) -> Dict[str, List[str]]:
+        return self.manifest()['dictionaries']
+
+    def to_npz(self, path: str, compressed: bool = False):
+        """Write a single .npz with one array per field (flags prefixed 'flag_')"""
+        arrays = {name: np.asarray(values) for name, values in self.columns(mmap=True).items()}
+        arrays.update({f'flag_{name}': np.asarray(values) for name, values in self.flags(mmap=True).items()})
+        for name, values in self.dictionaries().items():
+            arrays[f'dict_{name}'] = np.array(values, dtype=str)
+        (np.savez_compressed if compressed else np.savez)(path, **arrays)
+
+    def to_frame(self):
+        """Decode the claim columns into a pandas DataFrame with categorical strings"""
+        import pandas as pd
+
+        columns = self.columns(mmap=True)
+        dictionaries = self.dictionaries()
+        frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()
+                              if name not in DICTIONARY_FIELDS})
+        frame['claim_id'] = frame['claim_id'].str.decode('utf-8')
+        frame['decision'] = pd.Categorical.from_codes(
+            columns['decision'], categories=sorted(DECISION_CODES, key=DECISION_CODES.get))
+        for field in ('faskes', 'diagnosis', 'patient_name'):
+            frame[DICTIONARY_FIELDS[field]] = pd.Categorical.from_codes(
+                np.asarray(columns[field]), categories=pd.Index(dictionaries[DICTIONARY_FIELDS[field]]))
+        return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar export of processed claims')
+    parser.add_argument('command', choices=['append', 'npz', 'info'])
+    parser.add_argument('--root', default=DEFAULT_EXPORT_DIR, help='Export directory')
+    parser.add_argument('--source', default=DEFAULT_CLAIMS_PATH,
+                        help='claims.json or NDJSON results to append')
+    parser.add_argument('--output', help='Output path for the npz command')
+    parser.add_argument('--compressed', action='store_true')
+    args = parser.parse_args()
+
+    export = ColumnarClaimsExport(args.root)
+
+    if args.command == 'append':
+        if args.source.endswith('.ndjson') or args.source.endswith('.jsonl'):
+            with open(args.source, 'r', encoding='utf-8') as f:
+                results = [json.loads(line) for line in f if line.strip()]
+            results = [r for r in results if 'error' not in r]
+        else:
+            results = load_claims(args.source)
+        count = export.append(results)
+        print(f"✓ Appended {count} claims to {args.root}")
+    elif args.command == 'npz':
+        output = args.output or os.path.join(args.root, 'claims.npz')
+        export.to_npz(output, args.compressed)
+        print(f"✓ Written: {output}")
+    else:
+        manifest = export.manifest()
+        print(f"Claims: {manifest['rows']}")
+        print(f"Red flags: {manifest['flag_rows']}")
+        for name, values in manifest['dictionaries'].items():
+            print(f"  {name}: {len(values)} distinct")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Compact Result Format
+Space-efficient encoding of claim results: red flags and the decision reason
+are stored as template codes plus parameters (e.g. PHONE_DUP{count=4,score=10})
+backed by the interned table in fraud_detection.flag_templates
+
+Compact record:
+    {"v": 1, "id": claim_id, "ts": timestamp, "pn": patient_name,
+     "fn": faskes_name, "dx": diagnosis, "amt": claim_amount,
+     "s": [patient, faskes, ai, total], "d": "A" | "N" | "R",
+     "why": reason code, "fl": [flag codes], "x": {extra keys}}
+
+expand_result() renders the verbose format (main.py output, read by the
+frontend) byte-for-byte: compaction re-renders every record and falls back
+to keeping a record or flag verbatim when it would not round-trip.
+"""
+
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fraud_detection.flag_templates import render_flag, render_reason, match_flag, match_reason
+
+COMPACT_VERSION = 1
+
+RESULT_KEYS = [
+    'claim_id', 'timestamp', 'patient_name', 'faskes_name', 'diagnosis', 'claim_amount',
+    'fraud_scores', 'red_flags', 'decision', 'decision_reason', 'auto_reject', 'requires_review'
+]
+SCORE_KEYS = ['patient', 'faskes', 'ai', 'total']
+DECISION_LETTERS = {'ACCEPTED': 'A', 'NEEDS_REVIEW': 'N', 'REJECTED': 'R'}
+LETTER_DECISIONS = {letter: decision for decision, letter in DECISION_LETTERS.items()}
+
+_DECODER = json.JSONDecoder()
+
+
+def encode_code(code: str, params: Dict[str, Any]) -> str:
+    """CODE or CODE{key=value,...} with JSON-encoded values"""
+    if not params:
+        return code
+    body = ','.join(
+        f"{key}={json.dumps(value, ensure_ascii=False, separators=(',', ':'))}"
+        for key, value in params.items()
+    )
+    return f"{code}{{{body}}}"
+
+
+@lru_cache(maxsize=65536)
+def _parse_code(text: str) -> Tuple[str, Tuple[Tuple[str, Any], ...]]:
+    brace = text.find('{')
+    if brace < 0:
+        return sys.intern(text), ()
+    code = sys.intern(text[:brace])
+    params = []
+    pos = brace + 1
+    while text[pos] != '}':
+        equals = text.index('=', pos)
+        key = text[pos:equals]
+        value, pos = _DECODER.raw_decode(text, equals + 1)
+        params.append((key, value))
+        if text[pos] == ',':
+            pos += 1
+    return code, tuple(params)
+
+
+def parse_code(text: str) -> Tuple[str, Dict[str, Any]]:
+    """Inverse of encode_code()"""
+    code, params = _parse_code(text)
+    return code, dict(params)
+
+
+@lru_cache(maxsize=65536)
+def _compact_flag_items(items: Tuple[Tuple[str, type, Any], ...]) -> Any:
+    flag = {key: value for key, _, value in items}
+    matched = match_flag(flag)
+    if matched is None:
+        return flag
+    return encode_code(*matched)
+
+
+def compact_flag(flag: Any) -> Any:
+    """Encoded flag string, or the flag itself when no template reproduces it"""
+    if not isinstance(flag, dict):
+        return flag
+    try:
+        # Most flags repeat exactly (same code and parameters), so memoize
+        # on the flag contents; booleans are typed apart from ints by the key
+        compacted = _compact_flag_items(tuple((k, type(v), v) for k, v in flag.items()))
+    except TypeError:
+        # Unhashable values (nested lists/dicts)
+        matched = match_flag(flag)
+        return flag if matched is None else encode_code(*matched)
+    return flag if isinstance(compacted, dict) else compacted
+
+
+def expand_flag(item: Any) -> Any:
+    if not isinstance(item, str):
+        return item
+    code, params = parse_code(item)
+    return render_flag(code, **params)
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact one verbose result
+
+    Returns:
+        Compact record; results with a non-standard shape are wrapped as
+        {"v": 1, "raw": result} so nothing is ever lost
+    """
+    raw = {'v': COMPACT_VERSION, 'raw': result}
+    keys = list(result)
+    scores = result.get('fraud_scores')
+    if keys[:len(RESULT_KEYS)] != RESULT_KEYS or not isinstance(scores, dict) or list(scores) != SCORE_KEYS:
+        return raw
+
+    letter = DECISION_LETTERS.get(result['decision'])
+    reason = match_reason(result['decision_reason'])
+    if (letter is None or reason is None or not isinstance(result['red_flags'], list)
+            or result['auto_reject'] is not (reason[0] == 'CRUCIAL')
+            or result['requires_review'] is not (result['decision'] == 'NEEDS_REVIEW')):
+        return raw
+
+    compact = {
+        'v': COMPACT_VERSION,
+        'id': result['claim_id'],
+        'ts': result['timestamp'],
+        'pn': result['patient_name'],
+        'fn': result['faskes_name'],
+        'dx': result['diagnosis'],
+        'amt': result['claim_amount'],
+        's': [scores[key] for key in SCORE_KEYS],
+        'd': letter,
+        'why': encode_code(*reason),
+        'fl': [compact_flag(flag) for flag in result['red_flags']]
+    }
+    extras = {key: result[key] for key in keys[len(RESULT_KEYS):]}
+    if extras:
+        compact['x'] = extras
+    return compact
+
+
+def expand_result(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Render the verbose result format; verbose records pass through unchanged"""
+    if record.get('v') != COMPACT_VERSION:
+        return record
+    if 'raw' in record:
+        return record['raw']
+
+    decision = LETTER_DECISIONS[record['d']]
+    reason_code, reason_params = parse_code(record['why'])
+    result = {
+        'claim_id': record['id'],
+        'timestamp': record['ts'],
+        'patient_name': record['pn'],
+        'faskes_name': record['fn'],
+        'diagnosis': record['dx'],
+        'claim_amount': record['amt'],
+        'fraud_scores': dict(zip(SCORE_KEYS, record['s'])),
+        'red_flags': [expand_flag(item) for item in record['fl']],
+        'decision': decision,
+        'decision_reason': render_reason(reason_code, **reason_params),
+        'auto_reject': reason_code == 'CRUCIAL',
+        'requires_review': decision == 'NEEDS_REVIEW'
+    }
+    result.update(record.get('x', {}))
+    return result
+
+
+def compact_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [compact_result(result) for result in results]
+
+
+def expand_results(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [expand_result(record) for record in records]
@@ -0,0 +1,173 @@
+"""
+Review Feedback Store
+Reviewer outcomes of NEEDS_REVIEW claims joined with the feature vectors the
+model scored, as training data for incremental retraining
+
+Append-only log (`data/review_feedback.jsonl`), one record per line:
+    {"kind": "features", "key": ..., "claim_id": ..., "features": {name: value},
+     "model_version": ..., "ts": ...}
+    {"kind": "label", "key": ..., "claim_id": ..., "label": 0 | 1, "decision": ...,
+     "reviewer": ..., "ts": ...}
+
+Records are joined on "key", the review queue key (claim id + claim
+timestamp, see review_key()), because claim ids alone repeat across runs.
+
+Feature records are written when a NEEDS_REVIEW result is saved (the raw,
+unscaled feature_dict() values, so any scaler can be applied later). Label
+records are written by the review queue's on_complete hook: a REJECTED
+review is fraud (1), an ACCEPTED review is legitimate (0). Appends hold
+`review_feedback.jsonl.lock` and are fsynced; a torn tail from a crashed
+writer is cut off before the next append.
+
+Usage:
+    python storage/feedback_store.py stats
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage.locking import file_lock
+from storage.claims_store import DEFAULT_CLAIMS_PATH, LOCK_SUFFIX, read_log
+
+DEFAULT_FEEDBACK_PATH = os.path.join(os.path.dirname(DEFAULT_CLAIMS_PATH), 'review_feedback.jsonl')
+
+# Review decision -> training label
+REVIEW_LABELS = {'REJECTED': 1, 'ACCEPTED': 0}
+
+
+def review_key(claim_id: Any, timestamp: Any) -> str:
+    """Key of one reviewed result (queue entry and feedback join): claim ids alone may be reused"""
+    return f"{claim_id}|{timestamp or ''}"
+
+
+def _record_key(record: Dict[str, Any]) -> str:
+    # Records written before keys were stored join on the bare claim id
+    return record.get('key') or review_key(record['claim_id'], None)
+
+
+class FeedbackStore:
+    """
+    Feature vectors and reviewer labels of reviewed claims
+
+    Usable as ReviewQueue(on_complete=...): every completed review with a
+    decision becomes a label.
+    """
+
+    def __init__(self, path: str = DEFAULT_FEEDBACK_PATH):
+        self.path = path
+        self.lock_path = path + LOCK_SUFFIX
+
+    def _append(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        data = b''.join(
+            (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            for record in records
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with file_lock(self.lock_path):
+            with open(self.path, 'a+b') as log:
+                size = log.seek(0, os.SEEK_END)
+                if size:
+                    log.seek(size - 1)
+                    if log.read(1) != b'\n':
+                        # Torn tail from a crashed writer: cut back to the last full record
+                        log.seek(0)
+                        log.truncate(log.read().rfind(b'\n') + 1)
+                log.write(data)
+                log.flush()
+                os.fsync(log.fileno())
+
+    def record_features(self, items: Iterable[Tuple[str, Any, Dict[str, Any]]], model_version: Optional[str] = None):
+        """
+        Store the feature vectors of claims sent to review
+
+        Args:
+            items: (claim_id, claim timestamp, feature dict) triples
+            model_version: Version of the model that scored them
+        """
+        ts = time.time()
+        self._append([
+            {'kind': 'features', 'key': review_key(claim_id, timestamp), 'claim_id': claim_id,
+             'features': features, 'model_version': model_version, 'ts': ts}
+            for claim_id, timestamp, features in items
+        ])
+
+    def record_label(self, claim_id: str, decision: str, reviewer: Optional[str] = None,
+                     ts: Optional[float] = None, timestamp: Any = None):
+        """Store a reviewer label for the result with this claim id and claim timestamp"""
+        if decision not in REVIEW_LABELS:
+            raise ValueError(f"decision must be one of {tuple(REVIEW_LABELS)}")
+        self._append([{'kind': 'label', 'key': review_key(claim_id, timestamp), 'claim_id': claim_id,
+                       'label': REVIEW_LABELS[decision], 'decision': decision, 'reviewer': reviewer,
+                       'ts': time.time() if ts is None else ts}])
+
+    def on_review_complete(self, op: Dict[str, Any]):
+        """ReviewQueue hook: turn a 'done' operation into a label (reviews without a decision are skipped)"""
+        if op.get('decision') in REVIEW_LABELS:
+            self.record_label(op['claim_id'], op['decision'], op.get('reviewer'), op.get('ts'),
+                              op.get('timestamp'))
+
+    __call__ = on_review_complete
+
+    def labeled(self) -> List[Dict[str, Any]]:
+        """
+        Labelled samples in label order
+
+        Returns:
+            list of {'ordinal', 'key', 'claim_id', 'features', 'label', 'model_version'};
+            'ordinal' is the position of the label record among all labels,
+            so consumers can remember how far they have trained. Labels of
+            results without a stored feature vector are skipped.
+        """
+        records, _, _ = read_log(self.path)
+        features = {}
+        samples = []
+        ordinal = 0
+        for record in records:
+            if record.get('kind') == 'features':
+                features[_record_key(record)] = record
+            elif record.get('kind') == 'label':
+                key = _record_key(record)
+                vector = features.get(key)
+                if vector is not None:
+                    samples.append({
+                        'ordinal': ordinal,
+                        'key': key,
+                        'claim_id': record['claim_id'],
+                        'features': vector['features'],
+                        'label': record['label'],
+                        'model_version': vector.get('model_version'),
+                    })
+                ordinal += 1
+        return samples
+
+    def stats(self) -> Dict[str, int]:
+        records, _, _ = read_log(self.path)
+        vectors = {_record_key(r) for r in records if r.get('kind') == 'features'}
+        labels = [r for r in records if r.get('kind') == 'label']
+        return {
+            'feature_vectors': len(vectors),
+            'labels': len(labels),
+            'labels_with_features': sum(1 for r in labels if _record_key(r) in vectors),
+            'fraud_labels': sum(r['label'] for r in labels),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reviewer feedback for model retraining')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('--path', default=DEFAULT_FEEDBACK_PATH)
+    args = parser.parse_args()
+
+    print(json.dumps(FeedbackStore(args.path).stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+File Locking Module
+Cross-process exclusive lock used to serialize writers of a shared file
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path: str, poll_interval: float = 0.05):
+    """
+    Hold an exclusive advisory lock on `lock_path` for the duration of the block
+    Uses flock on POSIX and msvcrt byte-range locks on Windows; the lock is
+    released automatically if the holding process dies
+    
+    Args:
+        lock_path: Path of the lock file (created if missing)
+        poll_interval: Sleep between attempts on Windows
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
@@ -0,0 +1,444 @@
+"""
+Partitioned Claims Archive
+Date-partitioned segments for closed periods of the claims database, with
+compaction into compressed read-optimized segments and a retention policy
+
+Layout under the archive root:
+    <key>.jsonl              open segment (append-only, one result per line)
+    <key>.json.gz            compacted segment (sorted by timestamp, results in
+                             the compact format of storage.compact_results)
+    archive/<key>.json.gz    partitions moved out by the retention policy
+
+`<key>` is YYYY-MM-DD (day granularity) or YYYY-MM (month granularity).
+claims.json keeps only the current period; rotate_snapshot() moves older
+results into partitions so the hot file stays bounded. Results without a
+usable timestamp go to the `undated` partition on every rotation.
+
+Readers of the whole history (review queue fill, threshold simulator,
+claims index) use iter_claims(), which walks the partitions and then the
+hot store.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import date, timedelta
+from typing import Dict, Any, List, Iterator, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import CLAIMS_PARTITION_GRANULARITY, CLAIMS_RETENTION_DAYS
+from storage.locking import file_lock
+from storage.claims_store import (
+    DEFAULT_CLAIMS_PATH, LOCK_SUFFIX, atomic_write_json, load_claims, load_claims_locked,
+    load_snapshot, recover_claims_store_locked
+)
+from storage.compact_results import compact_results, expand_results
+
+
+
+def default_archive_root(db_path: str = DEFAULT_CLAIMS_PATH) -> str:
+    """Archive directory of a claims database: claims_archive/ next to it"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'claims_archive')
+
+
+DEFAULT_ARCHIVE_ROOT = default_archive_root()
+
+SEGMENT_SUFFIX = '.jsonl'
+COMPACTING_SUFFIX = '.jsonl.compacting'
+COMPACTED_SUFFIX = '.json.gz'
+ROTATION_JOURNAL = 'rotation.journal'
+UNDATED_KEY = 'undated'
+
+KEY_LENGTHS = {'day': 10, 'month': 7}
+KEY_PATTERN = re.compile(r'^\d{4}-\d{2}(-\d{2})?$')
+
+
+def partition_key(timestamp: Any, granularity: str = CLAIMS_PARTITION_GRANULARITY) -> str:
+    """Partition key of an ISO timestamp ('undated' when missing or malformed)"""
+    if not isinstance(timestamp, str):
+        return UNDATED_KEY
+    key = timestamp[:KEY_LENGTHS[granularity]]
+    return key if KEY_PATTERN.match(key) and len(key) == KEY_LENGTHS[granularity] else UNDATED_KEY
+
+
+def _is_closed(key: str, current_key: str) -> bool:
+    """Whether results of a partition leave claims.json on rotation"""
+    return key == UNDATED_KEY or key < current_key
+
+
+def _in_range(claim: Dict[str, Any], start: Optional[str], end: Optional[str]) -> bool:
+    day = str(claim.get('timestamp', ''))[:10]
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def _period_end(key: str) -> Optional[date]:
+    """Last day covered by a partition key"""
+    if key == UNDATED_KEY:
+        return None
+    if len(key) == 10:
+        return date.fromisoformat(key)
+    year, month = int(key[:4]), int(key[5:7])
+    first_of_next = date(year + month // 12, month % 12 + 1, 1)
+    return first_of_next - timedelta(days=1)
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Valid records of a segment; a torn last line is ignored"""
+    records = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def _read_compacted(path: str) -> Dict[str, Any]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class PartitionedClaimsStore:
+    """
+    Claims archive split into one segment per day or month
+
+    All mutations hold `<root>/.lock`. Readers select partitions by key
+    from the file names, so a date-range query opens only the segments that
+    can contain matching claims.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_ROOT, granularity: str = CLAIMS_PARTITION_GRANULARITY):
+        if granularity not in KEY_LENGTHS:
+            raise ValueError(f"granularity must be one of {sorted(KEY_LENGTHS)}")
+        self.root = root
+        self.granularity = granularity
+        self.archive_dir = os.path.join(root, 'archive')
+        self.lock_path = os.path.join(root, LOCK_SUFFIX)
+        os.makedirs(root, exist_ok=True)
+
+    # ------------------------------------------------------------------ paths
+
+    def _path(self, key: str, suffix: str, archived: bool = False) -> str:
+        return os.path.join(self.archive_dir if archived else self.root, key + suffix)
+
+    def partitions(self, include_archived: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Map of partition key -> {'segments': [...], 'compacted': path|None, 'archived': bool}"""
+        found = {}
+        dirs = [(self.root, False)]
+        if include_archived and os.path.isdir(self.archive_dir):
+            dirs.append((self.archive_dir, True))
+
+        for dir_path, archived in dirs:
+            for name in os.listdir(dir_path):
+                for suffix in (COMPACTED_SUFFIX, COMPACTING_SUFFIX, SEGMENT_SUFFIX):
+                    if name.endswith(suffix):
+                        key = name[:-len(suffix)]
+                        entry = found.setdefault(key, {'segments': [], 'compacted': None, 'archived': archived})
+                        path = os.path.join(dir_path, name)
+                        if suffix == COMPACTED_SUFFIX:
+                            entry['compacted'] = path
+                        else:
+                            entry['segments'].append(path)
+                        break
+        return dict(sorted(found.items()))
+
+    # ----------------------------------------------------------------- writes
+
+    def append(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Append results to the open segment of their partition (one fsync per partition)"""
+        with file_lock(self.lock_path):
+            return self._append_locked(results)
+
+    def _append_locked(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        grouped = {}
+        for result in results:
+            key = partition_key(result.get('timestamp'), self.granularity)
+            line = json.dumps(result, ensure_ascii=False, separators=(',', ':')) + '\n'
+            grouped.setdefault(key, []).append(line.encode('utf-8'))
+
+        for key, lines in grouped.items():
+            with open(self._path(key, SEGMENT_SUFFIX), 'ab') as f:
+                f.write(b''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+        return {key: len(lines) for key, lines in grouped.items()}
+
+    def _compact_key(self, key: str):
+        """Merge the open segment of one partition into its compacted file"""
+        segment = self._path(key, SEGMENT_SUFFIX)
+        compacting = self._path(key, COMPACTING_SUFFIX)
+        compacted = self._path(key, COMPACTED_SUFFIX)
+
+        if os.path.exists(segment) and not os.path.exists(compacting):
+            os.replace(segment, compacting)
+        if not os.path.exists(compacting):
+            return
+
+        digest = _sha256_file(compacting)
+        existing = _read_compacted(compacted) if os.path.exists(compacted) else None
+        if existing is not None and existing.get('merged_digest') == digest:
+            # Crash after the compacted file was replaced: already merged
+            os.remove(compacting)
+            return
+
+        claims = expand_results((existing or {}).get('claims', [])) + _read_jsonl(compacting)
+        claims.sort(key=lambda claim: str(claim.get('timestamp', '')))
+        payload = {
+            'partition': key,
+            'count': len(claims),
+            'min_timestamp': claims[0].get('timestamp') if claims else None,
+            'max_timestamp': claims[-1].get('timestamp') if claims else None,
+            'merged_digest': digest,
+            'claims': compact_results(claims)
+        }
+
+        tmp_path = compacted + f".{os.getpid()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, compacted)
+        os.remove(compacting)
+
+    def compact(self, today: Optional[date] = None) -> List[str]:
+        """
+        Compact every closed partition (period ended before today)
+
+        Returns:
+            List of compacted partition keys
+        """
+        today = today or date.today()
+        done = []
+        with file_lock(self.lock_path):
+            for key, entry in self.partitions().items():
+                if not entry['segments']:
+                    continue
+                end = _period_end(key)
+                if end is not None and end >= today:
+                    continue
+                self._compact_key(key)
+                done.append(key)
+        return done
+
+    def apply_retention(self, retention_days: int = CLAIMS_RETENTION_DAYS, delete: bool = False,
+                        today: Optional[date] = None) -> List[str]:
+        """
+        Move compacted partitions older than the retention window to
+        `archive/` (or delete them)
+
+        Returns:
+            List of partition keys archived or deleted
+        """
+        cutoff = (today or date.today()) - timedelta(days=retention_days)
+        moved = []
+        with file_lock(self.lock_path):
+            for key, entry in self.partitions().items():
+                end = _period_end(key)
+                if end is None or end >= cutoff or entry['segments'] or not entry['compacted']:
+                    continue
+                if delete:
+                    os.remove(entry['compacted'])
+                else:
+                    os.makedirs(self.archive_dir, exist_ok=True)
+                    shutil.move(entry['compacted'], self._path(key, COMPACTED_SUFFIX, archived=True))
+                moved.append(key)
+        return moved
+
+    def rotate_snapshot(self, db_path: str = DEFAULT_CLAIMS_PATH, today: Optional[date] = None) -> int:
+        """
+        Move results of closed periods out of claims.json into partitions
+
+        A journal records each segment's size before the append. If the
+        process dies before claims.json is rewritten, recover() truncates
+        the segments back, so a rerun never duplicates records.
+
+        Returns:
+            Number of results moved
+        """
+        current_key = partition_key((today or date.today()).isoformat(), self.granularity)
+        journal_path = os.path.join(self.root, ROTATION_JOURNAL)
+
+        with file_lock(db_path + LOCK_SUFFIX), file_lock(self.lock_path):
+            # Finish any interrupted checkpoint before the snapshot shrinks
+            recover_claims_store_locked(db_path)
+            self._recover_locked(db_path)
+            claims = load_snapshot(db_path)
+            closed, hot = [], []
+            for claim in claims:
+                key = partition_key(claim.get('timestamp'), self.granularity)
+                (closed if _is_closed(key, current_key) else hot).append(claim)
+            if not closed:
+                return 0
+
+            keys = {partition_key(c.get('timestamp'), self.granularity) for c in closed}
+            offsets = {}
+            for key in keys:
+                segment = self._path(key, SEGMENT_SUFFIX)
+                offsets[key] = os.path.getsize(segment) if os.path.exists(segment) else 0
+            atomic_write_json(journal_path, {'current_key': current_key, 'offsets': offsets})
+
+            self._append_locked(closed)
+            atomic_write_json(db_path, hot)
+            os.remove(journal_path)
+        return len(closed)
+
+    # --------------------------------------------------------------- recovery
+
+    def _recover_locked(self, db_path: str):
+        journal_path = os.path.join(self.root, ROTATION_JOURNAL)
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+            snapshot = load_snapshot(db_path)
+            rewritten = not any(
+                _is_closed(partition_key(c.get('timestamp'), self.granularity), journal['current_key'])
+                for c in snapshot
+            )
+            if not rewritten:
+                # Snapshot still holds the closed records: undo the appends
+                for key, size in journal['offsets'].items():
+                    segment = self._path(key, SEGMENT_SUFFIX)
+                    if size == 0 and os.path.exists(segment):
+                        os.remove(segment)
+                    elif os.path.exists(segment):
+                        with open(segment, 'r+b') as f:
+                            f.truncate(size)
+            os.remove(journal_path)
+
+        # Finish interrupted compactions
+        for key, entry in self.partitions().items():
+            if any(path.endswith(COMPACTING_SUFFIX) for path in entry['segments']):
+                self._compact_key(key)
+
+    def recover(self, db_path: str = DEFAULT_CLAIMS_PATH):
+        """Repair an interrupted rotation or compaction"""
+        with file_lock(db_path + LOCK_SUFFIX), file_lock(self.lock_path):
+            self._recover_locked(db_path)
+
+    # ------------------------------------------------------------------ reads
+
+    def _key_in_range(self, key: str, start: Optional[str], end: Optional[str]) -> bool:
+        if key == UNDATED_KEY:
+            return start is None and end is None
+        if start is not None and key < start[:len(key)]:
+            return False
+        if end is not None and key > end[:len(key)]:
+            return False
+        return True
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             include_archived: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Yield archived results with start <= claim date <= end (YYYY-MM-DD,
+        inclusive); only partitions overlapping the range are opened
+        """
+        for key, entry in self.partitions(include_archived).items():
+            if not self._key_in_range(key, start, end):
+                continue
+            for record in self._read_entry(entry):
+                if _in_range(record, start, end):
+                    yield record
+
+    def read_partition(self, key: str, include_archived: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield all results of one partition (none when it does not exist)"""
+        entry = self.partitions(include_archived).get(key)
+        if entry is not None:
+            yield from self._read_entry(entry)
+
+    def _read_entry(self, entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        paths = ([entry['compacted']] if entry['compacted'] else []) + sorted(entry['segments'])
+        for path in paths:
+            if path.endswith(COMPACTED_SUFFIX):
+                yield from expand_results(_read_compacted(path)['claims'])
+            else:
+                yield from _read_jsonl(path)
+
+    def stats(self, include_archived: bool = True) -> Dict[str, Any]:
+        """Partition listing with sizes on disk"""
+        listing = {}
+        for key, entry in self.partitions(include_archived).items():
+            paths = ([entry['compacted']] if entry['compacted'] else []) + entry['segments']
+            listing[key] = {
+                'compacted': entry['compacted'] is not None,
+                'open_segments': len(entry['segments']),
+                'archived': entry['archived'],
+                'bytes': sum(os.path.getsize(path) for path in paths)
+            }
+        return listing
+
+
+def iter_claims(start: Optional[str] = None, end: Optional[str] = None,
+                store: PartitionedClaimsStore = None, db_path: str = DEFAULT_CLAIMS_PATH,
+                include_archived: bool = True, locked: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Claims of the whole store, optionally limited to a date range: the
+    archive partitions in key order, then the hot claims.json (snapshot +
+    log). Without `store`, the archive next to `db_path` is read if it
+    exists. locked=True when the caller already holds the store lock.
+    """
+    if store is None and os.path.isdir(default_archive_root(db_path)):
+        store = PartitionedClaimsStore(default_archive_root(db_path))
+    if store is not None:
+        yield from store.read(start, end, include_archived)
+    for claim in load_claims_locked(db_path) if locked else load_claims(db_path):
+        if _in_range(claim, start, end):
+            yield claim
+
+
+def read_claims_range(start: Optional[str] = None, end: Optional[str] = None,
+                      store: PartitionedClaimsStore = None, db_path: str = DEFAULT_CLAIMS_PATH,
+                      include_archived: bool = False) -> List[Dict[str, Any]]:
+    """Claims in a date range from the archive partitions plus the hot claims.json"""
+    return list(iter_claims(start, end, store or PartitionedClaimsStore(), db_path, include_archived))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Partitioned claims archive maintenance')
+    parser.add_argument('command', choices=['rotate', 'compact', 'retain', 'read', 'stats'])
+    parser.add_argument('--root', default=DEFAULT_ARCHIVE_ROOT, help='Archive directory')
+    parser.add_argument('--granularity', choices=sorted(KEY_LENGTHS), default=CLAIMS_PARTITION_GRANULARITY)
+    parser.add_argument('--retention-days', type=int, default=CLAIMS_RETENTION_DAYS)
+    parser.add_argument('--delete', action='store_true', help='Delete instead of archiving old partitions')
+    parser.add_argument('--from', dest='start', help='Start date YYYY-MM-DD (read)')
+    parser.add_argument('--to', dest='end', help='End date YYYY-MM-DD (read)')
+    args = parser.parse_args()
+
+    store = PartitionedClaimsStore(args.root, args.granularity)
+    store.recover()
+
+    if args.command == 'rotate':
+        moved = store.rotate_snapshot()
+        compacted = store.compact()
+        print(f"✓ Moved {moved} results out of claims.json, compacted {len(compacted)} partitions")
+    elif args.command == 'compact':
+        print(f"✓ Compacted: {', '.join(store.compact()) or 'nothing to do'}")
+    elif args.command == 'retain':
+        moved = store.apply_retention(args.retention_days, args.delete)
+        action = 'Deleted' if args.delete else 'Archived'
+        print(f"✓ {action}: {', '.join(moved) or 'nothing to do'}")
+    elif args.command == 'read':
+        for claim in read_claims_range(args.start, args.end, store):
+            print(json.dumps(claim, ensure_ascii=False, separators=(',', ':')))
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
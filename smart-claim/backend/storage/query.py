@@ -0,0 +1,503 @@
+"""
+Claims Query Module
+Indexed, paginated queries over the claims store (archive partitions,
+snapshot and append log)
+
+The index is persisted next to the store and maintained by the
+ClaimsIndexUpdater commit hook, so it never needs the whole store in memory:
+    <db>.index.jsonl   one row per committed claim, in commit order:
+                       [claim_id, timestamp, decision, faskes_name, total score]
+    <db>.index.json    {"version", "generation", "committed", "rows", "bytes"}
+
+Rows never move: rotating claims into the archive only changes where the
+full claim is read from. ClaimsIndex loads the rows into secondary indexes:
+    decision      decision -> row numbers
+    faskes        faskes name -> row numbers (faskes ids resolve to names
+                  through the faskes registry; results carry only the name)
+    date          (claim date, row) pairs sorted by date
+    total score   (total score, row) pairs sorted by score
+    claim_id      claim id -> row number
+
+Pages are ordered by row (commit order) and a cursor is the last row of
+the previous page plus its claim id. Only the claims of a page are
+fetched: from the archive partitions of their dates through
+PartitionedClaimsStore, then from the hot store at byte locations that are
+rescanned only when the snapshot or log changes. refresh() reads only rows
+appended since the last call. The index is rebuilt from the whole history
+(new "generation") when it is missing or lags the store, e.g. after
+writes made without the hook.
+
+Usage:
+    python storage/query.py --decision NEEDS_REVIEW --faskes "RSUD Cengkareng" --limit 20
+    python storage/query.py --decision NEEDS_REVIEW --cursor <next_cursor>
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import FASKES_DB_PATH
+from storage.locking import file_lock
+from storage.claims_store import (
+    DEFAULT_CLAIMS_PATH, LOCK_SUFFIX, LOG_SUFFIX, MERGING_SUFFIX, atomic_write_json, committed_count_locked,
+    load_claims_locked
+)
+from storage.partitions import PartitionedClaimsStore, default_archive_root, iter_claims, partition_key
+from utils.paths import resolve_config_path
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+INDEX_SUFFIX = '.index.jsonl'
+INDEX_META_SUFFIX = '.index.json'
+INDEX_VERSION = 1
+
+# Fields of an index row
+CLAIM_ID, TIMESTAMP, DECISION, FASKES, SCORE = range(5)
+
+
+def _claim_date(timestamp: Any) -> str:
+    return str(timestamp if timestamp is not None else '')[:10]
+
+
+def _total_score(claim: Dict[str, Any]) -> Optional[float]:
+    score = claim.get('fraud_scores', {}).get('total')
+    return score if isinstance(score, (int, float)) and not isinstance(score, bool) and score == score else None
+
+
+def _index_line(claim: Dict[str, Any]) -> bytes:
+    row = [claim.get('claim_id'), claim.get('timestamp'), claim.get('decision'),
+           claim.get('faskes_name'), _total_score(claim)]
+    return (json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def encode_cursor(row: int, claim_id: Any) -> str:
+    payload = json.dumps([row, claim_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row, claim_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return int(row), claim_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def load_faskes_names(faskes_db_path: str = FASKES_DB_PATH) -> Dict[str, str]:
+    """Faskes id -> name from the registry (empty if the registry is missing)"""
+    faskes_db_path = resolve_config_path(faskes_db_path)
+    if not os.path.exists(faskes_db_path):
+        return {}
+    with open(faskes_db_path, 'r', encoding='utf-8') as f:
+        return {faskes['id']: faskes.get('name') for faskes in json.load(f) if 'id' in faskes}
+
+
+def _read_index_meta(db_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(db_path + INDEX_META_SUFFIX, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and meta.get('version') == INDEX_VERSION else None
+
+
+def _rebuild_index_locked(db_path: str, committed: int, generation: int) -> Dict[str, Any]:
+    path = db_path + INDEX_SUFFIX
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    rows = 0
+    with open(tmp_path, 'wb') as f:
+        for claim in iter_claims(db_path=db_path, locked=True):
+            f.write(_index_line(claim))
+            rows += 1
+        size = f.tell()
+    os.replace(tmp_path, path)
+    meta = {'version': INDEX_VERSION, 'generation': generation, 'committed': committed, 'rows': rows, 'bytes': size}
+    atomic_write_json(db_path + INDEX_META_SUFFIX, meta, indent=None, durable=False)
+    return meta
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _snapshot_locations(path: str) -> Dict[Tuple, List[Tuple[int, int]]]:
+    """(claim_id, timestamp) -> [(byte offset, length)] of every claim in a JSON array snapshot"""
+    locations = defaultdict(list)
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    decoder = json.JSONDecoder()
+    position = text.find('[') + 1
+    byte_offset = len(text[:position].encode('utf-8'))
+    while True:
+        start = position
+        while text[start] in ' \t\r\n,':
+            start += 1
+        if text[start] == ']':
+            break
+        claim, end = decoder.raw_decode(text, start)
+        byte_offset += len(text[position:start].encode('utf-8'))
+        length = len(text[start:end].encode('utf-8'))
+        locations[(claim.get('claim_id'), claim.get('timestamp'))].append((byte_offset, length))
+        byte_offset += length
+        position = end
+    return locations
+
+
+def _log_locations(path: str, offset: int, locations: Dict[Tuple, List[Tuple[int, int]]]) -> int:
+    """Add the (byte offset, length) of each valid log record from `offset`; returns the new valid end"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        try:
+            claim = json.loads(line)
+        except ValueError:
+            break
+        if not isinstance(claim, dict):
+            break
+        locations[(claim.get('claim_id'), claim.get('timestamp'))].append((offset, len(line)))
+        offset += len(line)
+    return offset
+
+
+def sync_index_locked(db_path: str, group: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Bring the persisted index up to date (caller holds the store lock)
+    With `group`, the claims just committed, an index that was current
+    before the commit only appends their rows; anything else rebuilds it.
+
+    Returns:
+        Index metadata
+    """
+    committed = committed_count_locked(db_path)
+    meta = _read_index_meta(db_path)
+    path = db_path + INDEX_SUFFIX
+    size = os.path.getsize(path) if os.path.exists(path) else -1
+    if meta is not None and size >= meta['bytes']:
+        if meta['committed'] == committed:
+            return meta
+        if group and meta['committed'] == committed - len(group):
+            with open(path, 'r+b') as f:
+                # Rows past the metadata come from a writer that died mid-update
+                f.truncate(meta['bytes'])
+                f.seek(meta['bytes'])
+                f.write(b''.join(_index_line(claim) for claim in group))
+                meta['bytes'] = f.tell()
+            meta['committed'] = committed
+            meta['rows'] += len(group)
+            atomic_write_json(db_path + INDEX_META_SUFFIX, meta, indent=None, durable=False)
+            return meta
+    generation = meta['generation'] + 1 if meta is not None else 1
+    return _rebuild_index_locked(db_path, committed, generation)
+
+
+class ClaimsIndexUpdater:
+    """
+    Commit hook for ClaimsWriter(on_commit=...): appends the index rows of
+    every committed group while the store lock is held
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CLAIMS_PATH):
+        self.db_path = db_path
+
+    def apply(self, results: List[Dict[str, Any]]):
+        sync_index_locked(self.db_path, results)
+
+    __call__ = apply
+
+
+class ClaimsIndex:
+    """
+    Secondary indexes over the persisted claim index rows
+
+    query() picks the most selective filter from the indexes, walks its
+    rows in order from the cursor and checks the remaining filters on the
+    index rows, so a page costs roughly O(log n + page size / selectivity)
+    plus reading the partitions that hold the page's claims.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CLAIMS_PATH, faskes_names: Optional[Dict[str, str]] = None):
+        self.db_path = db_path
+        self.path = db_path + INDEX_SUFFIX
+        self.faskes_names = load_faskes_names() if faskes_names is None else faskes_names
+        # Byte locations of the hot store's claims, rescanned only when its files change
+        self._snapshot = (None, {})      # (stamp, locations)
+        self._log = (None, 0, {})        # (inode, valid bytes, locations)
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self.rows = []
+        self.by_decision = defaultdict(list)
+        self.by_faskes = defaultdict(list)
+        self.by_claim_id = {}
+        self.dates = []   # sorted (date, row)
+        self.scores = []  # sorted (total score, row); rows without a numeric score are not indexed
+        self._generation = None
+        self._bytes = 0
+
+    def _add_postings(self, row: int, entry: Tuple):
+        self.rows.append(entry)
+        # Rows arrive in increasing order, so posting lists stay sorted
+        self.by_decision[entry[DECISION]].append(row)
+        self.by_faskes[entry[FASKES]].append(row)
+        self.by_claim_id[entry[CLAIM_ID]] = row
+
+    def _add(self, row: int, entry: Tuple):
+        self._add_postings(row, entry)
+        insort(self.dates, (_claim_date(entry[TIMESTAMP]), row))
+        if entry[SCORE] is not None:
+            insort(self.scores, (entry[SCORE], row))
+
+    def refresh(self) -> int:
+        """
+        Index claims committed since the last refresh
+
+        Returns:
+            Number of newly indexed claims
+        """
+        with file_lock(self.db_path + LOCK_SUFFIX):
+            meta = sync_index_locked(self.db_path)
+            if meta['generation'] != self._generation:
+                self._reset()
+                self._generation = meta['generation']
+            with open(self.path, 'rb') as f:
+                f.seek(self._bytes)
+                data = f.read(meta['bytes'] - self._bytes)
+        self._bytes = meta['bytes']
+
+        entries = [tuple(json.loads(line)) for line in data.splitlines()]
+        known = len(self.rows)
+        if known == 0 and len(entries) > 1:
+            # Bulk build: sort once instead of inserting row by row
+            for row, entry in enumerate(entries):
+                self._add_postings(row, entry)
+            self.dates = sorted((_claim_date(e[TIMESTAMP]), row) for row, e in enumerate(entries))
+            self.scores = sorted((e[SCORE], row) for row, e in enumerate(entries) if e[SCORE] is not None)
+            return len(entries)
+        for offset, entry in enumerate(entries):
+            self._add(known + offset, entry)
+        return len(entries)
+
+    def fetch(self, rows: List[int]) -> List[Dict[str, Any]]:
+        """
+        Full claims of index rows: the archive partitions their dates fall
+        in, then the hot store. Claims deleted by the retention policy are
+        left out.
+        """
+        wanted = {}
+        for row in rows:
+            entry = self.rows[row]
+            wanted.setdefault((entry[CLAIM_ID], entry[TIMESTAMP]), []).append(row)
+        found = {}
+
+        def take(claim: Dict[str, Any]):
+            pending = wanted.get((claim.get('claim_id'), claim.get('timestamp')))
+            if pending:
+                found[pending.pop(0)] = claim
+
+        root = default_archive_root(self.db_path)
+        if os.path.isdir(root):
+            store = PartitionedClaimsStore(root)
+            existing = store.partitions(include_archived=True)
+            keys = {partition_key(self.rows[row][TIMESTAMP], granularity)
+                    for row in rows for granularity in ('day', 'month')}
+            for key in sorted(keys & set(existing)):
+                for claim in store.read_partition(key):
+                    take(claim)
+        if len(found) < len(rows):
+            with file_lock(self.db_path + LOCK_SUFFIX):
+                self._fetch_hot_locked(wanted, take)
+        return [found[row] for row in rows if row in found]
+
+    def _fetch_hot_locked(self, wanted: Dict[Tuple, List[int]], take):
+        """Read only the wanted claims from the snapshot and log, at their indexed byte locations"""
+        if os.path.exists(self.db_path + MERGING_SUFFIX):
+            # A checkpoint was interrupted; load_claims resolves which copy is committed
+            for claim in load_claims_locked(self.db_path):
+                take(claim)
+            return
+        sources = []
+        stamp = _file_stamp(self.db_path)
+        if stamp is not None:
+            if self._snapshot[0] != stamp:
+                self._snapshot = (stamp, _snapshot_locations(self.db_path))
+            sources.append((self.db_path, self._snapshot[1]))
+        log_path = self.db_path + LOG_SUFFIX
+        log_stamp = _file_stamp(log_path)
+        if log_stamp is not None:
+            inode, valid, locations = self._log
+            if inode != log_stamp[2] or log_stamp[1] < valid:
+                inode, valid, locations = log_stamp[2], 0, defaultdict(list)
+            self._log = (inode, _log_locations(log_path, valid, locations), locations)
+            sources.append((log_path, locations))
+
+        for path, locations in sources:
+            keys = [key for key, pending in wanted.items() if pending and key in locations]
+            if not keys:
+                continue
+            with open(path, 'rb') as f:
+                for key in keys:
+                    for offset, length in locations[key]:
+                        f.seek(offset)
+                        take(json.loads(f.read(length)))
+
+    def get(self, claim_id: str) -> Optional[Dict[str, Any]]:
+        row = self.by_claim_id.get(claim_id)
+        if row is None:
+            return None
+        claims = self.fetch([row])
+        return claims[0] if claims else None
+
+    def _resolve_faskes(self, faskes: str) -> str:
+        """Accept a faskes id or name"""
+        return self.faskes_names.get(faskes, faskes)
+
+    def _candidates(self, decision: Optional[str], faskes: Optional[str], date_from: Optional[str],
+                    date_to: Optional[str], min_score: Optional[float],
+                    max_score: Optional[float]) -> List[int]:
+        """Sorted rows of the most selective indexed filter"""
+        options = []
+        if decision is not None:
+            options.append(self.by_decision.get(decision, []))
+        if faskes is not None:
+            options.append(self.by_faskes.get(faskes, []))
+        if date_from is not None or date_to is not None:
+            lo = bisect_left(self.dates, (date_from,)) if date_from is not None else 0
+            hi = bisect_right(self.dates, (date_to, float('inf'))) if date_to is not None else len(self.dates)
+            options.append((lo, hi, self.dates))
+        if min_score is not None or max_score is not None:
+            lo = bisect_left(self.scores, (min_score,)) if min_score is not None else 0
+            hi = bisect_right(self.scores, (max_score, float('inf'))) if max_score is not None else len(self.scores)
+            options.append((lo, hi, self.scores))
+        if not options:
+            return range(len(self.rows))
+
+        def size(option):
+            return option[1] - option[0] if isinstance(option, tuple) else len(option)
+
+        best = min(options, key=size)
+        if isinstance(best, tuple):
+            lo, hi, entries = best
+            return sorted(row for _, row in entries[lo:max(lo, hi)])
+        return best
+
+    def query(self, decision: Optional[str] = None, faskes: Optional[str] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None,
+              min_score: Optional[float] = None, max_score: Optional[float] = None,
+              limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+              newest_first: bool = False) -> Dict[str, Any]:
+        """
+        One page of claims matching all given filters
+
+        Args:
+            decision: ACCEPTED / NEEDS_REVIEW / REJECTED
+            faskes: Faskes name or registry id
+            date_from, date_to: Claim date range, YYYY-MM-DD inclusive
+            min_score, max_score: Total score range, inclusive
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page
+            newest_first: Walk rows from the most recently committed claim
+
+        Returns:
+            {'claims': [...], 'next_cursor': str or None}
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if faskes is not None:
+            faskes = self._resolve_faskes(faskes)
+        rows = self._candidates(decision, faskes, date_from, date_to, min_score, max_score)
+
+        if newest_first:
+            start = len(rows) - 1
+            step = -1
+        else:
+            start = 0
+            step = 1
+        if cursor is not None:
+            last_row, claim_id = decode_cursor(cursor)
+            if last_row >= len(self.rows) or self.rows[last_row][CLAIM_ID] != claim_id:
+                raise ValueError("Stale cursor: the claims index was rebuilt, restart from the first page")
+            start = bisect_left(rows, last_row) - 1 if newest_first else bisect_right(rows, last_row)
+
+        page = []
+        position = start
+        while 0 <= position < len(rows) and len(page) <= limit:
+            row = rows[position]
+            entry = self.rows[row]
+            position += step
+            if decision is not None and entry[DECISION] != decision:
+                continue
+            if faskes is not None and entry[FASKES] != faskes:
+                continue
+            day = _claim_date(entry[TIMESTAMP])
+            if (date_from is not None and day < date_from) or (date_to is not None and day > date_to):
+                continue
+            score = entry[SCORE]
+            if (min_score is not None and not (score is not None and score >= min_score)) or \
+                    (max_score is not None and not (score is not None and score <= max_score)):
+                continue
+            page.append(row)
+
+        # One extra match was fetched to know whether another page exists
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1], self.rows[page[-1]][CLAIM_ID])
+
+        return {'claims': self.fetch(page), 'next_cursor': next_cursor}
+
+    def counts(self) -> Dict[str, Any]:
+        return {
+            'claims': len(self.rows),
+            'decisions': {decision: len(rows) for decision, rows in self.by_decision.items()},
+            'faskes': len(self.by_faskes)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query processed claims')
+    parser.add_argument('--db', default=DEFAULT_CLAIMS_PATH, help='Claims database')
+    parser.add_argument('--decision', choices=['ACCEPTED', 'NEEDS_REVIEW', 'REJECTED'])
+    parser.add_argument('--faskes', help='Faskes name or id')
+    parser.add_argument('--from', dest='date_from', help='YYYY-MM-DD (inclusive)')
+    parser.add_argument('--to', dest='date_to', help='YYYY-MM-DD (inclusive)')
+    parser.add_argument('--min-score', type=float)
+    parser.add_argument('--max-score', type=float)
+    parser.add_argument('--limit', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--cursor', help='next_cursor from the previous page')
+    parser.add_argument('--newest-first', action='store_true')
+    parser.add_argument('--id', dest='claim_id', help='Fetch a single claim by id')
+    args = parser.parse_args()
+
+    index = ClaimsIndex(args.db)
+    if args.claim_id:
+        claim = index.get(args.claim_id)
+        print(json.dumps({'claim': claim}, indent=2, ensure_ascii=False))
+        sys.exit(0 if claim else 1)
+
+    try:
+        page = index.query(args.decision, args.faskes, args.date_from, args.date_to,
+                           args.min_score, args.max_score, args.limit, args.cursor, args.newest_first)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(page, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
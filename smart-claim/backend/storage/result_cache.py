@@ -0,0 +1,137 @@
+"""
+Result Cache Module
+Content-hash cache that skips re-scoring identical claim submissions
+"""
+
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from ml_model.model_inference import model_version
+
+# Claim fields that influence the decision; envelope fields such as the
+# submission timestamp are ignored so a resubmission hits the cache
+FINGERPRINT_FIELDS = ('claim_id', 'patient', 'faskes', 'medical_data')
+
+# Config values that change scoring; part of every cache key
+SCORING_CONFIG_KEYS = (
+    'SCORE_THRESHOLD_AUTO_ACCEPT', 'SCORE_THRESHOLD_AUTO_REJECT', 'RED_FLAG_SCORES',
+    'NIK_LENGTH', 'JKN_CARD_LENGTH', 'DUPLICATE_PHONE_THRESHOLD',
+    'DUPLICATE_ADDRESS_THRESHOLD', 'FASKES_FRAUD_HISTORY_SCORE', 'AI_EXPLANATION_TOP_FEATURES'
+)
+
+
+def _canonical(value: Any) -> bytes:
+    """Stable JSON encoding (sorted keys, no whitespace)"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def scoring_fingerprint() -> str:
+    """Hash of the model version plus scoring thresholds from config"""
+    settings = {name: getattr(config, name) for name in SCORING_CONFIG_KEYS}
+    digest = hashlib.sha256(model_version().encode('ascii'))
+    digest.update(_canonical(settings))
+    return digest.hexdigest()[:16]
+
+
+def claim_fingerprint(claim_data: Dict[str, Any]) -> str:
+    """Canonical hash of the scoring-relevant claim payload"""
+    payload = {field: claim_data.get(field) for field in FINGERPRINT_FIELDS}
+    return hashlib.sha256(_canonical(payload)).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of claim results keyed by payload hash + scoring fingerprint
+    
+    Memory tier: LRU of compact JSON strings bounded by max_entries.
+    Disk tier (optional): one JSON file per key under disk_dir, written via
+    temp file + rename so concurrent readers never see a partial entry.
+    
+    Reference databases (patient history, faskes registry) are not part of
+    the key; clear the disk tier after bulk changes to those files.
+    """
+    
+    def __init__(self, max_entries: int = 10000, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.namespace = scoring_fingerprint()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+    
+    def key_for(self, claim_data: Dict[str, Any]) -> str:
+        """Cache key for a claim under the current model and config"""
+        return f"{self.namespace}-{claim_fingerprint(claim_data)}"
+    
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+    
+    def _remember(self, key: str, encoded: str):
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss"""
+        encoded = self._entries.get(key)
+        if encoded is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(encoded)
+        
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    encoded = f.read()
+                result = json.loads(encoded)
+            except (OSError, ValueError):
+                result = None
+            if result is not None:
+                self._remember(key, encoded)
+                self.hits += 1
+                self.disk_hits += 1
+                return result
+        
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result in memory and, if configured, on disk"""
+        encoded = json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+        self._remember(key, encoded)
+        
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(encoded)
+            os.replace(tmp_path, path)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'evictions': self.evictions,
+            'namespace': self.namespace
+        }
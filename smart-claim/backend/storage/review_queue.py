@@ -0,0 +1,441 @@
+"""
+Review Queue Module
+Persistent priority queue of NEEDS_REVIEW claims, ordered by expected loss
+
+expected_loss = total_score / 100 * claim_amount, so high-value,
+high-score claims are reviewed first.
+
+Persistence follows the claims store: an append-only operation log
+(`review_queue.json.log.jsonl`) on top of an atomically replaced snapshot
+(`review_queue.json`). Every operation holds `review_queue.json.lock`,
+first replays operations appended by other processes, then appends its own
+with one fsync. Operations are idempotent, so replaying a log over a
+snapshot that already contains it (crash during compaction) is harmless.
+
+In memory the queue is a binary heap with lazy deletion, so push and
+lease are O(log n). A lease hands a claim to one reviewer until
+`lease_seconds` pass; expired leases are requeued on the next lease call.
+
+Entries are keyed by claim_id + timestamp, so a later claim that reuses a
+claim id is queued again. Completed keys are kept for REVIEW_RETENTION_DAYS
+(by claim date) and pruned on compaction; results older than that window
+are not enqueued.
+
+Usage:
+    python storage/review_queue.py fill                 # enqueue NEEDS_REVIEW from claims.json
+    python storage/review_queue.py lease --reviewer budi
+    python storage/review_queue.py complete CLM-... --token <token> --decision REJECTED
+        (the decision is also recorded as a training label in the feedback store)
+    python storage/review_queue.py list --limit 20
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Callable
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import REVIEW_LEASE_SECONDS, REVIEW_RETENTION_DAYS
+from storage.locking import file_lock
+from storage.claims_store import DEFAULT_CLAIMS_PATH, LOG_SUFFIX, LOCK_SUFFIX, atomic_write_json
+from storage.feedback_store import FeedbackStore, review_key
+from storage.partitions import iter_claims
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(DEFAULT_CLAIMS_PATH), 'review_queue.json')
+QUEUE_VERSION = 2
+
+# Compact once the log holds this many operations and more than twice the live entries
+COMPACT_MIN_OPS = 1000
+
+REVIEW_DECISIONS = ('ACCEPTED', 'REJECTED')
+
+
+def _claim_time(timestamp: Any, default: float) -> float:
+    """Epoch seconds of an ISO claim timestamp (`default` when missing or malformed)"""
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return default
+
+
+def expected_loss(result: Dict[str, Any]) -> float:
+    score = result.get('fraud_scores', {}).get('total', 0) or 0
+    amount = result.get('claim_amount', 0) or 0
+    return float(score) / 100.0 * float(amount)
+
+
+class LeaseError(Exception):
+    """The lease expired or belongs to another reviewer"""
+
+
+class ReviewQueue:
+    """
+    Persistent review queue shared by any number of reviewer processes
+
+    push()/enqueue_results() add claims, lease() hands out the claim with
+    the highest expected loss, complete() records the review outcome and
+    release() gives a claim back before its lease ends.
+
+    on_complete, if given, is called with every 'done' operation (claim_id,
+    reviewer, decision, note, ts) after it is durable, e.g. a FeedbackStore
+    collecting reviewer labels for retraining.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, lease_seconds: float = REVIEW_LEASE_SECONDS,
+                 clock: Callable[[], float] = time.time,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 retention_days: float = REVIEW_RETENTION_DAYS):
+        self.path = path
+        self.log_path = path + LOG_SUFFIX
+        self.lock_path = path + LOCK_SUFFIX
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self.on_complete = on_complete
+        self.retention_seconds = retention_days * 86400
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._reset()
+
+    def _reset(self):
+        self.entries = {}       # review key -> entry
+        self.completed = {}     # reviewed key -> claim time; not enqueued again until pruned
+        self._tokens = {}       # lease token -> review key
+        self._heap = []         # (-expected_loss, seq, key), lazily invalidated
+        self._leases = []       # (expires, token, key), lazily invalidated
+        self._seq = 0
+        self._log_offset = 0
+        self._log_ops = 0
+        self._snapshot_stamp = None
+
+    # ------------------------------------------------------------------
+    # Operation replay
+
+    def _queue(self, entry: Dict[str, Any]):
+        self._seq += 1
+        entry['seq'] = self._seq
+        entry['state'] = 'queued'
+        entry['owner'] = entry['token'] = entry['expires'] = None
+        heapq.heappush(self._heap, (-entry['expected_loss'], self._seq, entry['key']))
+
+    def _op_key(self, op: Dict[str, Any]) -> Optional[str]:
+        if 'key' in op:
+            return op['key']
+        # Operations logged before entries were keyed by claim_id + timestamp
+        if op['op'] == 'push':
+            return review_key(op['claim_id'], op.get('timestamp'))
+        return self._tokens.get(op.get('token')) or next(
+            (key for key, entry in self.entries.items() if entry['claim_id'] == op['claim_id']), None)
+
+    def _apply(self, op: Dict[str, Any]):
+        kind = op['op']
+        claim_id = op['claim_id']
+        key = self._op_key(op)
+        entry = self.entries.get(key)
+
+        if kind == 'push':
+            if key in self.completed or review_key(claim_id, None) in self.completed:
+                return
+            if entry is None:
+                entry = self.entries[key] = {'key': key, 'claim_id': claim_id, 'state': None}
+            entry.update({key: op[key] for key in ('expected_loss', 'score', 'amount', 'faskes_name', 'timestamp')})
+            if entry['state'] != 'leased':
+                # New priority takes effect now; a leased claim keeps it for its requeue
+                self._queue(entry)
+        elif kind == 'lease':
+            if entry is None:
+                return
+            entry.update({'state': 'leased', 'owner': op['owner'], 'token': op['token'], 'expires': op['expires']})
+            self._tokens[op['token']] = key
+            heapq.heappush(self._leases, (op['expires'], op['token'], key))
+        elif kind == 'release':
+            if entry is not None and entry['state'] == 'leased' and entry['token'] == op['token']:
+                self._tokens.pop(op['token'], None)
+                self._queue(entry)
+        elif kind == 'done':
+            if entry is not None and op.get('token') not in (None, entry['token']):
+                return
+            self._tokens.pop(op.get('token'), None)
+            if key is None:
+                key = review_key(claim_id, None)
+            self.entries.pop(key, None)
+            timestamp = op.get('timestamp', entry['timestamp'] if entry is not None else None)
+            self.completed[key] = _claim_time(timestamp, op.get('ts') or self.clock())
+
+    def _load_snapshot(self):
+        self._reset()
+        if not os.path.exists(self.path):
+            return
+        stat = os.stat(self.path)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version', 1) < 2:
+            # Version 1 kept bare claim ids: they block their id for one retention window
+            now = self.clock()
+            self.completed = {review_key(claim_id, None): now for claim_id in snapshot.get('completed', [])}
+        else:
+            self.completed = snapshot.get('completed', {})
+        for entry in snapshot.get('entries', []):
+            entry.setdefault('key', review_key(entry['claim_id'], entry.get('timestamp')))
+            self.entries[entry['key']] = entry
+            if entry['state'] == 'leased':
+                self._tokens[entry['token']] = entry['key']
+                heapq.heappush(self._leases, (entry['expires'], entry['token'], entry['key']))
+            else:
+                self._queue(entry)
+        self._snapshot_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _sync(self):
+        """Replay operations written since the last sync (caller holds the lock)"""
+        stamp = None
+        if os.path.exists(self.path):
+            stat = os.stat(self.path)
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if stamp != self._snapshot_stamp or log_size < self._log_offset:
+            # Another process compacted the queue
+            self._load_snapshot()
+        if log_size == self._log_offset:
+            return
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                op = json.loads(line)
+            except ValueError:
+                break
+            self._apply(op)
+            self._log_offset += len(line)
+            self._log_ops += 1
+
+        if self._log_offset < log_size:
+            # Torn tail from a crashed writer: drop it so appends stay parseable
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(self._log_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _write(self, ops: List[Dict[str, Any]]):
+        """Durably append operations, then apply them (caller holds the lock)"""
+        if not ops:
+            return
+        data = b''.join(
+            (json.dumps(op, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8') for op in ops
+        )
+        with open(self.log_path, 'ab') as log:
+            log.write(data)
+            log.flush()
+            os.fsync(log.fileno())
+        for op in ops:
+            self._apply(op)
+        self._log_offset += len(data)
+        self._log_ops += len(ops)
+        if self._log_ops >= COMPACT_MIN_OPS and self._log_ops > 2 * len(self.entries):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        cutoff = self.clock() - self.retention_seconds
+        self.completed = {key: time for key, time in self.completed.items() if time >= cutoff}
+        snapshot = {
+            'version': QUEUE_VERSION,
+            'entries': list(self.entries.values()),
+            'completed': self.completed
+        }
+        atomic_write_json(self.path, snapshot, indent=None)
+        # A crash here replays the old log over the new snapshot: idempotent
+        with open(self.log_path, 'wb') as log:
+            log.flush()
+            os.fsync(log.fileno())
+        stat = os.stat(self.path)
+        self._snapshot_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._log_offset = 0
+        self._log_ops = 0
+
+    def _requeue_expired(self, now: float) -> List[Dict[str, Any]]:
+        ops = []
+        while self._leases and self._leases[0][0] <= now:
+            expires, token, key = heapq.heappop(self._leases)
+            entry = self.entries.get(key)
+            if entry is not None and entry['state'] == 'leased' and entry['token'] == token:
+                ops.append({'op': 'release', 'key': key, 'claim_id': entry['claim_id'], 'token': token,
+                            'reason': 'timeout'})
+        return ops
+
+    def _top(self) -> Optional[Dict[str, Any]]:
+        """Highest expected loss among queued entries, discarding stale heap items"""
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self.entries.get(key)
+            if entry is not None and entry['state'] == 'queued' and entry['seq'] == seq:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    def push(self, result: Dict[str, Any]):
+        self.enqueue_results([result])
+
+    def enqueue_results(self, results: Iterable[Dict[str, Any]]) -> int:
+        """
+        Enqueue the NEEDS_REVIEW results (other decisions and results older
+        than the retention window are skipped)
+        Usable as a ClaimsWriter on_commit hook
+
+        Returns:
+            Number of claims pushed
+        """
+        cutoff = self.clock() - self.retention_seconds
+        ops = [
+            {
+                'op': 'push',
+                'key': review_key(result.get('claim_id'), result.get('timestamp')),
+                'claim_id': result.get('claim_id'),
+                'expected_loss': expected_loss(result),
+                'score': result.get('fraud_scores', {}).get('total'),
+                'amount': result.get('claim_amount'),
+                'faskes_name': result.get('faskes_name'),
+                'timestamp': result.get('timestamp')
+            }
+            for result in results
+            if result.get('decision') == 'NEEDS_REVIEW' and _claim_time(result.get('timestamp'), cutoff) >= cutoff
+        ]
+        if ops:
+            with file_lock(self.lock_path):
+                self._sync()
+                self._write(ops)
+        return len(ops)
+
+    __call__ = enqueue_results
+
+    def lease(self, reviewer: str, lease_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the queued claim with the highest expected loss
+
+        Returns:
+            Entry with 'token' (needed for complete/release), or None if empty
+        """
+        with file_lock(self.lock_path):
+            self._sync()
+            now = self.clock()
+            self._write(self._requeue_expired(now))
+            entry = self._top()
+            if entry is None:
+                return None
+            token = uuid.uuid4().hex
+            expires = now + (self.lease_seconds if lease_seconds is None else lease_seconds)
+            self._write([{'op': 'lease', 'key': entry['key'], 'claim_id': entry['claim_id'],
+                          'owner': reviewer, 'token': token, 'expires': expires}])
+            return dict(entry)
+
+    def _check_lease(self, claim_id: str, token: str) -> Dict[str, Any]:
+        entry = self.entries.get(self._tokens.get(token))
+        if entry is None or entry['claim_id'] != claim_id or entry['state'] != 'leased' or entry['token'] != token:
+            raise LeaseError(f"Claim {claim_id} is not leased with this token")
+        if entry['expires'] <= self.clock():
+            raise LeaseError(f"Lease on claim {claim_id} expired")
+        return entry
+
+    def complete(self, claim_id: str, token: str, decision: Optional[str] = None, note: str = None):
+        """Finish a review; the claim leaves the queue for good"""
+        if decision is not None and decision not in REVIEW_DECISIONS:
+            raise ValueError(f"decision must be one of {REVIEW_DECISIONS}")
+        with file_lock(self.lock_path):
+            self._sync()
+            entry = self._check_lease(claim_id, token)
+            op = {'op': 'done', 'key': entry['key'], 'claim_id': claim_id, 'timestamp': entry['timestamp'],
+                  'token': token, 'reviewer': entry['owner'], 'decision': decision, 'note': note,
+                  'ts': self.clock()}
+            self._write([op])
+            if self.on_complete is not None:
+                self.on_complete(op)
+
+    def release(self, claim_id: str, token: str):
+        """Give a leased claim back to the queue before the lease ends"""
+        with file_lock(self.lock_path):
+            self._sync()
+            entry = self._check_lease(claim_id, token)
+            self._write([{'op': 'release', 'key': entry['key'], 'claim_id': claim_id, 'token': token,
+                          'reason': 'released'}])
+
+    def peek(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Queued claims in priority order without leasing them"""
+        with file_lock(self.lock_path):
+            self._sync()
+        queued = (entry for entry in self.entries.values() if entry['state'] == 'queued')
+        return [dict(entry) for entry in heapq.nsmallest(limit, queued, key=lambda e: (-e['expected_loss'], e['seq']))]
+
+    def stats(self) -> Dict[str, int]:
+        with file_lock(self.lock_path):
+            self._sync()
+        leased = sum(1 for entry in self.entries.values() if entry['state'] == 'leased')
+        return {
+            'queued': len(self.entries) - leased,
+            'leased': leased,
+            'completed': len(self.completed),
+            'log_ops': self._log_ops
+        }
+
+    def compact(self):
+        with file_lock(self.lock_path):
+            self._sync()
+            self._compact_locked()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Review queue for NEEDS_REVIEW claims')
+    parser.add_argument('command', choices=['fill', 'lease', 'complete', 'release', 'list', 'stats', 'compact'])
+    parser.add_argument('claim_id', nargs='?')
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help='Queue snapshot path')
+    parser.add_argument('--source', default=DEFAULT_CLAIMS_PATH, help='Claims database for fill')
+    parser.add_argument('--reviewer', default=os.environ.get('USER', 'reviewer'))
+    parser.add_argument('--lease-seconds', type=float, default=REVIEW_LEASE_SECONDS)
+    parser.add_argument('--token')
+    parser.add_argument('--decision', choices=REVIEW_DECISIONS)
+    parser.add_argument('--note')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--feedback', default=None, help='Feedback store receiving review labels')
+    args = parser.parse_args()
+
+    feedback = FeedbackStore(args.feedback) if args.feedback else FeedbackStore()
+    queue = ReviewQueue(args.queue, args.lease_seconds, on_complete=feedback)
+
+    try:
+        if args.command == 'fill':
+            print(f"✓ Enqueued {queue.enqueue_results(iter_claims(db_path=args.source))} NEEDS_REVIEW claims")
+        elif args.command == 'lease':
+            entry = queue.lease(args.reviewer)
+            print(json.dumps(entry, indent=2, ensure_ascii=False) if entry else "Queue kosong")
+        elif args.command in ('complete', 'release'):
+            if not args.claim_id or not args.token:
+                parser.error(f"{args.command} needs a claim_id and --token")
+            if args.command == 'complete':
+                queue.complete(args.claim_id, args.token, args.decision, args.note)
+            else:
+                queue.release(args.claim_id, args.token)
+            print(f"✓ {args.claim_id}: {args.command}d")
+        elif args.command == 'list':
+            for entry in queue.peek(args.limit):
+                print(f"{entry['claim_id']:<20} loss={entry['expected_loss']:>14,.0f} "
+                      f"score={entry['score']:>3} {entry['faskes_name']}")
+        elif args.command == 'compact':
+            queue.compact()
+            print("✓ Compacted")
+        else:
+            print(json.dumps(queue.stats(), indent=2))
+    except LeaseError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Stress Test for Concurrent Claims Writers
+Launches many writer processes against one claims store and verifies that
+no record is lost or duplicated
+
+Usage:
+    python test_concurrent_writes.py [num_writers] [records_per_writer]
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import multiprocessing
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage.claims_store import STATE_SUFFIX, ClaimsWriter, load_claims
+
+
+def _writer_process(db_path: str, writer_id: int, num_records: int, start_event):
+    """Append records with a random group size, checkpointing now and then"""
+    rng = random.Random(writer_id)
+    start_event.wait()
+    
+    writer = ClaimsWriter(db_path, commit_every=rng.choice([1, 4, 16, 64]), commit_interval_ms=5)
+    for i in range(num_records):
+        writer.append({
+            'claim_id': f"CLM-W{writer_id:03d}-{i:06d}",
+            'decision': rng.choice(['ACCEPTED', 'NEEDS_REVIEW', 'REJECTED']),
+            'claim_amount': rng.randint(200000, 20000000)
+        })
+        if rng.random() < 0.01:
+            writer.checkpoint()
+    writer.close()
+
+
+def run_stress_test(num_writers: int = 16, records_per_writer: int = 500) -> bool:
+    print("="*60)
+    print("CLAIMS STORE - CONCURRENT WRITER STRESS TEST")
+    print("="*60)
+    print(f"  Writers: {num_writers}, records per writer: {records_per_writer}")
+    
+    work_dir = tempfile.mkdtemp(prefix='claims-stress-')
+    db_path = os.path.join(work_dir, 'claims.json')
+    
+    try:
+        start_event = multiprocessing.Event()
+        processes = [
+            multiprocessing.Process(target=_writer_process,
+                                    args=(db_path, writer_id, records_per_writer, start_event))
+            for writer_id in range(num_writers)
+        ]
+        for process in processes:
+            process.start()
+        start_event.set()
+        for process in processes:
+            process.join()
+        
+        failed = [p.exitcode for p in processes if p.exitcode != 0]
+        claims = load_claims(db_path)
+        counts = Counter(claim['claim_id'] for claim in claims)
+        expected = {
+            f"CLM-W{writer_id:03d}-{i:06d}"
+            for writer_id in range(num_writers)
+            for i in range(records_per_writer)
+        }
+        
+        lost = expected - set(counts)
+        duplicated = [claim_id for claim_id, count in counts.items() if count > 1]
+        leftovers = sorted(name for name in os.listdir(work_dir)
+                           if name not in ('claims.json', 'claims.json.lock', 'claims.json' + STATE_SUFFIX))
+        with open(db_path + STATE_SUFFIX, 'r', encoding='utf-8') as f:
+            committed = json.load(f)['committed']
+        
+        print(f"\n  Records stored: {len(claims)} / {len(expected)}")
+        print(f"  Lost: {len(lost)}")
+        print(f"  Duplicated: {len(duplicated)}")
+        print(f"  Failed writers: {len(failed)}")
+        print(f"  Leftover files: {leftovers or 'none'}")
+        print(f"  Committed count: {committed}")
+        
+        assert not failed, f"{len(failed)} writer processes failed"
+        assert not lost, f"{len(lost)} records lost, e.g. {sorted(lost)[:3]}"
+        assert not duplicated, f"{len(duplicated)} records duplicated, e.g. {duplicated[:3]}"
+        assert len(claims) == len(expected)
+        assert committed == len(expected), f"committed count {committed} != {len(expected)}"
+        
+        print("\n✓ No record lost or duplicated")
+        return True
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    num_writers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    records_per_writer = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    run_stress_test(num_writers, records_per_writer)
@@ -1,176 +1,286 @@
 #!/usr/bin/env python3
 """
 Test Script for Smart Claim BPJS System
-Generates multiple claims and processes them through the fraud detection pipeline
+Generates claims in memory and runs them end to end through the fraud
+detection pipeline, in one process
+
+Claims come from utils/bulk_generator.py (the quality levels of
+generate_patient.py) and are scored with main.process_claims(), batch by
+batch. Reported:
+
+    accuracy matrix  expected quality (good / medium / bad) x decision
+    checks           pass/fail gates on the matrix (exit code 1 on failure)
+    throughput       claims/s of scoring alone and of generation + scoring
+    latency          p50 / p95 / p99 of single claims: a sample of
+                     --latency-sample claims spread over the run, each
+                     timed in its own process_claims() call
+    batch latency    p50 / p95 / p99 wall time of one process_claims() call,
+                     and the mean time per claim within batches
+
+The checks are floors on the share of each quality level that gets its
+expected decision, plus ordering checks (bad claims are rejected more often
+than good ones, good claims accepted more often than bad ones). The floors
+sit below the current baseline: validate_faskes_registration() rejects
+registered faskes ids, so many good claims are rejected. Raise them when
+that is fixed.
+
+Claims are generated, scored and dropped block by block, so memory stays
+flat at 100k claims and beyond. Nothing is saved to claims.json, and the
+model is passed explicitly, so drift and shadow monitoring ignore test
+traffic. The summary goes to data/test_summary.json.
+
+Usage:
+    python test_system.py
+    python test_system.py --claims 100000 --seed 42
+    python test_system.py --claims 3000 --mix 6,3,1 --batch-size 1
+    python test_system.py --history /tmp/rings-large/patient_history.json --json
 """
 
+import argparse
 import os
 import sys
 import json
-import subprocess
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-def generate_and_process_claims(num_good=5, num_medium=5, num_bad=5):
+from config import PATIENT_DB_PATH, FASKES_DB_PATH, FRAUD_HISTORY_DB_PATH
+from main import STREAM_BATCH_SIZE, load_database, process_claims
+from ml_model.model_inference import load_deployed
+from utils.bulk_generator import DEFAULT_MIX, iter_chunks, master_entropy
+from utils.paths import resolve_config_path
+
+SUMMARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'test_summary.json')
+QUALITIES = ('good', 'medium', 'bad')
+DECISIONS = ('ACCEPTED', 'NEEDS_REVIEW', 'REJECTED')
+EXPECTED_DECISION = {'good': 'ACCEPTED', 'medium': 'NEEDS_REVIEW', 'bad': 'REJECTED'}
+DEFAULT_CLAIMS = 3000
+GENERATION_CHUNK = 10000
+DEFAULT_LATENCY_SAMPLE = 200
+
+# Minimum share of each quality level that gets its expected decision
+MIN_MATCH = {'good': 0.25, 'medium': 0.03, 'bad': 0.90}
+# Quality levels with fewer claims than this are not checked (too noisy)
+MIN_CHECK_CLAIMS = 30
+
+
+def load_reference_data() -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """Configured patient history, faskes registry and fraud history, wherever the script runs from"""
+    return tuple(load_database(resolve_config_path(path))
+                 for path in (PATIENT_DB_PATH, FASKES_DB_PATH, FRAUD_HISTORY_DB_PATH))
+
+
+def _percentiles_ms(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 in ms of measured wall times"""
+    if not latencies:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3)}
+
+
+def check_accuracy(matrix: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Pass/fail gates on the accuracy matrix (see module docstring)"""
+    totals = {quality: sum(matrix[quality].values()) for quality in QUALITIES}
+
+    def share(quality: str, decision: str) -> float:
+        return matrix[quality][decision] / totals[quality] if totals[quality] else 0.0
+
+    checks = []
+    for quality in QUALITIES:
+        if totals[quality] < MIN_CHECK_CLAIMS:
+            checks.append({'check': f"{quality} match", 'passed': True, 'skipped': True,
+                           'detail': f"{totals[quality]} claims (need {MIN_CHECK_CLAIMS})"})
+            continue
+        value = share(quality, EXPECTED_DECISION[quality])
+        checks.append({'check': f"{quality} match", 'passed': value >= MIN_MATCH[quality],
+                       'detail': f"{value:.1%} {EXPECTED_DECISION[quality]} (min {MIN_MATCH[quality]:.0%})"})
+
+    if min(totals['good'], totals['bad']) >= MIN_CHECK_CLAIMS:
+        for decision, higher, lower in (('REJECTED', 'bad', 'good'), ('ACCEPTED', 'good', 'bad')):
+            checks.append({'check': f"{decision.lower()} order",
+                           'passed': share(higher, decision) > share(lower, decision),
+                           'detail': f"{higher} {share(higher, decision):.1%} > {lower} {share(lower, decision):.1%}"})
+    return checks
+
+
+def run_system_test(num_claims: int = DEFAULT_CLAIMS, mix: Sequence[float] = DEFAULT_MIX,
+                    seed: Optional[int] = None, batch_size: int = STREAM_BATCH_SIZE,
+                    reference_data: Tuple = None,
+                    latency_sample: int = DEFAULT_LATENCY_SAMPLE) -> Dict[str, Any]:
     """
-    Generate and process multiple claims
-    
+    Generate and score `num_claims` claims in process
+
     Args:
-        num_good: Number of good claims to generate
-        num_medium: Number of medium claims to generate
-        num_bad: Number of bad claims to generate
+        num_claims: Claims to generate
+        mix: Weights of the good, medium and bad levels
+        seed: Generator master seed (None: fresh, reported in the summary)
+        batch_size: Claims per process_claims() call
+        reference_data: (patient_db, faskes_db, fraud_history_db); the configured databases when None
+        latency_sample: Claims timed one at a time (outside the throughput figures)
+
+    Returns:
+        Summary dict: counts, 'accuracy_matrix', 'quality_accuracy', 'checks', 'passed',
+        'throughput', 'latency_ms' (single claims), 'batch_latency_ms' (per
+        process_claims() call) and 'mean_claim_ms_in_batch'
     """
-    print("="*60)
-    print("SMART CLAIM BPJS - AUTOMATED TESTING")
-    print("="*60)
-    print(f"\nGenerating claims:")
-    print(f"  - Good claims: {num_good}")
-    print(f"  - Medium claims: {num_medium}")
-    print(f"  - Bad claims: {num_bad}")
-    print()
-    
-    generated_files = []
-    
-    # Generate good claims
-    print("[1/3] Generating GOOD claims (score < 10)...")
-    for i in range(num_good):
-        result = subprocess.run(
-            ['python', 'utils/generate_patient.py', '1'],
-            capture_output=True,
-            text=True
-        )
-        # Extract claim ID from output
-        for line in result.stdout.split('\n'):
-            if 'Saved to:' in line:
-                filepath = line.split('Saved to:')[1].strip()
-                generated_files.append(('good', filepath))
-                print(f"  ✓ Generated: {os.path.basename(filepath)}")
-    
-    # Generate medium claims
-    print(f"\n[2/3] Generating MEDIUM claims (score 10-60)...")
-    for i in range(num_medium):
-        result = subprocess.run(
-            ['python', 'utils/generate_patient.py', '2'],
-            capture_output=True,
-            text=True
-        )
-        for line in result.stdout.split('\n'):
-            if 'Saved to:' in line:
-                filepath = line.split('Saved to:')[1].strip()
-                generated_files.append(('medium', filepath))
-                print(f"  ✓ Generated: {os.path.basename(filepath)}")
-    
-    # Generate bad claims
-    print(f"\n[3/3] Generating BAD claims (score > 60)...")
-    for i in range(num_bad):
-        result = subprocess.run(
-            ['python', 'utils/generate_patient.py', '3'],
-            capture_output=True,
-            text=True
-        )
-        for line in result.stdout.split('\n'):
-            if 'Saved to:' in line:
-                filepath = line.split('Saved to:')[1].strip()
-                generated_files.append(('bad', filepath))
-                print(f"  ✓ Generated: {os.path.basename(filepath)}")
-    
-    print(f"\n✓ Total claims generated: {len(generated_files)}")
-    
-    # Process all claims
-    print("\n" + "="*60)
-    print("PROCESSING CLAIMS THROUGH FRAUD DETECTION PIPELINE")
-    print("="*60 + "\n")
-    
-    results = []
-    for quality, filepath in generated_files:
-        print(f"\nProcessing: {os.path.basename(filepath)} (expected: {quality})")
-        print("-" * 60)
-        
-        result = subprocess.run(
-            ['python', 'main.py', filepath],
-            capture_output=True,
-            text=True
-        )
-        
-        # Extract JSON output
-        output_lines = result.stdout.split('\n')
-        json_started = False
-        json_lines = []
-        for line in output_lines:
-            if line.strip() == 'JSON Output:':
-                json_started = True
-                continue
-            if json_started:
-                json_lines.append(line)
-        
-        if json_lines:
-            try:
-                claim_result = json.loads('\n'.join(json_lines))
-                results.append({
-                    'expected_quality': quality,
-                    'result': claim_result
-                })
-                
-                print(f"  Decision: {claim_result['decision']}")
-                print(f"  Total Score: {claim_result['fraud_scores']['total']}")
-                print(f"  Patient Score: {claim_result['fraud_scores']['patient']}")
-                print(f"  Faskes Score: {claim_result['fraud_scores']['faskes']}")
-                print(f"  AI Score: {claim_result['fraud_scores']['ai']}")
-            except json.JSONDecodeError:
-                print(f"  ✗ Failed to parse JSON output")
-    
-    # Summary
+    seed = master_entropy(seed)
+    model, scaler, _ = load_deployed()
+    if reference_data is None:
+        reference_data = load_reference_data()
+
+    matrix = {quality: {decision: 0 for decision in DECISIONS} for quality in QUALITIES}
+    claim_latencies, batch_latencies = [], []
+    stride = max(1, num_claims // latency_sample) if latency_sample > 0 else 0
+    generation_seconds = scoring_seconds = sampling_seconds = 0.0
+    position = 0
+    started = time.perf_counter()
+
+    chunks = iter_chunks(num_claims, 'mixed', mix, seed, chunk_size=GENERATION_CHUNK)
+    while True:
+        start = time.perf_counter()
+        text = next(chunks, None)
+        if text is None:
+            break
+        claims = [json.loads(line) for line in text.splitlines()]
+        generation_seconds += time.perf_counter() - start
+
+        # Sampled claims are timed alone before their batch, so the feature cache is still cold for them
+        sample_start = time.perf_counter()
+        if stride:
+            for index in range(-position % stride, len(claims), stride):
+                if len(claim_latencies) >= latency_sample:
+                    break
+                start = time.perf_counter()
+                process_claims([claims[index]], save=False, reference_data=reference_data, model=model, scaler=scaler)
+                claim_latencies.append(time.perf_counter() - start)
+        sampling_seconds += time.perf_counter() - sample_start
+        position += len(claims)
+
+        for offset in range(0, len(claims), batch_size):
+            batch = claims[offset:offset + batch_size]
+            start = time.perf_counter()
+            results = process_claims(batch, save=False, reference_data=reference_data, model=model, scaler=scaler)
+            elapsed = time.perf_counter() - start
+            scoring_seconds += elapsed
+            batch_latencies.append(elapsed)
+            for claim_data, result in zip(batch, results):
+                row = matrix[claim_data['quality_label']]
+                row[result['decision']] = row.get(result['decision'], 0) + 1
+    total_seconds = time.perf_counter() - started - sampling_seconds
+
+    checks = check_accuracy(matrix)
+    expected = {quality: sum(matrix[quality].values()) for quality in QUALITIES}
+    matched = {quality: matrix[quality][EXPECTED_DECISION[quality]] for quality in QUALITIES}
+    return {
+        'total_claims': num_claims,
+        'seed': seed,
+        'batch_size': batch_size,
+        'patient_history': len(reference_data[0]),
+        'decision_counts': {decision: sum(matrix[q].get(decision, 0) for q in QUALITIES) for decision in DECISIONS},
+        'expected_counts': expected,
+        'accuracy_matrix': matrix,
+        'quality_accuracy': matched,
+        'accuracy': round(sum(matched.values()) / num_claims, 4) if num_claims else 0.0,
+        'checks': checks,
+        'passed': all(check['passed'] for check in checks),
+        'throughput': {
+            'scoring_claims_per_sec': round(num_claims / scoring_seconds, 1) if scoring_seconds else 0.0,
+            'end_to_end_claims_per_sec': round(num_claims / total_seconds, 1) if total_seconds else 0.0,
+            'generation_seconds': round(generation_seconds, 3),
+            'scoring_seconds': round(scoring_seconds, 3),
+        },
+        'latency_claims': len(claim_latencies),
+        'latency_ms': _percentiles_ms(claim_latencies),
+        'batch_latency_ms': _percentiles_ms(batch_latencies),
+        'mean_claim_ms_in_batch': round(scoring_seconds / num_claims * 1000, 3) if num_claims else 0.0,
+    }
+
+
+def print_summary(summary: Dict[str, Any]):
+    matrix = summary['accuracy_matrix']
     print("\n" + "="*60)
     print("TESTING SUMMARY")
     print("="*60)
-    
-    decision_counts = {'ACCEPTED': 0, 'NEEDS_REVIEW': 0, 'REJECTED': 0}
-    quality_accuracy = {'good': 0, 'medium': 0, 'bad': 0}
-    
-    for item in results:
-        decision = item['result']['decision']
-        quality = item['expected_quality']
-        decision_counts[decision] += 1
-        
-        # Check if decision matches expected quality
-        if quality == 'good' and decision == 'ACCEPTED':
-            quality_accuracy['good'] += 1
-        elif quality == 'medium' and decision == 'NEEDS_REVIEW':
-            quality_accuracy['medium'] += 1
-        elif quality == 'bad' and decision == 'REJECTED':
-            quality_accuracy['bad'] += 1
-    
-    print(f"\nDecision Distribution:")
-    print(f"  - Auto Accepted: {decision_counts['ACCEPTED']}")
-    print(f"  - Needs Review: {decision_counts['NEEDS_REVIEW']}")
-    print(f"  - Auto Rejected: {decision_counts['REJECTED']}")
-    
-    print(f"\nQuality Matching:")
-    print(f"  - Good → Accepted: {quality_accuracy['good']}/{num_good} ({quality_accuracy['good']/num_good*100:.0f}%)")
-    print(f"  - Medium → Review: {quality_accuracy['medium']}/{num_medium} ({quality_accuracy['medium']/num_medium*100:.0f}%)")
-    print(f"  - Bad → Rejected: {quality_accuracy['bad']}/{num_bad} ({quality_accuracy['bad']/num_bad*100:.0f}%)")
-    
-    # Save summary
-    summary = {
-        'total_claims': len(results),
-        'decision_counts': decision_counts,
-        'quality_accuracy': quality_accuracy,
-        'results': results
-    }
-    
-    summary_path = 'data/test_summary.json'
-    with open(summary_path, 'w', encoding='utf-8') as f:
+    print(f"\nClaims: {summary['total_claims']:,}   Batch size: {summary['batch_size']}   "
+          f"Patient history: {summary['patient_history']:,}")
+
+    print(f"\nAccuracy Matrix (expected → decision):")
+    print(f"  {'':<8}" + ''.join(f"{decision:>14}" for decision in DECISIONS) + f"{'match':>9}")
+    for quality in QUALITIES:
+        total = summary['expected_counts'][quality]
+        share = summary['quality_accuracy'][quality] / total * 100 if total else 0.0
+        print(f"  {quality:<8}" + ''.join(f"{matrix[quality].get(d, 0):>14,}" for d in DECISIONS) + f"{share:>8.0f}%")
+    print(f"  Overall match: {summary['accuracy']:.1%}")
+
+    print(f"\nChecks:")
+    for check in summary['checks']:
+        mark = '-' if check.get('skipped') else ('✓' if check['passed'] else '✗')
+        print(f"  {mark} {check['check']:<16} {check['detail']}")
+
+    throughput, latency = summary['throughput'], summary['latency_ms']
+    print(f"\nThroughput:")
+    print(f"  - Scoring: {throughput['scoring_claims_per_sec']:,.0f} claims/s ({throughput['scoring_seconds']:.2f}s)")
+    print(f"  - Generation + scoring: {throughput['end_to_end_claims_per_sec']:,.0f} claims/s "
+          f"(generation {throughput['generation_seconds']:.2f}s)")
+    print(f"\nLatency, single claim ({summary['latency_claims']} timed alone, ms): "
+          f"p50 {latency['p50']:.2f}   p95 {latency['p95']:.2f}   p99 {latency['p99']:.2f}")
+    batch = summary['batch_latency_ms']
+    print(f"Latency per batch of {summary['batch_size']} (ms): "
+          f"p50 {batch['p50']:.2f}   p95 {batch['p95']:.2f}   p99 {batch['p99']:.2f}")
+    print(f"Mean time per claim within batches: {summary['mean_claim_ms_in_batch']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end test of the fraud detection pipeline')
+    parser.add_argument('--claims', type=int, default=DEFAULT_CLAIMS, help='Claims to generate and score')
+    parser.add_argument('--mix', default=','.join(map(str, DEFAULT_MIX)), help='Weights of good,medium,bad claims')
+    parser.add_argument('--seed', type=int, help='Generator seed (default: fresh, printed for replay)')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE, help='Claims per batch call')
+    parser.add_argument('--history', help='Patient history JSON to check against (default: PATIENT_DB_PATH)')
+    parser.add_argument('--latency-sample', type=int, default=DEFAULT_LATENCY_SAMPLE,
+                        help='Claims timed one at a time for the latency percentiles (0: none)')
+    parser.add_argument('--summary', default=SUMMARY_PATH, help='Where to save the summary JSON')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+
+    mix = [float(w) for w in args.mix.split(',')]
+    if len(mix) != 3 or min(mix) < 0 or sum(mix) <= 0:
+        parser.error('--mix needs three non-negative weights')
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    if args.latency_sample < 0:
+        parser.error('--latency-sample must not be negative')
+
+    reference_data = None
+    if args.history:
+        patient_db, faskes_db, fraud_history_db = load_reference_data()
+        reference_data = (load_database(args.history), faskes_db, fraud_history_db)
+
+    if not args.json:
+        print("="*60)
+        print("SMART CLAIM BPJS - AUTOMATED TESTING")
+        print("="*60)
+        print(f"\nGenerating and processing {args.claims:,} claims (good:medium:bad = {args.mix}) in process...")
+
+    summary = run_system_test(args.claims, mix, args.seed, args.batch_size, reference_data, args.latency_sample)
+
+    with open(args.summary, 'w', encoding='utf-8') as f:
         json.dump(summary, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n✓ Test summary saved to: {summary_path}")
-    print("\n" + "="*60)
-    print("TESTING COMPLETED")
-    print("="*60)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_summary(summary)
+        print(f"\n✓ Test summary saved to: {args.summary}")
+        print(f"  Replay: --seed {summary['seed']}")
+        print("\n" + "="*60)
+        print("TESTING COMPLETED" if summary['passed'] else "TESTING FAILED")
+        print("="*60)
+    sys.exit(0 if summary['passed'] else 1)
 
 
 if __name__ == '__main__':
-    # Change to backend directory
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Run tests
-    generate_and_process_claims(num_good=3, num_medium=3, num_bad=3)
+    main()
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Bulk Claim Generator
+Generates millions of dummy claims with NumPy and streams them into one
+NDJSON file (optionally gzip), for load tests and backtests
+
+Same claims as generate_patient.py (same FHIR layout, value ranges and
+quality levels), but every field of a chunk is sampled at once as a
+NumPy column instead of one random.choice() per field, and each claim is
+written as a single compact JSON line rendered from a precompiled
+template. No per-claim files, no subprocesses.
+
+Quality levels (as generate_patient.py):
+    1 = good    consistent findings, valid NIK/JKN, registered faskes
+    2 = medium  vitals and labs abnormal at random (coin flips)
+    3 = bad     NIK / JKN invalid 2 out of 3, faskes unregistered half of the
+                time, findings mostly abnormal, half of the amounts
+                inflated to 1.5-3x a severe-level amount
+`mixed` draws a level per claim with the --mix weights.
+
+Reproducible: the run is cut into fixed blocks of CHUNK_SIZE claims, each
+with its own RNG stream spawned from the master seed and claim ids taken
+from its global position (CLM-<date>-<sequence>, never colliding). Blocks
+are rendered by a process pool (--workers) and written to one file or to
+--shards files holding consecutive blocks. With --seed, the same seed,
+count and --date give byte-identical data (also across gzip runs) for any
+worker and shard count; without it the drawn seed is printed for replay.
+
+Usage:
+    python utils/bulk_generator.py 1000000 --output data/bulk_claims.ndjson.gz
+    python utils/bulk_generator.py 100000 --quality 3 --output bad.ndjson
+    python utils/bulk_generator.py 50000 --quality mixed --mix 6,3,1 --output - | python main.py --stream
+    python utils/bulk_generator.py 10000000 --seed 42 --workers 4 --shards 8 --output data/load/claims.ndjson.gz
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Any, IO, Iterable, List, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_generator import (
+    FIRST_NAMES_MALE, FIRST_NAMES_FEMALE, LAST_NAMES, CITIES, STREET_NAMES, ICD10_CODES, FASKES_NAMES
+)
+
+QUALITY_LABELS = {1: 'good', 2: 'medium', 3: 'bad'}
+DEFAULT_MIX = (1, 1, 1)
+CHUNK_SIZE = 50000
+# Reference time of seeded runs without --date (timestamps, ids and birth dates derive from it)
+REPRODUCIBLE_NOW = datetime(2026, 1, 1, 8, 0, 0)
+
+PHONE_PREFIXES = ['812', '813', '821', '822', '852', '853', '856', '857']
+PATIENT_CITIES = ['Jakarta Pusat', 'Jakarta Barat', 'Bandung', 'Surabaya']
+FASKES_CITIES = ['Jakarta Barat', 'Jakarta Pusat', 'Tangerang']
+SEVERITY_LEVELS = {'mild': 1, 'moderate': 2, 'severe': 3}
+DIAGNOSIS_SEVERITY = np.array([SEVERITY_LEVELS[d['severity']] for d in ICD10_CODES], dtype=np.int64)
+# generate_claim_amount() ranges by severity level (inclusive)
+AMOUNT_LOW = np.array([0, 200000, 1000000, 5000000], dtype=np.int64)
+AMOUNT_HIGH = np.array([0, 1000000, 5000000, 20000000], dtype=np.int64)
+
+
+def _json_fragment(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+# Pre-rendered JSON fragments of the categorical values
+DIAGNOSIS_JSON = np.array([_json_fragment(d) for d in ICD10_CODES], dtype=object)
+NAMES_JSON = {
+    gender: np.array([
+        _json_fragment({'text': f"{first} {last}", 'family': last, 'given': [first]})
+        for first in firsts for last in LAST_NAMES
+    ], dtype=object)
+    for gender, firsts in (('male', FIRST_NAMES_MALE), ('female', FIRST_NAMES_FEMALE))
+}
+STREETS = np.array(STREET_NAMES, dtype=object)
+ADDRESS_CITIES = np.array(CITIES, dtype=object)
+FASKES_NAME_VALUES = np.array([_json_fragment(name) for name in FASKES_NAMES], dtype=object)
+
+
+# Template fields: printf spec of each placeholder. Placeholders that are a
+# whole JSON value (numbers, pre-rendered JSON fragments) replace the quotes
+# too; the others sit inside a JSON string. A '%0*d' field takes two
+# columns: '<name>_width' and '<name>' (zero-padded digit strings).
+_FIELD_SPECS = {
+    'claim_id': '%s', 'timestamp': '%s', 'patient_no': '%d', 'nik': '%0*d', 'jkn': '%0*d',
+    'name': '%s', 'phone': '%s', 'gender': '%s', 'birth_date': '%s',
+    'address': '%s', 'city': '%s', 'postal': '%d',
+    'faskes_id': '%s', 'faskes_code': '%d', 'faskes_name': '%s',
+    'faskes_phone_prefix': '%s', 'faskes_phone_number': '%07d',
+    'faskes_street': '%s', 'faskes_street_no': '%d', 'faskes_address_city': '%s',
+    'faskes_city': '%s', 'faskes_postal': '%d', 'diagnosis': '%s',
+    'systolic_bp': '%d', 'diastolic_bp': '%d', 'temperature': '%.1f', 'pulse': '%d', 'respiratory_rate': '%d',
+    'hemoglobin': '%.1f', 'leukocyte': '%d', 'platelet': '%d', 'hematocrit': '%d',
+    'claim_amount': '%d', 'quality_level': '%d', 'quality_label': '%s',
+}
+_WHOLE_VALUE_FIELDS = {'name', 'faskes_name', 'diagnosis', 'systolic_bp', 'diastolic_bp', 'temperature', 'pulse',
+                       'respiratory_rate', 'hemoglobin', 'leukocyte', 'platelet', 'hematocrit',
+                       'claim_amount', 'quality_level'}
+_PLACEHOLDER = re.compile(r'"@@(\w+)@@"|@@(\w+)@@')
+
+
+def _build_template() -> Tuple[str, List[str]]:
+    """printf template of one NDJSON claim line (key order of generate_patient.run_smart_claim)"""
+    p = {name: f"@@{name}@@" for name in _FIELD_SPECS}
+    claim = {
+        'claim_id': p['claim_id'],
+        'timestamp': p['timestamp'],
+        'patient': {
+            'resourceType': 'Patient',
+            'id': f"patient-{p['patient_no']}",
+            'identifier': [
+                {'system': 'https://fhir.bpjs.go.id/sid/nik', 'value': p['nik']},
+                {'system': 'https://fhir.bpjs.go.id/sid/no-kartu', 'value': p['jkn']},
+            ],
+            'name': [p['name']],
+            'telecom': [{'system': 'phone', 'value': p['phone']}],
+            'gender': p['gender'],
+            'birthDate': p['birth_date'],
+            'address': [{'text': p['address'],
+                         'city': p['city'], 'postalCode': p['postal'], 'country': 'ID'}],
+            'active': True,
+        },
+        'faskes': {
+            'resourceType': 'Organization',
+            'id': p['faskes_id'],
+            'identifier': [{'use': 'official', 'system': 'https://fhir.bpjs.go.id/sid/kode-faskes',
+                            'value': p['faskes_code']}],
+            'active': True,
+            'type': [{'coding': [{'system': 'http://terminology.hl7.org/CodeSystem/organization-type',
+                                  'code': 'prov', 'display': 'Healthcare Provider'}]}],
+            'name': p['faskes_name'],
+            'telecom': [{'system': 'phone', 'value': f"+62{p['faskes_phone_prefix']}{p['faskes_phone_number']}",
+                         'use': 'work'}],
+            'address': [{'use': 'work', 'type': 'physical',
+                         'line': [f"Jl. {p['faskes_street']} No. {p['faskes_street_no']}, "
+                                  f"{p['faskes_address_city']}"],
+                         'city': p['faskes_city'], 'postalCode': p['faskes_postal'], 'country': 'ID'}],
+        },
+        'medical_data': {
+            'diagnosis': p['diagnosis'],
+            'vital_signs': {name: p[name] for name in
+                            ('systolic_bp', 'diastolic_bp', 'temperature', 'pulse', 'respiratory_rate')},
+            'lab_results': {name: p[name] for name in ('hemoglobin', 'leukocyte', 'platelet', 'hematocrit')},
+            'claim_amount': p['claim_amount'],
+            'patient_id': f"patient-{p['patient_no']}",
+        },
+        'quality_level': p['quality_level'],
+        'quality_label': p['quality_label'],
+    }
+    columns = []
+
+    def convert(match):
+        whole, inner = match.groups()
+        name = whole or inner
+        spec = _FIELD_SPECS[name]
+        if spec == '%0*d':
+            columns.append(f"{name}_width")
+        columns.append(name)
+        if whole and name not in _WHOLE_VALUE_FIELDS:
+            return f'"{spec}"'
+        return spec
+
+    template = _PLACEHOLDER.sub(convert, _json_fragment(claim).replace('%', '%%'))
+    return template + '\n', columns
+
+
+LINE_TEMPLATE, _TEMPLATE_COLUMNS = _build_template()
+
+PHONE_PREFIX_VALUES = np.array(PHONE_PREFIXES, dtype=object)
+PATIENT_CITY_VALUES = np.array(PATIENT_CITIES, dtype=object)
+FASKES_CITY_VALUES = np.array(FASKES_CITIES, dtype=object)
+# generate_faskes_id(): 10 registered ids, then the unregistered ones
+FASKES_ID_VALUES = np.array([f"org-example-{i:03d}" for i in range(1, 11)] +
+                            [f"org-unregistered-{i}" for i in range(1000, 10000)], dtype=object)
+GENDER_VALUES = np.array(['male', 'female'], dtype=object)
+QUALITY_LABEL_VALUES = np.array([None, 'good', 'medium', 'bad'], dtype=object)
+BIRTH_DAYS = (365 * 20, 365 * 70)
+
+
+def _choice(rng: np.random.Generator, values: np.ndarray, n: int) -> list:
+    return values[rng.integers(0, len(values), n)].tolist()
+
+
+def _nik(rng: np.random.Generator, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized data_generator.generate_nik() as (width, value) for '%0*d'
+
+    Valid: province (11-94), city + district, DDMMYY birth date (day + 40
+    for women), 4-digit serial. Invalid: 14/15/17 random digits, or a
+    16-digit number with province 99.
+    """
+    n = len(valid)
+    year = rng.integers(1950, 2006, n) % 100
+    day = rng.integers(1, 29, n) + 40 * rng.integers(0, 2, n)
+    valid_value = (rng.integers(11, 95, n) * 10 ** 14 + rng.integers(0, 10000, n) * 10 ** 10 +
+                   day * 10 ** 8 + rng.integers(1, 13, n) * 10 ** 6 + year * 10 ** 4 + rng.integers(0, 10000, n))
+
+    wrong_length = rng.random(n) < 0.5
+    length = np.where(wrong_length, np.array([14, 15, 17])[rng.integers(0, 3, n)], 16)
+    invalid_value = np.where(wrong_length, rng.integers(0, 10 ** length),
+                             99 * 10 ** 14 + rng.integers(0, 10 ** 14, n))
+    return np.where(valid, 16, length), np.where(valid, valid_value, invalid_value)
+
+
+def _jkn(rng: np.random.Generator, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized data_generator.generate_jkn_card() as (width, value): 13 digits, or 11/12/14/15"""
+    width = np.where(valid, 13, np.array([11, 12, 14, 15])[rng.integers(0, 4, len(valid))])
+    return width, rng.integers(0, 10 ** width)
+
+
+def _between(rng: np.random.Generator, abnormal: np.ndarray, normal_range, abnormal_range) -> list:
+    """random.randint() over the normal or abnormal range per row"""
+    n = len(abnormal)
+    return np.where(abnormal, rng.integers(abnormal_range[0], abnormal_range[1] + 1, n),
+                    rng.integers(normal_range[0], normal_range[1] + 1, n)).tolist()
+
+
+def _uniform(rng: np.random.Generator, abnormal: np.ndarray, normal_range, abnormal_range) -> list:
+    n = len(abnormal)
+    return np.round(np.where(abnormal, rng.uniform(*abnormal_range, n), rng.uniform(*normal_range, n)), 1).tolist()
+
+
+def _severity_amount(rng: np.random.Generator, severity: np.ndarray) -> np.ndarray:
+    return rng.integers(AMOUNT_LOW[severity], AMOUNT_HIGH[severity] + 1)
+
+
+def sample_columns(rng: np.random.Generator, quality: np.ndarray, claim_ids: Sequence[str],
+                   now: datetime) -> Dict[str, list]:
+    """
+    All template columns for a chunk of claims
+
+    Args:
+        rng: Random stream
+        quality: Quality level (1-3) per claim
+        claim_ids: Claim ids, row-aligned
+        now: Reference time for timestamps and birth dates
+
+    Returns:
+        dict of column name -> list of values
+    """
+    n = len(quality)
+    bad = quality == 3
+    columns = {'claim_id': list(claim_ids), 'timestamp': [now.strftime('%Y-%m-%dT%H:%M:%S+07:00')] * n}
+
+    # Patient (generate_patient_data)
+    female = rng.integers(0, 2, n)
+    name_index = rng.integers(0, len(NAMES_JSON['male']), n)
+    columns['name'] = np.where(female == 1, NAMES_JSON['female'][name_index], NAMES_JSON['male'][name_index]).tolist()
+    columns['gender'] = GENDER_VALUES[female].tolist()
+    columns['nik_width'], columns['nik'] = (a.tolist() for a in _nik(rng, ~bad | (rng.random(n) < 1 / 3)))
+    columns['jkn_width'], columns['jkn'] = (a.tolist() for a in _jkn(rng, ~bad | (rng.random(n) < 1 / 3)))
+    columns['patient_no'] = rng.integers(10000, 100000, n).tolist()
+    birth_dates = (np.datetime64(now.date(), 'D') -
+                   np.arange(BIRTH_DAYS[0], BIRTH_DAYS[1] + 1).astype('timedelta64[D]')).astype(str).astype(object)
+    columns['birth_date'] = _choice(rng, birth_dates, n)
+
+    # Faskes (generate_faskes_data)
+    registered = ~bad | (rng.random(n) < 0.5)
+    faskes_id = np.where(registered, rng.integers(0, 10, n), rng.integers(10, len(FASKES_ID_VALUES), n))
+    columns['faskes_id'] = FASKES_ID_VALUES[faskes_id].tolist()
+    columns['faskes_code'] = rng.integers(1000000000, 10000000000, n).tolist()
+    columns['faskes_name'] = _choice(rng, FASKES_NAME_VALUES, n)
+
+    for prefix, cities in (('', PATIENT_CITY_VALUES), ('faskes_', FASKES_CITY_VALUES)):
+        columns[prefix + 'phone_prefix'] = _choice(rng, PHONE_PREFIX_VALUES, n)
+        columns[prefix + 'phone_number'] = rng.integers(0, 10 ** 7, n).tolist()
+        columns[prefix + 'street'] = _choice(rng, STREETS, n)
+        columns[prefix + 'street_no'] = rng.integers(1, 1000, n).tolist()
+        columns[prefix + 'address_city'] = _choice(rng, ADDRESS_CITIES, n)
+        columns[prefix + 'city'] = _choice(rng, cities, n)
+        columns[prefix + 'postal'] = rng.integers(10000, 100000, n).tolist()
+    # The patient's phone and address are whole strings, so scenarios can substitute their own
+    columns['phone'] = [f"+62{prefix}{number:07d}" for prefix, number in
+                        zip(columns.pop('phone_prefix'), columns.pop('phone_number'))]
+    columns['address'] = [f"Jl. {street} No. {number}, {city}" for street, number, city in
+                          zip(columns.pop('street'), columns.pop('street_no'), columns.pop('address_city'))]
+
+    # Medical data (generate_ml_data)
+    diagnosis = rng.integers(0, len(ICD10_CODES), n)
+    severity = DIAGNOSIS_SEVERITY[diagnosis]
+    coin_vitals, coin_labs = rng.random(n), rng.random(n)
+    abnormal_vitals = np.select([quality == 1, quality == 2], [severity >= 2, coin_vitals < 0.5], coin_vitals < 2 / 3)
+    abnormal_labs = np.select([quality == 1, quality == 2], [severity == 3, coin_labs < 0.5], coin_labs < 2 / 3)
+    inflated = bad & (rng.random(n) < 0.5)
+    severe_amount = _severity_amount(rng, np.full(n, 3)) * rng.uniform(1.5, 3.0, n)
+
+    columns['diagnosis'] = DIAGNOSIS_JSON[diagnosis].tolist()
+    columns['systolic_bp'] = _between(rng, abnormal_vitals, (110, 130), (140, 180))
+    columns['diastolic_bp'] = _between(rng, abnormal_vitals, (70, 85), (90, 110))
+    columns['temperature'] = _uniform(rng, abnormal_vitals, (36.0, 37.5), (38.0, 40.0))
+    columns['pulse'] = _between(rng, abnormal_vitals, (60, 90), (100, 130))
+    columns['respiratory_rate'] = _between(rng, abnormal_vitals, (16, 22), (24, 35))
+    columns['hemoglobin'] = _uniform(rng, abnormal_labs, (13.0, 16.0), (9.0, 12.0))
+    columns['leukocyte'] = _between(rng, abnormal_labs, (4000, 10000), (2000, 3500))
+    columns['platelet'] = _between(rng, abnormal_labs, (150000, 400000), (50000, 120000))
+    columns['hematocrit'] = _between(rng, abnormal_labs, (40, 50), (30, 38))
+    columns['claim_amount'] = np.where(inflated, severe_amount.astype(np.int64),
+                                       _severity_amount(rng, severity)).tolist()
+    columns['quality_level'] = quality.tolist()
+    columns['quality_label'] = QUALITY_LABEL_VALUES[quality].tolist()
+    return columns
+
+
+def render_lines(columns: Dict[str, list]) -> str:
+    """NDJSON text of a chunk (one claim per line)"""
+    template = LINE_TEMPLATE
+    return ''.join([template % row for row in zip(*(columns[name] for name in _TEMPLATE_COLUMNS))])
+
+
+def quality_levels(rng: np.random.Generator, n: int, quality: str = '1',
+                   mix: Sequence[float] = DEFAULT_MIX) -> np.ndarray:
+    """Quality level per claim: a fixed level ('1'-'3') or 'mixed' with weights"""
+    if quality == 'mixed':
+        weights = np.asarray(mix, dtype=np.float64)
+        return rng.choice(np.array([1, 2, 3]), size=n, p=weights / weights.sum())
+    return np.full(n, int(quality), dtype=np.int64)
+
+
+def master_entropy(seed: Optional[int] = None) -> int:
+    """Master seed of a run: `seed` itself, or fresh OS entropy that can be passed back as --seed"""
+    return np.random.SeedSequence(seed).entropy
+
+
+def plan_blocks(count: int, quality: str = '1', mix: Sequence[float] = DEFAULT_MIX, seed: Optional[int] = None,
+                chunk_size: int = CHUNK_SIZE, now: Optional[datetime] = None) -> List[tuple]:
+    """
+    Render jobs of a run: one per block of `chunk_size` claims
+
+    Block i draws from the i-th stream spawned from the master seed
+    (np.random.SeedSequence) and numbers its claims from its global
+    position, so a block renders the same text whichever process or shard
+    renders it. The layout depends only on count and chunk_size: the same
+    seed, count and reference time give byte-identical output with any
+    worker or shard count.
+
+    Args:
+        count: Total claims
+        quality: '1'-'3' or 'mixed'
+        mix: Weights of levels 1,2,3 for 'mixed'
+        seed: Master seed (None: fresh entropy)
+        chunk_size: Claims per block
+        now: Reference time (default: REPRODUCIBLE_NOW when seeded, else the current time)
+
+    Returns:
+        List of job tuples for render_block()
+    """
+    if now is None:
+        now = REPRODUCIBLE_NOW if seed is not None else datetime.now()
+    starts = list(range(0, count, chunk_size))
+    children = np.random.SeedSequence(master_entropy(seed)).spawn(len(starts))
+    width = max(7, len(str(count)))
+    return [(child, start, min(chunk_size, count - start), width, quality, tuple(mix), now)
+            for child, start in zip(children, starts)]
+
+
+def render_block(job: tuple) -> str:
+    """NDJSON text of one planned block"""
+    seed, start, n, width, quality, mix, now = job
+    rng = np.random.default_rng(seed)
+    prefix = f"CLM-{now.strftime('%Y%m%d')}-"
+    ids = [f"{prefix}{i:0{width}d}" for i in range(start + 1, start + n + 1)]
+    return render_lines(sample_columns(rng, quality_levels(rng, n, quality, mix), ids, now))
+
+
+def _worker_count(workers: int, tasks: int) -> int:
+    if workers is None or workers == 0:
+        workers = 1
+    if workers < 0:
+        workers = max((os.cpu_count() or 1) + 1 + workers, 1)
+    return max(min(workers, tasks), 1)
+
+
+def iter_chunks(count: int, quality: str = '1', mix: Sequence[float] = DEFAULT_MIX, seed: Optional[int] = None,
+                chunk_size: int = CHUNK_SIZE, now: Optional[datetime] = None, workers: int = 1) -> Iterator[str]:
+    """
+    NDJSON text of `count` claims, block by block in order
+
+    Claim ids are CLM-<date>-<global sequence>, unique within the run.
+    With workers > 1 the blocks are rendered by a process pool; the text
+    is the same.
+    """
+    jobs = plan_blocks(count, quality, mix, seed, chunk_size, now)
+    workers = _worker_count(workers, len(jobs))
+    if workers <= 1:
+        yield from map(render_block, jobs)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(render_block, jobs)
+
+
+def generate_claims(count: int, quality: str = '1', mix: Sequence[float] = DEFAULT_MIX,
+                    seed: Optional[int] = None, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Claims as dicts (in-memory use; parse cost dominates beyond ~100k)"""
+    return [json.loads(line) for chunk in iter_chunks(count, quality, mix, seed, now=now)
+            for line in chunk.splitlines()]
+
+
+class _GzipOutput(gzip.GzipFile):
+    """gzip file without name or mtime in its header, so identical data compresses to identical bytes"""
+
+    def __init__(self, path: str, level: int):
+        self._raw = open(path, 'wb')
+        super().__init__(filename='', mode='wb', compresslevel=level, fileobj=self._raw, mtime=0)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def open_output(path: str, gzip_level: int = 1) -> IO:
+    """Text stream for an NDJSON output path ('-' = stdout, *.gz = gzip)"""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', write_through=False)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(_GzipOutput(path, gzip_level), encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def _write_texts(path: str, texts: Iterable[str], gzip_level: int = 1) -> int:
+    written = 0
+    stream = open_output(path, gzip_level)
+    try:
+        for text in texts:
+            stream.write(text)
+            written += len(text)
+    finally:
+        if path == '-':
+            stream.flush()
+            stream.detach()
+        else:
+            stream.close()
+    return written
+
+
+def write_ndjson(path: str, count: int, quality: str = '1', mix: Sequence[float] = DEFAULT_MIX,
+                 seed: Optional[int] = None, gzip_level: int = 1, chunk_size: int = CHUNK_SIZE,
+                 now: Optional[datetime] = None, workers: int = 1) -> int:
+    """Write `count` claims to path; returns the number of bytes of NDJSON text"""
+    return _write_texts(path, iter_chunks(count, quality, mix, seed, chunk_size, now, workers), gzip_level)
+
+
+def shard_path(path: str, index: int, shards: int) -> str:
+    """data/bulk.ndjson.gz -> data/bulk-00002-of-00008.ndjson.gz"""
+    directory, name = os.path.split(path)
+    stem, dot, extension = name.partition('.')
+    return os.path.join(directory, f"{stem}-{index:05d}-of-{shards:05d}{dot}{extension}")
+
+
+def _write_shard_job(job) -> int:
+    path, gzip_level, blocks = job
+    return _write_texts(path, map(render_block, blocks), gzip_level)
+
+
+def write_shards(path: str, count: int, shards: int, quality: str = '1', mix: Sequence[float] = DEFAULT_MIX,
+                 seed: Optional[int] = None, gzip_level: int = 1, chunk_size: int = CHUNK_SIZE,
+                 now: Optional[datetime] = None, workers: int = 1) -> List[str]:
+    """
+    Write `count` claims as `shards` files (see shard_path), one process per shard at a time
+
+    Each shard holds a contiguous run of blocks, so the shards concatenated
+    in order are the single-file output of the same seed.
+
+    Returns:
+        Shard paths in order
+    """
+    jobs = plan_blocks(count, quality, mix, seed, chunk_size, now)
+    bounds = [len(jobs) * i // shards for i in range(shards + 1)]
+    paths = [shard_path(path, i, shards) for i in range(shards)]
+    shard_jobs = [(paths[i], gzip_level, jobs[bounds[i]:bounds[i + 1]]) for i in range(shards)]
+
+    workers = _worker_count(workers, shards)
+    if workers <= 1:
+        for job in shard_jobs:
+            _write_shard_job(job)
+    else:
+        with Pool(workers) as pool:
+            pool.map(_write_shard_job, shard_jobs)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate many dummy claims as NDJSON')
+    parser.add_argument('count', type=int, help='Number of claims')
+    parser.add_argument('--output', '-o', required=True, help="NDJSON path (.gz = gzip, '-' = stdout)")
+    parser.add_argument('--quality', choices=['1', '2', '3', 'mixed'], default='1',
+                        help='1 good, 2 medium, 3 bad, mixed = per-claim draw')
+    parser.add_argument('--mix', default=','.join(map(str, DEFAULT_MIX)),
+                        help='Weights of levels 1,2,3 for --quality mixed')
+    parser.add_argument('--seed', type=int, help='Master seed (default: fresh entropy, printed for replay)')
+    parser.add_argument('--date', help='Reference time, ISO format (default: 2026-01-01T08:00 when seeded, else now)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (-1: all CPUs)')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='Write N files <name>-NNNNN-of-NNNNN<ext> instead of one')
+    parser.add_argument('--gzip-level', type=int, default=1, help='gzip compression level (1 fastest)')
+    args = parser.parse_args()
+
+    mix = [float(w) for w in args.mix.split(',')]
+    if len(mix) != 3 or min(mix) < 0 or sum(mix) <= 0:
+        parser.error('--mix needs three non-negative weights')
+    if args.shards and args.output == '-':
+        parser.error('--shards needs a file --output')
+    try:
+        now = datetime.fromisoformat(args.date) if args.date else None
+    except ValueError:
+        parser.error(f"--date: invalid ISO date '{args.date}'")
+    if now is None:
+        now = REPRODUCIBLE_NOW if args.seed is not None else datetime.now().replace(microsecond=0)
+    seed = master_entropy(args.seed)
+
+    start = time.perf_counter()
+    if args.shards:
+        paths = write_shards(args.output, args.count, args.shards, args.quality, mix, seed, args.gzip_level,
+                             now=now, workers=args.workers)
+        written = sum(os.path.getsize(path) for path in paths)
+    else:
+        written = write_ndjson(args.output, args.count, args.quality, mix, seed, args.gzip_level,
+                               now=now, workers=args.workers)
+    seconds = time.perf_counter() - start
+    if args.output != '-':
+        size = 'on disk' if args.shards else 'NDJSON'
+        print(f"✓ Generated {args.count:,} claims ({written / 1e6:.1f} MB {size}) in {seconds:.2f}s "
+              f"({args.count / seconds:,.0f} claims/s)")
+        if args.shards:
+            print(f"  Saved to: {paths[0]} ... {paths[-1]} ({args.shards} shards)")
+        else:
+            print(f"  Saved to: {args.output}")
+        print(f"  Replay: --seed {seed} --date {now.isoformat()}")
+
+if __name__ == '__main__':
+    main()
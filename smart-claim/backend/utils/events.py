@@ -0,0 +1,157 @@
+"""
+Event Emission Utilities
+Structured events for the fraud detection pipeline with pluggable sinks
+"""
+
+import json
+import sys
+import time
+from typing import Dict, Any, List, IO, Optional
+
+
+class JsonLinesSink:
+    """
+    Write every event as one compact JSON object per line
+    The stream is closed with the sink when owns_stream is set (a file the
+    caller opened for it); shared streams like stderr are only flushed
+    """
+
+    def __init__(self, stream: IO[str], owns_stream: bool = False):
+        self.stream = stream
+        self.owns_stream = owns_stream
+
+    def handle(self, event: Dict[str, Any]):
+        self.stream.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def close(self):
+        if self.owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+class BufferSink:
+    """Keep events in memory until they are replayed into another emitter (or dropped)"""
+
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event: Dict[str, Any]):
+        self.events.append(event)
+
+    def replay(self, emitter: 'EventEmitter'):
+        for event in self.events:
+            for sink in emitter.sinks:
+                sink.handle(event)
+        self.events.clear()
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """
+    Human readable progress report (the classic verbose main.py output)
+    Disabled unless explicitly attached to an emitter
+    """
+
+    def __init__(self, stream: IO[str] = None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def _print(self, text: str = ''):
+        self.stream.write(text + '\n')
+
+    def handle(self, event: Dict[str, Any]):
+        name = event['event']
+
+        if name == 'claim_started':
+            self._print(f"\n{'='*60}")
+            self._print(f"Processing Claim: {event['claim_id']}")
+            self._print(f"{'='*60}")
+        elif name == 'patient_checked':
+            self._print("\n[1/3] Checking Patient Fraud...")
+            self._print(f"  - Patient Fraud Score: {event['score']}")
+            self._print(f"  - Auto Reject: {event['auto_reject']}")
+            self._print(f"  - Red Flags: {event['red_flags']}")
+        elif name == 'faskes_checked':
+            self._print("\n[2/3] Checking Faskes Fraud...")
+            self._print(f"  - Faskes Fraud Score: {event['score']}")
+            self._print(f"  - Auto Reject: {event['auto_reject']}")
+            self._print(f"  - Red Flags: {event['red_flags']}")
+        elif name == 'ai_scored':
+            self._print("\n[3/3] Running AI Fraud Detection...")
+            self._print(f"  - AI Fraud Score: {event['score']}")
+            self._print(f"  - Confidence: {event['probability']:.2%}")
+        elif name == 'claim_decided':
+            scores = event['fraud_scores']
+            self._print(f"\n{'='*60}")
+            self._print("FRAUD DETECTION SUMMARY")
+            self._print(f"{'='*60}")
+            self._print(f"Patient: {event['patient_name']}")
+            self._print(f"Faskes: {event['faskes_name']}")
+            self._print(f"Diagnosis: {event['diagnosis']}")
+            self._print(f"Claim Amount: Rp {event['claim_amount']:,}")
+            self._print("\nFraud Scores:")
+            self._print(f"  - Patient Fraud: {scores['patient']}")
+            self._print(f"  - Faskes Fraud: {scores['faskes']}")
+            self._print(f"  - AI Detection: {scores['ai']}")
+            self._print(f"  - TOTAL SCORE: {scores['total']}")
+            self._print(f"\nDecision: {event['decision']}")
+            self._print(f"Reason: {event['decision_reason']}")
+            self._print(f"{'='*60}\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class EventEmitter:
+    """
+    Dispatch pipeline events to the attached sinks
+
+    An emitter without sinks is quiet: emit() returns immediately without
+    building the event record, so batch runs pay nothing for reporting.
+    """
+
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        self.sinks = list(sinks) if sinks else []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sinks)
+
+    def add_sink(self, sink: Any):
+        self.sinks.append(sink)
+
+    def emit(self, event: str, **fields):
+        if not self.sinks:
+            return
+
+        record = {'event': event, 'ts': round(time.time(), 6)}
+        record.update(fields)
+        for sink in self.sinks:
+            sink.handle(record)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class NullEmitter(EventEmitter):
+    """
+    Emitter that never reports; safe to share as a default argument
+    Attaching a sink raises instead of silently enabling every default caller
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sinks = ()
+
+    def add_sink(self, sink: Any):
+        raise TypeError("NullEmitter does not accept sinks; create an EventEmitter for reporting")
+
+    def emit(self, event: str, **fields):
+        return
+
+
+# Shared quiet emitter used when callers do not ask for reporting
+NULL_EMITTER = NullEmitter()
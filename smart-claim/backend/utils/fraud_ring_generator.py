@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Fraud Ring Scenario Generator
+Builds large patient histories with fraud rings plus a claim stream with
+ring burst submissions, to drive scale tests of the duplicate phone and
+address checks in check_fraud_pasien.py
+
+Every patient belongs to one group:
+
+    household  1-6 people at one address (HOUSEHOLD_SIZES); each member uses
+               the household phone with probability household_phone_share,
+               so legitimate duplicates exist at realistic density
+    ring       ring_size members; phone_share of them registered with the
+               ring phone, address_share with the ring address, and
+               variant_rate of the address sharers writing it as a
+               near-duplicate variant
+
+Address variants of the same address:
+    exact        Jl. Merdeka No. 12 RT 003/RW 005, Bandung
+    case         JL. MERDEKA NO. 12 RT 003/RW 005, BANDUNG
+    spacing      Jl.  Merdeka   No. 12  RT 003/RW 005,  Bandung
+    expanded     Jalan Merdeka Nomor 12 RT 003/RW 005, Bandung
+    abbreviated  Jl Merdeka no.12 rt003/rw005 Bandung
+check_duplicate_address() normalizes 'case' and 'spacing' to the exact
+address; 'expanded' and 'abbreviated' evade it.
+
+Claims: every ring member submits burst_claims claims inside its ring's
+burst window (a few hours somewhere in the period); household patients
+submit the background claims, spread over the whole period. Claims use the
+bulk_generator.py layout (quality 1 medical data, so only the ring signals
+differ) with the patient's own id, phone and address, in submission order.
+Patients are shuffled, so ring members are scattered over the history.
+
+The same seed, parameters and --date give identical output. The
+population is kept as NumPy columns and the history is written in chunks:
+the xlarge preset (10M patients, 1.2 GB history) takes about a minute and
+1.3 GB of memory on one core.
+
+Output directory:
+    patient_history.json  [{patient_id, phone, address}] (the PATIENT_DB_PATH format)
+    claims.ndjson.gz      claims in submission order (main.py --stream, analytics/backtest.py)
+    rings.json            ground truth: members, shared phone / address, variants, burst window
+    scenario.json         parameters, seed, counts and duplicate density at the config thresholds
+
+Usage:
+    python utils/fraud_ring_generator.py --preset small --seed 42 --output-dir /tmp/rings-small
+    python utils/fraud_ring_generator.py --preset xlarge --seed 42 --output-dir data/scenarios/xlarge
+    python utils/fraud_ring_generator.py --patients 200000 --ring-size 5,50 --variant-rate 0.8 --output-dir /tmp/s
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DUPLICATE_PHONE_THRESHOLD, DUPLICATE_ADDRESS_THRESHOLD
+from utils.bulk_generator import (
+    CHUNK_SIZE, PHONE_PREFIXES, REPRODUCIBLE_NOW, master_entropy, open_output, render_lines, sample_columns
+)
+from utils.data_generator import CITIES, STREET_NAMES
+
+PRESETS = {
+    'small': {'patients': 10000, 'claims': 2000},
+    'medium': {'patients': 100000, 'claims': 20000},
+    'large': {'patients': 1000000, 'claims': 100000},
+    'xlarge': {'patients': 10000000, 'claims': 500000},
+}
+DEFAULT_PARAMS = {
+    'ring_fraction': 0.01,         # share of patients in rings
+    'ring_size': (3, 25),          # members per ring (inclusive)
+    'phone_share': 0.7,            # ring members registered with the ring phone
+    'address_share': 0.6,          # ring members registered at the ring address
+    'variant_rate': 0.5,           # of those, writing a near-duplicate variant
+    'household_phone_share': 0.3,  # household members using the household phone
+    'burst_claims': (1, 3),        # claims per ring member (inclusive)
+    'burst_window_minutes': 120,
+    'period_days': 30,
+}
+HOUSEHOLD_SIZES = np.array([1, 2, 3, 4, 5, 6])
+HOUSEHOLD_WEIGHTS = np.array([0.30, 0.22, 0.20, 0.15, 0.09, 0.04])
+
+ADDRESS_VARIANTS = ('exact', 'case', 'spacing', 'expanded', 'abbreviated')
+_ADDRESS_FORMATS = (
+    'Jl. {0} No. {1} RT {2:03d}/RW {3:03d}, {4}',
+    'Jl. {0} No. {1} RT {2:03d}/RW {3:03d}, {4}',
+    'Jl.  {0}   No. {1}  RT {2:03d}/RW {3:03d},  {4} ',
+    'Jalan {0} Nomor {1} RT {2:03d}/RW {3:03d}, {4}',
+    'Jl {0} no.{1} rt{2:03d}/rw{3:03d} {4}',
+)
+_CASE_VARIANT = ADDRESS_VARIANTS.index('case')
+# Variants check_duplicate_address() normalizes to the exact address
+_NORMALIZED_VARIANTS = 3
+ADDRESS_PARTS = ('street', 'number', 'rt', 'rw', 'city')
+_PATIENT_TEMPLATE = '{"patient_id":"patient-%d","phone":"%s","address":"%s"}'
+PHONE_DIGITS = 8
+
+
+def _stream(seed: Optional[int], index: int) -> np.random.SeedSequence:
+    """Independent streams of a scenario: 0 population, 1 claim plan, 2 claim contents"""
+    return np.random.SeedSequence(master_entropy(seed)).spawn(3)[index]
+
+
+def _group_sizes(rng: np.random.Generator, total: int, sizes: np.ndarray,
+                 weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Group sizes drawn from `sizes` summing to exactly `total` (a short remainder joins the group before it)"""
+    if total <= 0:
+        return np.zeros(0, dtype=np.int64)
+    p = None if weights is None else weights / weights.sum()
+    batch = int(total / np.average(sizes, weights=p)) + 16
+    drawn = rng.choice(sizes, size=batch, p=p)
+    while drawn.sum() < total:
+        drawn = np.concatenate([drawn, rng.choice(sizes, size=batch, p=p)])
+    ends = np.cumsum(drawn)
+    last = int(np.searchsorted(ends, total))
+    drawn = drawn[:last + 1].astype(np.int64)
+    drawn[-1] -= ends[last] - total
+    if len(drawn) > 1 and drawn[-1] < sizes.min():
+        drawn[-2] += drawn[-1]
+        drawn = drawn[:-1]
+    return drawn
+
+
+def _phones(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Phone numbers encoded as prefix index * 10^8 + 8-digit subscriber number"""
+    return rng.integers(0, len(PHONE_PREFIXES), n) * 10 ** PHONE_DIGITS + rng.integers(0, 10 ** PHONE_DIGITS, n)
+
+
+def _addresses(rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    return {
+        'street': rng.integers(0, len(STREET_NAMES), n, dtype=np.int16),
+        'number': rng.integers(1, 1000, n, dtype=np.int16),
+        'rt': rng.integers(1, 21, n, dtype=np.int16),
+        'rw': rng.integers(1, 16, n, dtype=np.int16),
+        'city': rng.integers(0, len(CITIES), n, dtype=np.int16),
+    }
+
+
+def build_population(patients: int, seed: Optional[int] = None, **params) -> Dict[str, Any]:
+    """
+    Patient population with households and fraud rings, as NumPy columns
+
+    Args:
+        patients: Patients in the history
+        seed: Master seed
+        **params: Overrides of DEFAULT_PARAMS
+
+    Returns:
+        dict with per-patient columns 'phone', ADDRESS_PARTS, 'variant'
+        (index into ADDRESS_VARIANTS) and 'ring' (-1 for households), per-ring
+        'ring_phone' and 'ring_address', and the resolved 'params'
+    """
+    params = dict(DEFAULT_PARAMS, **params)
+    rng = np.random.default_rng(_stream(seed, 0))
+
+    ring_low, ring_high = params['ring_size']
+    ring_sizes = _group_sizes(rng, int(round(patients * params['ring_fraction'])),
+                              np.arange(ring_low, ring_high + 1))
+    household_sizes = _group_sizes(rng, patients - int(ring_sizes.sum()), HOUSEHOLD_SIZES, HOUSEHOLD_WEIGHTS)
+    rings = len(ring_sizes)
+    groups = rings + len(household_sizes)
+    # Groups [0, rings) are the rings
+    group = np.repeat(np.arange(groups, dtype=np.int32), np.concatenate([ring_sizes, household_sizes]))
+    in_ring = group < rings
+
+    group_phone = _phones(rng, groups)
+    share_phone = rng.random(patients) < np.where(in_ring, params['phone_share'], params['household_phone_share'])
+    phone = np.where(share_phone, group_phone[group], _phones(rng, patients))
+
+    group_address = _addresses(rng, groups)
+    own_address = _addresses(rng, patients)
+    share_address = ~in_ring | (rng.random(patients) < params['address_share'])
+    address = {part: np.where(share_address, group_address[part][group], own_address[part])
+               for part in ADDRESS_PARTS}
+    varied = in_ring & share_address & (rng.random(patients) < params['variant_rate'])
+    variant = np.where(varied, rng.integers(1, len(ADDRESS_VARIANTS), patients), 0)
+
+    # Scatter ring members over the history: row i is patient-(i + 1)
+    order = rng.permutation(patients)
+    population = {part: address[part][order] for part in ADDRESS_PARTS}
+    population.update({
+        'phone': phone[order],
+        'variant': variant[order].astype(np.int8),
+        'ring': np.where(in_ring, group, -1)[order].astype(np.int32),
+        'ring_phone': group_phone[:rings],
+        'ring_address': {part: group_address[part][:rings] for part in ADDRESS_PARTS},
+        'params': params,
+    })
+    return population
+
+
+def format_phones(codes: np.ndarray) -> List[str]:
+    prefixes = np.array(PHONE_PREFIXES, dtype=object)[codes // 10 ** PHONE_DIGITS].tolist()
+    return [f"+62{prefix}{number:08d}" for prefix, number in zip(prefixes, (codes % 10 ** PHONE_DIGITS).tolist())]
+
+
+def format_addresses(parts: Dict[str, np.ndarray], variant: Optional[np.ndarray] = None) -> List[str]:
+    """Address texts, written as the given ADDRESS_VARIANTS (default: exact)"""
+    streets = np.array(STREET_NAMES, dtype=object)[parts['street']].tolist()
+    cities = np.array(CITIES, dtype=object)[parts['city']].tolist()
+    variants = np.zeros(len(streets), dtype=np.int8) if variant is None else variant
+    texts = []
+    for v, street, number, rt, rw, city in zip(variants.tolist(), streets, parts['number'].tolist(),
+                                               parts['rt'].tolist(), parts['rw'].tolist(), cities):
+        text = _ADDRESS_FORMATS[v].format(street, number, rt, rw, city)
+        texts.append(text.upper() if v == _CASE_VARIANT else text)
+    return texts
+
+
+def _rows(population: Dict[str, Any], rows: np.ndarray) -> Tuple[List[str], List[str]]:
+    """(phones, addresses) of the given patient rows"""
+    parts = {part: population[part][rows] for part in ADDRESS_PARTS}
+    return format_phones(population['phone'][rows]), format_addresses(parts, population['variant'][rows])
+
+
+def patient_records(population: Dict[str, Any], start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Patient history records (check_patient_fraud's patient_db) of rows [start, end)"""
+    rows = np.arange(start, len(population['phone']) if end is None else end)
+    phones, addresses = _rows(population, rows)
+    return [{'patient_id': f"patient-{row + 1}", 'phone': phone, 'address': address}
+            for row, phone, address in zip(rows.tolist(), phones, addresses)]
+
+
+def write_patient_history(path: str, population: Dict[str, Any], chunk_size: int = 500000) -> int:
+    """Write the history as one JSON array, chunk by chunk; returns the number of records"""
+    count = len(population['phone'])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for start in range(0, count, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, count))
+            phones, addresses = _rows(population, rows)
+            lines = [_PATIENT_TEMPLATE % record for record in zip((rows + 1).tolist(), phones, addresses)]
+            f.write((',\n' if start else '\n') + ',\n'.join(lines))
+        f.write('\n]\n')
+    return count
+
+
+def plan_claims(population: Dict[str, Any], claims: int, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Submitting patient row and second in the period of every claim, in submission order
+
+    Ring members submit burst_claims claims each inside their ring's burst
+    window; `claims` background claims come from household patients.
+    """
+    params = population['params']
+    rng = np.random.default_rng(_stream(seed, 1))
+    period = int(params['period_days'] * 86400)
+    window = min(int(params['burst_window_minutes'] * 60), period)
+
+    ring = population['ring']
+    members = np.flatnonzero(ring >= 0)
+    low, high = params['burst_claims']
+    ring_rows = np.repeat(members, rng.integers(low, high + 1, len(members)))
+    burst_start = rng.integers(0, period - window + 1, len(population['ring_phone']))
+    ring_seconds = burst_start[ring[ring_rows]] + rng.integers(0, window, len(ring_rows))
+
+    households = np.flatnonzero(ring < 0)
+    background_rows = households[rng.integers(0, len(households), claims)] if len(households) else members[:0]
+    background_seconds = rng.integers(0, period, len(background_rows))
+
+    rows = np.concatenate([ring_rows, background_rows])
+    seconds = np.concatenate([ring_seconds, background_seconds])
+    order = np.argsort(seconds, kind='stable')
+    return {'row': rows[order], 'second': seconds[order], 'burst_start': burst_start, 'window': window}
+
+
+def iter_claim_chunks(population: Dict[str, Any], plan: Dict[str, np.ndarray], now: datetime,
+                      seed: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+    """NDJSON text of the planned claims, chunk by chunk; yields (text, claim ids, rows)"""
+    count = len(plan['row'])
+    children = _stream(seed, 2).spawn(-(-count // chunk_size))
+    period_start = np.datetime64(now.replace(microsecond=0), 's') - np.timedelta64(
+        int(population['params']['period_days'] * 86400), 's')
+    prefix = f"CLM-{now.strftime('%Y%m%d')}-"
+    width = max(7, len(str(count)))
+
+    for child, start in zip(children, range(0, count, chunk_size)):
+        end = min(start + chunk_size, count)
+        rows = plan['row'][start:end]
+        ids = [f"{prefix}{i:0{width}d}" for i in range(start + 1, end + 1)]
+        columns = sample_columns(np.random.default_rng(child), np.ones(end - start, dtype=np.int64), ids, now)
+        columns['phone'], columns['address'] = _rows(population, rows)
+        columns['patient_no'] = (rows + 1).tolist()
+        stamps = (period_start + plan['second'][start:end].astype('timedelta64[s]')).astype(str).tolist()
+        columns['timestamp'] = [stamp + '+07:00' for stamp in stamps]
+        yield render_lines(columns), ids, rows
+
+
+def _at_threshold(keys: np.ndarray, in_ring: np.ndarray, threshold: int) -> Dict[str, int]:
+    """Values shared by >= threshold patients, and how many ring / household patients have them"""
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    flagged = counts[inverse] >= threshold
+    return {
+        'threshold': threshold,
+        'shared_values': int((counts >= threshold).sum()),
+        'ring_patients': int((flagged & in_ring).sum()),
+        'household_patients': int((flagged & ~in_ring).sum()),
+    }
+
+
+def duplicate_density(population: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What check_duplicate_phone / check_duplicate_address would see: values
+    reaching the config thresholds and the patients behind them
+
+    Addresses are compared after the check's own normalization, so the
+    'case' and 'spacing' variants count as the exact address.
+    """
+    in_ring = population['ring'] >= 0
+    variant = population['variant'].astype(np.int64)
+    address_key = np.zeros(len(variant), dtype=np.int64)
+    for part, size in (('street', 100), ('number', 1000), ('rt', 100), ('rw', 100), ('city', 100)):
+        address_key = address_key * size + population[part]
+    address_key = address_key * 8 + np.where(variant < _NORMALIZED_VARIANTS, 0, variant)
+    return {
+        'phone': _at_threshold(population['phone'], in_ring, DUPLICATE_PHONE_THRESHOLD),
+        'address': _at_threshold(address_key, in_ring, DUPLICATE_ADDRESS_THRESHOLD),
+    }
+
+
+def ring_truth(population: Dict[str, Any], plan: Dict[str, np.ndarray], claim_ids: Dict[int, List[str]],
+               now: datetime) -> List[Dict[str, Any]]:
+    """Ground truth per ring: shared phone / address, members and what each used, burst window and claims"""
+    ring = population['ring']
+    members = np.flatnonzero(ring >= 0)
+    members = members[np.argsort(ring[members], kind='stable')]
+    member_ring = ring[members]
+    bounds = np.searchsorted(member_ring, np.arange(len(population['ring_phone']) + 1))
+    ring_phones = format_phones(population['ring_phone'])
+    ring_addresses = format_addresses(population['ring_address'])
+    period_start = now.replace(microsecond=0) - timedelta(days=population['params']['period_days'])
+    # Per member, in `members` order
+    shares_phone = (population['phone'][members] == population['ring_phone'][member_ring]).tolist()
+    shares_address = np.logical_and.reduce([population[part][members] == population['ring_address'][part][member_ring]
+                                            for part in ADDRESS_PARTS]).tolist()
+    variant = population['variant'][members].tolist()
+    rows = members.tolist()
+
+    truth = []
+    for r in range(len(ring_phones)):
+        span = range(bounds[r], bounds[r + 1])
+        start = period_start + timedelta(seconds=int(plan['burst_start'][r]))
+        truth.append({
+            'ring_id': r,
+            'phone': ring_phones[r],
+            'address': ring_addresses[r],
+            'members': [{
+                'patient_id': f"patient-{rows[i] + 1}",
+                'shares_phone': shares_phone[i],
+                'address_variant': ADDRESS_VARIANTS[variant[i]] if shares_address[i] else None,
+            } for i in span],
+            'burst': {'start': start.isoformat(), 'end': (start + timedelta(seconds=plan['window'])).isoformat()},
+            'claim_ids': [claim_id for i in span for claim_id in claim_ids.get(rows[i], [])],
+        })
+    return truth
+
+
+def generate_scenario(output_dir: str, patients: int, claims: int, seed: Optional[int] = None,
+                      now: Optional[datetime] = None, gzip_level: int = 1, **params) -> Dict[str, Any]:
+    """
+    Build a scenario and write its four files (see module docstring)
+
+    Args:
+        output_dir: Target directory
+        patients: Patients in the history
+        claims: Background claims (ring burst claims come on top)
+        seed: Master seed (None: fresh entropy, recorded in scenario.json)
+        now: End of the claim period (default: REPRODUCIBLE_NOW when seeded, else now)
+        gzip_level: claims.ndjson.gz compression level
+        **params: Overrides of DEFAULT_PARAMS
+
+    Returns:
+        The scenario.json summary
+    """
+    if now is None:
+        now = REPRODUCIBLE_NOW if seed is not None else datetime.now().replace(microsecond=0)
+    seed = master_entropy(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    timings = {}
+
+    start = time.perf_counter()
+    population = build_population(patients, seed, **params)
+    plan = plan_claims(population, claims, seed)
+    timings['build_seconds'] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    write_patient_history(os.path.join(output_dir, 'patient_history.json'), population)
+    timings['history_seconds'] = round(time.perf_counter() - start, 2)
+
+    start = time.perf_counter()
+    ring = population['ring']
+    ring_claim_ids = {}
+    stream = open_output(os.path.join(output_dir, 'claims.ndjson.gz'), gzip_level)
+    try:
+        for text, ids, rows in iter_claim_chunks(population, plan, now, seed):
+            stream.write(text)
+            for claim_id, row in zip(ids, rows.tolist()):
+                if ring[row] >= 0:
+                    ring_claim_ids.setdefault(row, []).append(claim_id)
+    finally:
+        stream.close()
+    timings['claims_seconds'] = round(time.perf_counter() - start, 2)
+
+    rings = ring_truth(population, plan, ring_claim_ids, now)
+    with open(os.path.join(output_dir, 'rings.json'), 'w', encoding='utf-8') as f:
+        json.dump(rings, f, ensure_ascii=False)
+
+    variants = np.bincount(population['variant'][ring >= 0], minlength=len(ADDRESS_VARIANTS))
+    summary = {
+        'seed': seed,
+        'now': now.isoformat(),
+        'params': dict(population['params'], patients=patients, claims=claims),
+        'patients': patients,
+        'rings': len(rings),
+        'ring_patients': int((ring >= 0).sum()),
+        'claims': len(plan['row']),
+        'ring_claims': sum(len(ids) for ids in ring_claim_ids.values()),
+        'ring_address_variants': {name: int(count) for name, count in zip(ADDRESS_VARIANTS, variants)},
+        'duplicate_density': duplicate_density(population),
+        'timings': timings,
+    }
+    with open(os.path.join(output_dir, 'scenario.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    return summary
+
+
+def _pair(text: str, cast=int) -> Tuple:
+    low, _, high = text.partition(',')
+    return cast(low), cast(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a fraud-ring scale scenario (history + claims)')
+    parser.add_argument('--output-dir', required=True, help='Directory for the scenario files')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small',
+                        help=', '.join(f"{name} = {p['patients']:,} patients" for name, p in PRESETS.items()))
+    parser.add_argument('--patients', type=int, help='Override the preset patient count')
+    parser.add_argument('--claims', type=int, help='Override the preset background claim count')
+    parser.add_argument('--ring-fraction', type=float, default=DEFAULT_PARAMS['ring_fraction'])
+    parser.add_argument('--ring-size', default='%d,%d' % DEFAULT_PARAMS['ring_size'], help='MIN,MAX members')
+    parser.add_argument('--phone-share', type=float, default=DEFAULT_PARAMS['phone_share'])
+    parser.add_argument('--address-share', type=float, default=DEFAULT_PARAMS['address_share'])
+    parser.add_argument('--variant-rate', type=float, default=DEFAULT_PARAMS['variant_rate'])
+    parser.add_argument('--household-phone-share', type=float, default=DEFAULT_PARAMS['household_phone_share'])
+    parser.add_argument('--burst-claims', default='%d,%d' % DEFAULT_PARAMS['burst_claims'],
+                        help='MIN,MAX claims per ring member')
+    parser.add_argument('--burst-window', type=float, default=DEFAULT_PARAMS['burst_window_minutes'],
+                        help='Burst window in minutes')
+    parser.add_argument('--period-days', type=float, default=DEFAULT_PARAMS['period_days'])
+    parser.add_argument('--seed', type=int, help='Master seed (default: fresh entropy, recorded in scenario.json)')
+    parser.add_argument('--date', help='End of the claim period, ISO format (default: 2026-01-01T08:00 when seeded)')
+    parser.add_argument('--gzip-level', type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        ring_size, burst_claims = _pair(args.ring_size), _pair(args.burst_claims)
+        now = datetime.fromisoformat(args.date) if args.date else None
+    except ValueError as e:
+        parser.error(str(e))
+    if not 1 <= ring_size[0] <= ring_size[1] or not 0 <= burst_claims[0] <= burst_claims[1]:
+        parser.error('--ring-size and --burst-claims need 0 < MIN <= MAX')
+    preset = PRESETS[args.preset]
+
+    start = time.perf_counter()
+    summary = generate_scenario(
+        args.output_dir, args.patients or preset['patients'],
+        preset['claims'] if args.claims is None else args.claims, args.seed, now, args.gzip_level,
+        ring_fraction=args.ring_fraction, ring_size=ring_size, phone_share=args.phone_share,
+        address_share=args.address_share, variant_rate=args.variant_rate,
+        household_phone_share=args.household_phone_share, burst_claims=burst_claims,
+        burst_window_minutes=args.burst_window, period_days=args.period_days,
+    )
+    density = summary['duplicate_density']
+
+    print(f"\n{'='*60}")
+    print("FRAUD RING SCENARIO")
+    print(f"{'='*60}")
+    print(f"Patients: {summary['patients']:,}   Rings: {summary['rings']:,} "
+          f"({summary['ring_patients']:,} members)")
+    print(f"Claims:   {summary['claims']:,}   from rings: {summary['ring_claims']:,}")
+    print("Ring address variants: " + ', '.join(f"{name} {count:,}"
+                                                for name, count in summary['ring_address_variants'].items()))
+    for check in ('phone', 'address'):
+        stats = density[check]
+        print(f"  {check:<8} >= {stats['threshold']} patients: {stats['shared_values']:,} values, "
+              f"{stats['ring_patients']:,} ring / {stats['household_patients']:,} household patients")
+    print(f"✓ Written to {args.output_dir} in {time.perf_counter() - start:.1f}s")
+    print(f"  Replay: --seed {summary['seed']} --date {summary['now']}")
+
+
+if __name__ == '__main__':
+    main()
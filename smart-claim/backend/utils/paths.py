@@ -0,0 +1,20 @@
+"""
+Path Utilities
+Resolution of the repository-relative paths used in config.py
+"""
+
+import os
+
+# Repository root: config paths are relative to it
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def resolve_config_path(path: str) -> str:
+    """
+    Config paths are relative to the repository root; absolute paths and
+    paths whose directory exists from the current directory are kept, so
+    output files that do not exist yet resolve the same way as inputs
+    """
+    if os.path.isabs(path) or os.path.exists(os.path.dirname(path) or '.'):
+        return path
+    return os.path.join(REPO_ROOT, path)